@@ -0,0 +1,275 @@
+"""
+Vectorized backtester for the transaction-cost models.
+
+Each (instrument, day) of a market data tape is one task. A task replays
+the book rows in columnar chunks, samples the top of the book every
+sample_interval_ms into preallocated arrays, and evaluates every cost model
+over whole arrays of (sample, order size) pairs. Tasks are spread across a
+process pool and their errors are aggregated per model.
+
+The tape holds books and tickers but no private fills, so "realized"
+costs are measured from the recorded books:
+- slippage: depth-walk cost of a market buy of each size at sample time
+- market impact: notional times the absolute mid move over horizon
+- maker/taker: whether a passive buy at the best bid would have been
+  crossed by the best ask within the horizon (1 = maker fill)
+
+The models are called as /price calls them: with the realized volatility
+scaled to vol_horizon seconds (the volatility service's convention) and
+the instrument's (exchange, instId) market key. Their slippage and impact
+predictions are USD costs, as /price sums them, so those errors are
+reported in bps of the order notional; maker/taker errors are in
+probability.
+
+Usage (from backend/):
+    python -m backtest.engine --tape /data/tape --workers 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from market.order_book import OrderBook
+from market.tape import FLAG_FIRST, FLAG_SNAPSHOT, TapeReader
+
+DEFAULT_CONFIG = {
+    "sample_interval_ms": 1000,   # book sampling period
+    "depth": 50,                  # levels per side handed to the models
+    "quantities_usd": [10, 100, 1000, 10000],
+    "volatility_window": 60,      # samples in the rolling realized volatility
+    "vol_horizon": 86400.0,       # seconds the volatility fed to the models is scaled to
+    "exchange": "OKX",            # venue the tape was recorded on (market key of the impact table)
+    "horizon": 10,                # samples ahead for realized impact / maker fills
+    "chunk_rows": 1 << 16,        # tape rows loaded per chunk
+    "eval_samples": 4096,         # samples per vectorized model evaluation
+}
+
+MODELS = ("slippage", "market_impact", "maker_taker")
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def sample_books(reader, inst_id, day, config):
+    """
+    Replay one day of book rows and sample the top of the book.
+
+    Returns:
+    - (ts, asks, bids): sample timestamps (ms) and (n, depth, 2) level arrays,
+      padded with zero size where the book is shallower than depth
+    """
+    records = reader.open(inst_id, day, "book")
+    depth = config["depth"]
+    interval = config["sample_interval_ms"]
+    capacity = 1024
+    ts_out = np.empty(capacity, dtype=np.int64)
+    asks_out = np.zeros((capacity, depth, 2))
+    bids_out = np.zeros((capacity, depth, 2))
+    n = 0
+    book = OrderBook(inst_id)
+    next_sample = None
+
+    def take_sample(ts):
+        nonlocal n, capacity, ts_out, asks_out, bids_out
+        if n == capacity:
+            capacity *= 2
+            ts_out = np.resize(ts_out, capacity)
+            asks_out = np.concatenate([asks_out, np.zeros_like(asks_out)])
+            bids_out = np.concatenate([bids_out, np.zeros_like(bids_out)])
+        asks, bids = book.top(depth)
+        ts_out[n] = ts
+        asks_out[n] = 0
+        bids_out[n] = 0
+        asks_out[n, : len(asks)] = asks
+        bids_out[n, : len(bids)] = bids
+        n += 1
+
+    chunk_rows = config["chunk_rows"]
+    for start in range(0, len(records), chunk_rows):
+        # Only this chunk is paged in; columns are read as plain arrays
+        chunk = records[start : start + chunk_rows]
+        ts_col = np.asarray(chunk["ts"])
+        prices = np.asarray(chunk["price"]).tolist()
+        sizes = np.asarray(chunk["size"]).tolist()
+        sides = np.asarray(chunk["side"]).tolist()
+        flags = np.asarray(chunk["flags"]).tolist()
+        for i in range(len(chunk)):
+            if flags[i] & FLAG_FIRST:
+                ts = int(ts_col[i])
+                if next_sample is not None and ts >= next_sample and book.asks.count and book.bids.count:
+                    take_sample(next_sample)
+                    next_sample += interval * ((ts - next_sample) // interval + 1)
+                if flags[i] & FLAG_SNAPSHOT:
+                    book.reset()
+                    book.synced = True
+                if next_sample is None:
+                    next_sample = ts - ts % interval + interval
+            side = sides[i]
+            if side == 1:
+                book.bids.apply(prices[i], sizes[i])
+            elif side == -1:
+                book.asks.apply(prices[i], sizes[i])
+    return ts_out[:n], asks_out[:n], bids_out[:n]
+
+
+def realized_volatility(mids, window):
+    """Rolling std of log mid returns over the previous window samples (per sample interval)."""
+    returns = np.diff(np.log(mids), prepend=np.log(mids[:1]))
+    vol = np.empty_like(mids)
+    if len(mids) > window:
+        windows = np.lib.stride_tricks.sliding_window_view(returns, window)
+        vol[window - 1:] = windows.std(axis=1)
+        vol[: window - 1] = vol[window - 1]
+    else:
+        vol[:] = returns.std() if len(returns) else 0.0
+    return vol
+
+
+def evaluate_day(root, inst_id, day, config=None):
+    """
+    Backtest every cost model on one (instrument, day).
+
+    Returns:
+    - dict model -> float32 array of errors (prediction - realized); bps of
+      the order notional for slippage and market_impact
+    """
+    from models.depth_walk import walk_books
+    from models.maker_taker import estimate_maker_taker_batch
+    from models.market_impact import estimate_market_impact_batch
+    from models.slippage import estimate_slippage_batch
+
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    ts, asks, bids = sample_books(TapeReader(root), inst_id, day, config)
+    errors = {model: [] for model in MODELS}
+    horizon = config["horizon"]
+    if len(ts) <= horizon + 1:
+        return {model: np.empty(0, dtype=np.float32) for model in MODELS}
+
+    best_ask, best_bid = asks[:, 0, 0], bids[:, 0, 0]
+    mids = (best_ask + best_bid) / 2
+    # Per-sample std scaled to vol_horizon, like the volatility served to /price
+    samples_per_horizon = config["vol_horizon"] * 1000 / config["sample_interval_ms"]
+    volatility = realized_volatility(mids, config["volatility_window"]) * np.sqrt(samples_per_horizon)
+    market = (config["exchange"], inst_id)
+    quantities = np.asarray(config["quantities_usd"], dtype=np.float64)
+    n_sizes = len(quantities)
+
+    # Realized outcomes that look ahead by horizon samples (last horizon samples dropped)
+    usable = len(ts) - horizon
+    mid_move = np.abs(mids[horizon:] - mids[:usable]) / mids[:usable]
+    future_asks = np.lib.stride_tricks.sliding_window_view(best_ask[1:], horizon)[:usable]
+    maker_filled = (future_asks.min(axis=1) <= best_bid[:usable]).astype(np.float64)
+
+    step = config["eval_samples"]
+    for lo in range(0, usable, step):
+        hi = min(lo + step, usable)
+        a, b, vol = asks[lo:hi], bids[lo:hi], volatility[lo:hi]
+        spread = a[:, 0, 0] - b[:, 0, 0]
+        bid_qty, ask_qty = b[:, :, 1].sum(axis=1), a[:, :, 1].sum(axis=1)
+        imbalance = (bid_qty - ask_qty) / (bid_qty + ask_qty + 1e-9)
+
+        # One row per (sample, size), sample-major
+        q = np.tile(quantities, hi - lo)
+        v = np.repeat(vol, n_sizes)
+        X = np.column_stack((np.repeat(spread, n_sizes), np.repeat(imbalance, n_sizes), q, v))
+
+        walk = walk_books(a, quantities, side="buy", notional=True)
+        realized_slippage = (walk["slippage"] * walk["notional"]).ravel()
+        errors["slippage"].append((estimate_slippage_batch(X) - realized_slippage) / q * 1e4)
+
+        realized_impact = (mid_move[lo:hi, None] * quantities[None, :]).ravel()
+        errors["market_impact"].append((estimate_market_impact_batch(q, v, market) - realized_impact) / q * 1e4)
+
+        maker_prob = estimate_maker_taker_batch(np.column_stack((spread, vol)))
+        errors["maker_taker"].append(maker_prob - maker_filled[lo:hi])
+
+    return {model: np.concatenate(chunks).astype(np.float32) for model, chunks in errors.items()}
+
+
+def summarize_errors(errors):
+    """Bias, MAE, RMSE and error quantiles of one model's error array."""
+    if len(errors) == 0:
+        return {"n": 0}
+    errors = errors.astype(np.float64)
+    summary = {
+        "n": int(len(errors)),
+        "bias": float(errors.mean()),
+        "mae": float(np.abs(errors).mean()),
+        "rmse": float(np.sqrt((errors ** 2).mean())),
+    }
+    for q, value in zip(QUANTILES, np.quantile(errors, QUANTILES)):
+        summary[f"q{int(q * 100):02d}"] = float(value)
+    return summary
+
+
+def _task(args):
+    root, inst_id, day, config = args
+    return inst_id, day, evaluate_day(root, inst_id, day, config)
+
+
+def run_backtest(root, instruments=None, days=None, workers=None, config=None):
+    """
+    Backtest all (instrument, day) pairs of a tape across a process pool.
+
+    Parameters:
+    - root: tape directory
+    - instruments: instrument ids to include (default: all on the tape)
+    - days: UTC days to include (default: all)
+    - workers: process count (default: os.cpu_count())
+    - config: overrides for DEFAULT_CONFIG
+
+    Returns:
+    - dict with per-model summaries overall and per instrument
+    """
+    reader = TapeReader(root)
+    tasks = [
+        (root, inst_id, day, config)
+        for inst_id in (instruments or reader.instruments())
+        for day in reader.days(inst_id)
+        if days is None or day in days
+    ]
+    per_instrument = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for inst_id, day, errors in pool.map(_task, tasks):
+            slot = per_instrument.setdefault(inst_id, {model: [] for model in MODELS})
+            for model in MODELS:
+                slot[model].append(errors[model])
+
+    overall = {model: [] for model in MODELS}
+    report = {"tasks": len(tasks), "instruments": {}}
+    for inst_id, models in per_instrument.items():
+        report["instruments"][inst_id] = {}
+        for model, chunks in models.items():
+            joined = np.concatenate(chunks)
+            overall[model].append(joined)
+            report["instruments"][inst_id][model] = summarize_errors(joined)
+    report["overall"] = {
+        model: summarize_errors(np.concatenate(chunks) if chunks else np.empty(0, dtype=np.float32))
+        for model, chunks in overall.items()
+    }
+    return report
+
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description="Backtest the cost models over a market data tape")
+    parser.add_argument("--tape", required=True, help="tape directory (see market.tape)")
+    parser.add_argument("--instruments", help="comma-separated instrument ids")
+    parser.add_argument("--days", help="comma-separated UTC days (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--sample-interval-ms", type=int, default=DEFAULT_CONFIG["sample_interval_ms"])
+    parser.add_argument("--exchange", default=DEFAULT_CONFIG["exchange"], help="venue the tape was recorded on")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = run_backtest(
+        args.tape,
+        instruments=args.instruments.split(",") if args.instruments else None,
+        days=set(args.days.split(",")) if args.days else None,
+        workers=args.workers,
+        config={"sample_interval_ms": args.sample_interval_ms, "exchange": args.exchange},
+    )
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["workers"] = args.workers
+    print(json.dumps(report, indent=1))
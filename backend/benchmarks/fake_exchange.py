@@ -0,0 +1,133 @@
+"""
+Local stand-in for the OKX REST and WebSocket APIs serving fixtures.
+
+REST: GET /api/v5/market/tickers returns benchmarks/fixtures/tickers.json
+with the ts bumped and prices jittered per request, so the backend sees
+market data move. WebSocket: the `books` channel replays a synthetic (or
+recorded) stream through market.fake_okx_ws.FakeOkxServer.
+
+Usage (from backend/):
+    python -m benchmarks.fake_exchange --rest-port 8801 --ws-port 8802
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from market.fake_okx_ws import FakeOkxServer, load_recording, synthetic_book_stream
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_tickers(path=None):
+    with open(path or os.path.join(FIXTURES_DIR, "tickers.json")) as f:
+        return json.load(f)
+
+
+class _TickersHandler(BaseHTTPRequestHandler):
+    fixture = None
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if not self.path.startswith("/api/v5/market/tickers"):
+            self.send_error(404)
+            return
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            n = cls.requests
+        payload = copy.deepcopy(cls.fixture)
+        for i, item in enumerate(payload["data"]):
+            item["ts"] = str(int(item["ts"]) + n * 100)
+            # Move the touch by one tick every few requests
+            if (n + i) % 3 == 0:
+                decimals = len(item["askPx"].split(".")[1]) if "." in item["askPx"] else 0
+                tick = 10 ** -decimals
+                item["askPx"] = f"{float(item['askPx']) + tick:.{decimals}f}"
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeExchange:
+    """
+    REST + WebSocket stand-in running on background threads.
+
+    Parameters:
+    - rest_port, ws_port: listen ports (0 picks free ports)
+    - books: instruments served on the books channel
+    - recording: optional JSONL recording to replay instead of synthetic books
+    - ws_interval: seconds between book updates
+    """
+
+    def __init__(self, rest_port=0, ws_port=0, books=("BTC-USDT-SWAP",), recording=None,
+                 tickers_path=None, ws_interval=0.01):
+        self.rest_port = rest_port
+        self.ws_port = ws_port
+        self.books = books
+        self.recording = recording
+        self.tickers_path = tickers_path
+        self.ws_interval = ws_interval
+        self._http = None
+        self._ws_loop = None
+
+    @property
+    def rest_url(self):
+        return f"http://127.0.0.1:{self.rest_port}"
+
+    @property
+    def ws_url(self):
+        return f"ws://127.0.0.1:{self.ws_port}"
+
+    def start(self):
+        handler = type("TickersHandler", (_TickersHandler,), {"fixture": load_tickers(self.tickers_path)})
+        self._http = ThreadingHTTPServer(("127.0.0.1", self.rest_port), handler)
+        self.rest_port = self._http.server_address[1]
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+
+        if self.recording:
+            streams = {inst_id: load_recording(self.recording) for inst_id in self.books}
+        else:
+            streams = {inst_id: synthetic_book_stream(inst_id, n_updates=100000, seed=i)
+                       for i, inst_id in enumerate(self.books)}
+        server = FakeOkxServer(streams, port=self.ws_port, interval=self.ws_interval)
+        started = threading.Event()
+
+        def run_ws():
+            self._ws_loop = asyncio.new_event_loop()
+            self._ws_loop.run_until_complete(server.start())
+            self.ws_port = server.port
+            started.set()
+            self._ws_loop.run_forever()
+
+        threading.Thread(target=run_ws, daemon=True).start()
+        started.wait()
+        return self
+
+    def stop(self):
+        if self._http is not None:
+            self._http.shutdown()
+        if self._ws_loop is not None:
+            self._ws_loop.call_soon_threadsafe(self._ws_loop.stop)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the OKX APIs")
+    parser.add_argument("--rest-port", type=int, default=8801)
+    parser.add_argument("--ws-port", type=int, default=8802)
+    parser.add_argument("--books", default="BTC-USDT-SWAP")
+    parser.add_argument("--recording", help="JSONL recording of books frames")
+    args = parser.parse_args()
+    exchange = FakeExchange(args.rest_port, args.ws_port, args.books.split(","), args.recording).start()
+    print(f"REST {exchange.rest_url}  WS {exchange.ws_url}")
+    threading.Event().wait()
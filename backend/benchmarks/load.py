@@ -0,0 +1,159 @@
+"""
+End-to-end load benchmark for POST / against a local fake exchange.
+
+Starts the fake OKX REST/WebSocket stand-in, launches the backend under
+uvicorn pointed at it, drives POST / with concurrent clients and reports
+throughput and tail latency (client-side, i.e. including HTTP).
+
+Usage (from backend/):
+    python -m benchmarks.load --clients 16 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.fake_exchange import FakeExchange
+from benchmarks.report import save, summarize
+
+ASSETS = ["BTC-USDT", "ETH-USDT", "SOL-USDT", "XRP-USDT", "DOGE-USDT"]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_backend(exchange, port, workers=1, shm=False):
+    """
+    Launch the backend under uvicorn; with shm=True a separate feed handler
+    publishes market data into shared memory for the workers.
+
+    Returns:
+    - list of started processes (feed handler first, if any)
+    """
+    env = dict(
+        os.environ,
+        OKX_REST_URL=exchange.rest_url,
+        OKX_WS_URL=exchange.ws_url,
+        BOOK_INSTRUMENTS=",".join(exchange.books),
+        TICKER_REFRESH_INTERVAL="0.2",
+    )
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    procs = []
+    if shm:
+        env["MARKET_DATA_SHM"] = f"bench-load-{port}"
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "market.feed_handler", "--name", env["MARKET_DATA_SHM"]],
+            cwd=backend_dir, env=env,
+        ))
+    procs.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=backend_dir, env=env,
+    ))
+    return procs
+
+
+async def wait_ready(url, payload, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                r = await client.post(url, json=payload)
+                if r.status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("backend did not become ready")
+
+
+def payload(rng):
+    return {
+        "exchange": "OKX",
+        "spotAsset": rng.choice(ASSETS),
+        "orderType": "market",
+        "quantity": rng.choice([10, 50, 100, 500, 1000]),
+        "volatility": rng.choice([0.005, 0.01, 0.02, 0.03]),
+        "feeTier": "1",
+    }
+
+
+async def client_loop(client, url, deadline, rng, latencies, errors):
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            r = await client.post(url, json=payload(rng))
+            ok = r.status_code == 200
+        except httpx.TransportError:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(1)
+
+
+async def drive(url, clients, duration, warmup):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        # Warm-up (not recorded)
+        await asyncio.gather(*[
+            client_loop(client, url, time.monotonic() + warmup, random.Random(i), [], [])
+            for i in range(clients)
+        ])
+        latencies, errors = [], []
+        start = time.monotonic()
+        await asyncio.gather(*[
+            client_loop(client, url, start + duration, random.Random(1000 + i), latencies, errors)
+            for i in range(clients)
+        ])
+        elapsed = time.monotonic() - start
+    return latencies, len(errors), elapsed
+
+
+def run(clients_list, duration, warmup, workers, shm=False):
+    exchange = FakeExchange(books=("BTC-USDT-SWAP", "ETH-USDT-SWAP")).start()
+    port = _free_port()
+    procs = start_backend(exchange, port, workers, shm)
+    url = f"http://127.0.0.1:{port}/"
+    rows = {}
+    try:
+        asyncio.run(wait_ready(url, payload(random.Random(0))))
+        for clients in clients_list:
+            latencies, errors, elapsed = asyncio.run(drive(url, clients, duration, warmup))
+            row = summarize(latencies) if latencies else {"n": 0}
+            row["throughput_rps"] = len(latencies) / elapsed
+            row["errors"] = errors
+            rows[f"POST / clients={clients}"] = row
+            print(f"clients {clients:3d}: {row['throughput_rps']:8.1f} req/s  "
+                  f"p50 {row.get('p50_us', float('nan')) / 1000:7.2f} ms  "
+                  f"p99 {row.get('p99_us', float('nan')) / 1000:7.2f} ms  "
+                  f"p999 {row.get('p999_us', float('nan')) / 1000:7.2f} ms  errors {errors}")
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            proc.wait()
+        exchange.stop()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end load benchmark")
+    parser.add_argument("--clients", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="warm-up seconds per level")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--shm", action="store_true", help="serve market data from a shared-memory feed handler")
+    args = parser.parse_args()
+    clients_list = [int(c) for c in args.clients.split(",")]
+    rows = run(clients_list, args.duration, args.warmup, args.workers, args.shm)
+    meta = {"duration": args.duration, "workers": args.workers, "clients": clients_list, "shm": args.shm}
+    print(f"results: {save('load', rows, meta)}")
@@ -0,0 +1,115 @@
+"""
+Micro-benchmarks for the cost models across input sizes.
+
+Usage (from backend/):
+    python -m benchmarks.micro            # run and store results
+    python -m benchmarks.micro --quick    # fewer repetitions
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.report import save, summarize
+from market.features import compute_features
+from market.order_book import OrderBook
+from models import maker_taker, slippage
+from models.depth_walk import DepthWalk
+from models.execution import closed_form_schedule, dp_schedule
+from models.fees import estimate_fees
+from models.maker_taker import estimate_maker_taker
+from models.market_impact import estimate_market_impact
+from models.slippage import estimate_slippage
+from models.surface import cost_surface, grid_axis
+
+
+def synthetic_book(depth, mid=95000.0, tick=0.1, seed=0):
+    """[price, qty] levels per side, best first, as lists of strings like the API."""
+    rng = np.random.default_rng(seed)
+    asks = [[f"{mid + (i + 1) * tick:.1f}", f"{rng.uniform(0.01, 5):.3f}"] for i in range(depth)]
+    bids = [[f"{mid - i * tick:.1f}", f"{rng.uniform(0.01, 5):.3f}"] for i in range(depth)]
+    return asks, bids
+
+
+def bench(fn, repeat):
+    """Per-call wall time samples in seconds (after one warm-up call)."""
+    fn()
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+    return samples
+
+
+def run(repeat):
+    rows = {}
+
+    def record(name, fn, n=repeat):
+        rows[name] = summarize(bench(fn, n))
+        print(f"{name:45s} p50 {rows[name]['p50_us']:10.1f} us   p99 {rows[name]['p99_us']:10.1f} us")
+
+    for depth in (1, 10, 50, 400):
+        asks, bids = synthetic_book(depth)
+        record(f"slippage.extract_features depth={depth}",
+               lambda: slippage.extract_features(asks, bids, 100, 0.02))
+        record(f"maker_taker.extract_features depth={depth}",
+               lambda: maker_taker.extract_features(asks, bids, 0.02))
+        features = compute_features(asks, bids)
+        record(f"slippage.extract_features from vector depth={depth}",
+               lambda: slippage.extract_features(asks, bids, 100, 0.02, features))
+        record(f"estimate_slippage depth={depth}",
+               lambda: estimate_slippage(asks, bids, quantity=100, volatility=0.02))
+        record(f"estimate_slippage from vector depth={depth}",
+               lambda: estimate_slippage(asks, bids, quantity=100, volatility=0.02, features=features))
+        record(f"estimate_maker_taker depth={depth}",
+               lambda: estimate_maker_taker(asks, bids, volatility=0.02))
+        record(f"estimate_fees depth={depth}",
+               lambda: estimate_fees(asks, bids, volatility=0.02))
+        record(f"estimate_market_impact depth={depth}",
+               lambda: estimate_market_impact(asks, bids, quantity=100, volatility=0.02))
+
+    # One-level delta applied to a live book, including the feature refresh
+    for depth in (50, 400):
+        book = OrderBook("BENCH", capacity=depth * 2)
+        asks, bids = synthetic_book(depth)
+        book.apply_snapshot({"asks": [a + ["0", "1"] for a in asks], "bids": [b + ["0", "1"] for b in bids]})
+        sizes = iter(np.tile(["0.5", "1.5"], 10 ** 6))
+        record(f"book delta + features depth={depth}",
+               lambda: book.apply_update({"asks": [[asks[2][0], next(sizes), "0", "1"]], "bids": []}))
+
+    asks, bids = synthetic_book(400)
+    for n in (1, 100, 10000):
+        quantities = np.linspace(1, 5000, n)
+        volatilities = np.full(n, 0.02)
+        record(f"estimate_slippage_batch rows={n}",
+               lambda: slippage.estimate_slippage_batch(
+                   slippage.extract_features_batch(asks, bids, quantities, volatilities)),
+               max(repeat // 10, 5))
+        record(f"depth_walk both sides sizes={n}",
+               lambda: DepthWalk(asks, bids).walk_both(quantities, notional=True))
+
+    for nq, nv in ((10, 10), (100, 50)):
+        quantities, volatilities = grid_axis(10, 10000, nq, log=True), grid_axis(0.005, 0.05, nv)
+        record(f"cost_surface grid={nq}x{nv}",
+               lambda: cost_surface(asks, bids, quantities, volatilities),
+               max(repeat // 10, 5))
+
+    params = dict(risk_aversion=0.001, alpha=0.5, beta=0.5, gamma=0.05, eta=0.05)
+    for grid_size in (50, 200, 1000):
+        record(f"optimal_execution dp grid={grid_size} steps=20",
+               lambda: dp_schedule(1.0, 20, grid_size=grid_size, **params),
+               max(repeat // 50, 3))
+    for steps in (5, 100, 1000):
+        record(f"optimal_execution closed_form steps={steps}",
+               lambda: closed_form_schedule(1.0, steps, 1.0, 1e-6, 0.3, 2.5e-6, 2.5e-7))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cost model micro-benchmarks")
+    parser.add_argument("--repeat", type=int, default=500, help="calls per benchmark")
+    parser.add_argument("--quick", action="store_true", help="use 50 calls per benchmark")
+    args = parser.parse_args()
+    repeat = 50 if args.quick else args.repeat
+    print(f"results: {save('micro', run(repeat), {'repeat': repeat})}")
@@ -0,0 +1,79 @@
+"""
+Overhead of the sampling profiler (utils.profiling).
+
+Runs the full cost-model evaluation of one order in a loop on a worker
+thread, with the profiler stopped and then sampling at several intervals,
+and reports per-evaluation latency, the slowdown against the unprofiled
+run and the sampler's own time per sample.
+
+Usage (from backend/):
+    python -m benchmarks.profiling
+    python -m benchmarks.profiling --intervals 20,10,5,1 --duration 5
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.micro import synthetic_book
+from benchmarks.report import save, summarize
+from models.evaluate import evaluate_costs
+from utils.profiling import SamplingProfiler
+
+
+def workload(asks, bids, duration):
+    """Per-call seconds of evaluate_costs over duration seconds, on a "models" thread."""
+    samples = []
+
+    def loop():
+        deadline = time.perf_counter() + duration
+        while True:
+            start = time.perf_counter()
+            evaluate_costs(asks, bids, 100, 0.02)
+            end = time.perf_counter()
+            samples.append(end - start)
+            if end > deadline:
+                return
+
+    thread = threading.Thread(target=loop, name="models_bench")
+    thread.start()
+    thread.join()
+    return np.asarray(samples)
+
+
+def run(intervals, duration, depth):
+    asks, bids = synthetic_book(depth)
+    asks = np.array(asks, dtype=np.float64)
+    bids = np.array(bids, dtype=np.float64)
+    workload(asks, bids, 0.5)  # warm-up
+    rows = {}
+    baseline = None
+    for interval_ms in [None] + intervals:
+        profiler = SamplingProfiler()
+        if interval_ms is not None:
+            profiler.start(duration + 1, interval=interval_ms / 1000)
+        samples = workload(asks, bids, duration)
+        profiler.stop()
+        label = "profiler off" if interval_ms is None else f"sampling every {interval_ms:g} ms"
+        row = summarize(samples)
+        if baseline is None:
+            baseline = row["mean_us"]
+        row["overhead"] = row["mean_us"] / baseline - 1
+        row["sample_us"] = profiler.sample_time / profiler.samples * 1e6 if profiler.samples else 0.0
+        rows[label] = row
+        print(f"{label:28s} mean {row['mean_us']:8.1f} us   p99 {row['p99_us']:8.1f} us   "
+              f"overhead {row['overhead']:+6.1%}   {row['sample_us']:6.1f} us/sample")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sampling profiler overhead benchmark")
+    parser.add_argument("--intervals", default="20,10,5,1", help="comma-separated sampling intervals (ms)")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per measurement")
+    parser.add_argument("--depth", type=int, default=50)
+    args = parser.parse_args()
+    intervals = [float(i) for i in args.intervals.split(",")]
+    rows = run(intervals, args.duration, args.depth)
+    meta = {"intervals_ms": intervals, "duration": args.duration, "depth": args.depth}
+    print(f"results: {save('profiling', rows, meta)}")
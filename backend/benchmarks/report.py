@@ -0,0 +1,111 @@
+"""
+Storage and comparison of benchmark results.
+
+Every run is written to benchmarks/results/<suite>-<commit>-<timestamp>.json
+so runs from different commits can be compared.
+
+Usage (from backend/):
+    python -m benchmarks.report micro              # compare the two latest micro runs
+    python -m benchmarks.report load OLD.json NEW.json
+"""
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Relative slowdown that counts as a regression when comparing runs
+REGRESSION_THRESHOLD = 0.10
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def summarize(samples):
+    """Latency summary in microseconds for an array of per-call seconds."""
+    samples = np.asarray(samples, dtype=np.float64) * 1e6
+    return {
+        "n": int(len(samples)),
+        "mean_us": float(samples.mean()),
+        "p50_us": float(np.percentile(samples, 50)),
+        "p99_us": float(np.percentile(samples, 99)),
+        "p999_us": float(np.percentile(samples, 99.9)),
+    }
+
+
+def save(suite, rows, meta=None):
+    """
+    Write a result file.
+
+    Parameters:
+    - suite: "micro" or "load"
+    - rows: dict name -> metrics dict
+    - meta: extra run parameters to record
+
+    Returns:
+    - str: path of the written file
+    """
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    commit = git_commit()
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"{suite}-{commit}-{stamp}.json")
+    payload = {
+        "suite": suite,
+        "commit": commit,
+        "timestamp": stamp,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "meta": meta or {},
+        "results": rows,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=1)
+    return path
+
+
+def compare(old_path, new_path, metric="p50_us"):
+    """Print metric changes between two result files and flag regressions."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['commit']} -> {new['commit']} ({metric})")
+    regressions = 0
+    for name, row in new["results"].items():
+        before = old["results"].get(name, {}).get(metric)
+        after = row.get(metric)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > REGRESSION_THRESHOLD:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"  {name:45s} {before:12.1f} -> {after:12.1f}  {change:+7.1%}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4:
+        old_path, new_path = sys.argv[2], sys.argv[3]
+    else:
+        runs = sorted(glob.glob(os.path.join(RESULTS_DIR, f"{sys.argv[1]}-*.json")), key=os.path.getmtime)
+        if len(runs) < 2:
+            sys.exit("need at least two result files to compare")
+        old_path, new_path = runs[-2], runs[-1]
+    metric = "p50_us" if sys.argv[1] == "micro" else "p99_us"
+    sys.exit(1 if compare(old_path, new_path, metric) else 0)
@@ -0,0 +1,171 @@
+"""
+Shared-memory market data benchmark.
+
+A writer process publishes books into a segment at a fixed update rate
+while readers take snapshots. Reports:
+- read latency of a 50-level book and a ticker out of the segment,
+  against fetching the same book from another process over a pipe
+- aggregate read throughput and tail latency as reader processes are
+  added, with the fraction of reads that raced a write and retried
+
+Usage (from backend/):
+    python -m benchmarks.shared_memory
+    python -m benchmarks.shared_memory --readers 1,2,4,8 --rate 20000
+"""
+import argparse
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+from benchmarks.report import save, summarize
+from market.shared_market import SharedMarketReader, SharedMarketWriter
+
+EXCHANGE = "OKX"
+
+
+def _instruments(n):
+    return [f"SYM{i}-USDT-SWAP" for i in range(n)]
+
+
+def _book(rng, depth, mid=95000.0, tick=0.1):
+    sizes = rng.uniform(0.01, 5, (2, depth))
+    asks = np.column_stack((mid + (np.arange(depth) + 1) * tick, sizes[0]))
+    bids = np.column_stack((mid - np.arange(depth) * tick, sizes[1]))
+    return asks, bids
+
+
+def writer_main(name, instruments, depth, rate, ready, stop):
+    """Publish random books round-robin at `rate` updates/s (0 = as fast as possible)."""
+    writer = SharedMarketWriter(name, slots=len(instruments) + 1, depth=depth)
+    rng = np.random.default_rng(0)
+    books = [_book(rng, depth) for _ in range(16)]
+    for k, inst_id in enumerate(instruments):
+        writer.write_ticker(EXCHANGE, inst_id, {"askPx": "95000.1", "askSz": "1", "bidPx": "95000.0",
+                                                "bidSz": "1", "last": "95000.0", "ts": "0"}, 1)
+        writer.write_book(EXCHANGE, inst_id, *books[k % 16], 1, 0)
+    writer.write_status(EXCHANGE, time.time())
+    ready.set()
+    version = 1
+    interval = 1.0 / rate if rate else 0.0
+    next_at = time.perf_counter()
+    while not stop.is_set():
+        for k, inst_id in enumerate(instruments):
+            version += 1
+            writer.write_book(EXCHANGE, inst_id, *books[version % 16], version, version)
+            if interval:
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+    writer.close()
+
+
+def pipe_server(conn, instruments, depth):
+    """The alternative: a process that owns the books and answers requests for them."""
+    rng = np.random.default_rng(0)
+    books = {inst_id: _book(rng, depth) for inst_id in instruments}
+    while True:
+        inst_id = conn.recv()
+        if inst_id is None:
+            return
+        conn.send(books[inst_id])
+
+
+def read_loop(read, instruments, duration):
+    """Per-read seconds of `read(inst_id)` over `duration` seconds, cycling instruments."""
+    samples = []
+    n = len(instruments)
+    k = 0
+    deadline = time.perf_counter() + duration
+    while True:
+        start = time.perf_counter()
+        read(instruments[k % n])
+        end = time.perf_counter()
+        samples.append(end - start)
+        k += 1
+        if end > deadline:
+            return np.asarray(samples)
+
+
+def reader_main(name, instruments, duration, queue):
+    reader = SharedMarketReader(name)
+    read_loop(lambda i: reader.read_book(EXCHANGE, i), instruments, 0.2)  # warm-up
+    reader.retries = 0
+    samples = read_loop(lambda i: reader.read_book(EXCHANGE, i), instruments, duration)
+    queue.put((samples, reader.retries))
+    reader.close()
+
+
+def run(readers_list, duration, rate, n_instruments, depth):
+    name = f"bench-shm-{os.getpid()}"
+    instruments = _instruments(n_instruments)
+    ctx = mp.get_context("spawn")
+    ready, stop = ctx.Event(), ctx.Event()
+    writer = ctx.Process(target=writer_main, args=(name, instruments, depth, rate, ready, stop))
+    writer.start()
+    ready.wait(30)
+    rows = {}
+
+    def report(label, samples, extra=None):
+        rows[label] = dict(summarize(samples), **(extra or {}))
+        print(f"{label:45s} p50 {rows[label]['p50_us']:8.2f} us   p99 {rows[label]['p99_us']:8.2f} us"
+              + "".join(f"   {k} {v:.4g}" for k, v in (extra or {}).items()))
+
+    try:
+        reader = SharedMarketReader(name)
+        read_loop(lambda i: reader.read_book(EXCHANGE, i), instruments, 0.2)
+        report(f"shm read_book depth={depth}",
+               read_loop(lambda i: reader.read_book(EXCHANGE, i), instruments, duration))
+        report("shm read_ticker",
+               read_loop(lambda i: reader.read_ticker(EXCHANGE, i), instruments, duration))
+        reader.close()
+
+        parent, child = ctx.Pipe()
+        server = ctx.Process(target=pipe_server, args=(child, instruments, depth))
+        server.start()
+
+        def fetch(inst_id):
+            parent.send(inst_id)
+            return parent.recv()
+
+        read_loop(fetch, instruments, 0.2)
+        report(f"pipe round trip depth={depth}", read_loop(fetch, instruments, duration))
+        parent.send(None)
+        server.join()
+
+        for n_readers in readers_list:
+            queue = ctx.Queue()
+            procs = [ctx.Process(target=reader_main, args=(name, instruments, duration, queue))
+                     for _ in range(n_readers)]
+            for proc in procs:
+                proc.start()
+            results = [queue.get() for _ in procs]
+            for proc in procs:
+                proc.join()
+            samples = np.concatenate([r[0] for r in results])
+            retries = sum(r[1] for r in results)
+            report(f"shm read_book readers={n_readers}", samples, {
+                "reads_per_s": len(samples) / duration,
+                "retry_rate": retries / len(samples),
+            })
+    finally:
+        stop.set()
+        writer.join()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared-memory market data benchmark")
+    parser.add_argument("--readers", default="1,2,4", help="comma-separated reader process counts")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds per measurement")
+    parser.add_argument("--rate", type=float, default=10000, help="writer book updates/s (0 = unthrottled)")
+    parser.add_argument("--instruments", type=int, default=32)
+    parser.add_argument("--depth", type=int, default=50)
+    args = parser.parse_args()
+    readers_list = [int(r) for r in args.readers.split(",")]
+    rows = run(readers_list, args.duration, args.rate, args.instruments, args.depth)
+    meta = {"duration": args.duration, "rate": args.rate, "instruments": args.instruments,
+            "depth": args.depth, "readers": readers_list}
+    print(f"results: {save('shared_memory', rows, meta)}")
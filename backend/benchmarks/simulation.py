@@ -0,0 +1,65 @@
+"""
+Monte Carlo cost simulator throughput by worker count.
+
+Simulates the same plan (a parent order against a synthetic book) with
+one warm process pool per worker count and reports paths per second and
+the per-run latency. Every worker count must produce the same
+distribution for the seed; the benchmark fails if one does not.
+
+Usage (from backend/):
+    python -m benchmarks.simulation
+    python -m benchmarks.simulation --workers 1,2,4,8 --paths 200000 --steps 20
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.micro import synthetic_book
+from benchmarks.report import save, summarize
+from models.simulation import simulate_costs, simulation_plan
+
+
+def run(workers_list, paths, steps, depth, repeat, chunk_paths):
+    asks, bids = synthetic_book(depth)
+    plan = simulation_plan(asks, bids, 1_000_000, 0.02,
+                           config={"time_steps": steps, "chunk_paths": chunk_paths})
+    rows = {}
+    reference = None
+    for workers in workers_list:
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            simulate_costs(plan, min(paths, chunk_paths * workers), seed=0, executor=pool)  # warm-up
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = simulate_costs(plan, paths, seed=0, executor=pool)
+                samples.append(time.perf_counter() - start)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        if reference is None:
+            reference = result["quantiles"]
+        elif result["quantiles"] != reference:
+            raise SystemExit(f"workers={workers} changed the distribution for the same seed")
+        label = f"simulate paths={paths} steps={steps} workers={workers}"
+        rows[label] = dict(summarize(samples), paths_per_s=paths / min(samples))
+        print(f"{label:50s} {rows[label]['paths_per_s']:12,.0f} paths/s   p50 {rows[label]['p50_us'] / 1e3:9.1f} ms")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo cost simulator benchmark")
+    parser.add_argument("--workers", default=",".join(str(w) for w in (1, 2, 4) if w <= (os.cpu_count() or 1)) or "1",
+                        help="comma-separated worker process counts")
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--steps", type=int, default=10, help="child orders per path")
+    parser.add_argument("--depth", type=int, default=400, help="book levels per side")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per worker count")
+    parser.add_argument("--chunk-paths", type=int, default=4096)
+    args = parser.parse_args()
+    workers_list = [int(w) for w in args.workers.split(",")]
+    rows = run(workers_list, args.paths, args.steps, args.depth, args.repeat, args.chunk_paths)
+    meta = {"paths": args.paths, "steps": args.steps, "depth": args.depth, "repeat": args.repeat,
+            "chunk_paths": args.chunk_paths, "workers": workers_list}
+    print(f"results: {save('simulation', rows, meta)}")
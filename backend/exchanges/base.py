@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+# Keys every adapter's normalized ticker carries (OKX names, string values)
+TICKER_FIELDS = ("instId", "askPx", "askSz", "bidPx", "bidSz", "last", "lastSz", "ts")
+
+
+class ExchangeError(Exception):
+    """A venue request failed after retries (or with a non-retryable error)."""
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class RateLimiter:
+    """
+    Async token bucket: at most `rate` acquisitions per `per` seconds.
+
+    Callers wait on the event loop instead of tripping the venue's limit.
+    """
+
+    def __init__(self, rate, per=1.0):
+        self.rate = rate
+        self.per = per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.per / self.rate)
+
+
+class ExchangeAdapter:
+    """
+    Interface every venue adapter implements.
+
+    Adapters are asyncio-native and own their (pooled) connections; they
+    translate venue-specific instruments, tickers and books into one shape:
+    - instrument ids: whatever the venue uses, resolved with instrument_id()
+    - tickers: dicts with TICKER_FIELDS
+    - books: (asks, bids) lists of [price, size] strings, best first
+    """
+
+    name = None
+    inst_type = "SWAP"
+
+    def instrument_id(self, asset):
+        """Venue instrument id for a spot asset such as "BTC-USDT"."""
+        raise NotImplementedError
+
+    async def fetch_tickers(self):
+        """
+        Fetch the venue's whole ticker universe.
+
+        Returns:
+        - list of normalized ticker dicts
+        Raises ExchangeError when the venue cannot be reached.
+        """
+        raise NotImplementedError
+
+    async def fetch_book(self, inst_id, depth=50):
+        """
+        Fetch one order book snapshot over REST.
+
+        Returns:
+        - (asks, bids) as [price, size] string pairs, best first
+        """
+        raise NotImplementedError
+
+    def books_feed(self, inst_ids, **kwargs):
+        """Streaming L2 book feed for inst_ids, or None if the venue has none."""
+        return None
+
+    async def close(self):
+        """Release pooled connections."""
@@ -0,0 +1,128 @@
+import asyncio
+import random
+
+import httpx
+
+from exchanges.base import TICKER_FIELDS, ExchangeAdapter, ExchangeError, RateLimiter
+from market.books_feed import OKX_PUBLIC_WS, BooksFeed
+
+OKX_REST = "https://www.okx.com"
+# OKX answers rate-limited requests with HTTP 429 and/or these codes
+RATE_LIMIT_CODES = {"50011", "50061"}
+
+
+class OkxAdapter(ExchangeAdapter):
+    """
+    Native asyncio OKX adapter.
+
+    One pooled keep-alive httpx client is shared by every request. Calls
+    are throttled by a token bucket sized to OKX's public market data
+    limit (20 requests / 2 s), and transport errors, 5xx responses and
+    rate-limit rejections are retried with jittered exponential backoff.
+
+    Parameters:
+    - rest_url: REST base URL
+    - ws_url: public WebSocket URL for the books channel
+    - timeout: per-request timeout in seconds
+    - max_retries: retries after the first attempt
+    - backoff: base backoff in seconds (doubled per retry)
+    - rate: requests allowed per rate_period seconds
+    - max_connections: connection pool size
+    """
+
+    name = "OKX"
+
+    def __init__(self, rest_url=OKX_REST, ws_url=OKX_PUBLIC_WS, timeout=5.0, max_retries=3,
+                 backoff=0.2, rate=20, rate_period=2.0, max_connections=10):
+        self.rest_url = rest_url.rstrip("/")
+        self.ws_url = ws_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_connections = max_connections
+        self.limiter = RateLimiter(rate, rate_period)
+        self._client = None
+
+    def client(self):
+        # Created lazily so the pool binds to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.rest_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                headers={"Accept": "application/json"},
+            )
+        return self._client
+
+    def instrument_id(self, asset):
+        return f"{asset.upper()}-{self.inst_type}"
+
+    async def request(self, path, params=None):
+        """
+        GET an OKX v5 endpoint and return its "data" list.
+
+        Raises ExchangeError once retries are exhausted or on a
+        non-retryable OKX error code.
+        """
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = error.retry_after or self.backoff * 2 ** (attempt - 1)
+                await asyncio.sleep(delay * (1 + random.random() * 0.1))
+            await self.limiter.acquire()
+            try:
+                response = await self.client().get(path, params=params)
+            except httpx.TransportError as e:
+                error = _RetryableError(f"OKX request failed: {e!r}")
+                continue
+            if response.status_code == 429 or response.status_code >= 500:
+                error = _RetryableError(f"OKX HTTP {response.status_code}",
+                                        _retry_after(response.headers.get("Retry-After")))
+                continue
+            try:
+                body = response.json()
+            except ValueError:
+                raise ExchangeError(f"OKX returned non-JSON (HTTP {response.status_code})")
+            code = str(body.get("code"))
+            if code == "0":
+                return body.get("data", [])
+            if code in RATE_LIMIT_CODES:
+                error = _RetryableError(f"OKX rate limited: {body.get('msg')}")
+                continue
+            raise ExchangeError(f"OKX error {code}: {body.get('msg') or 'request failed'}")
+        raise ExchangeError(str(error), retryable=True)
+
+    async def fetch_tickers(self):
+        data = await self.request("/api/v5/market/tickers", {"instType": self.inst_type})
+        return [{field: item.get(field) for field in TICKER_FIELDS} for item in data]
+
+    async def fetch_book(self, inst_id, depth=50):
+        data = await self.request("/api/v5/market/books", {"instId": inst_id, "sz": str(depth)})
+        if not data:
+            raise ExchangeError(f"OKX returned no book for {inst_id}")
+        # OKX levels are [price, size, deprecated, order count]
+        asks = [level[:2] for level in data[0]["asks"]]
+        bids = [level[:2] for level in data[0]["bids"]]
+        return asks, bids
+
+    def books_feed(self, inst_ids, **kwargs):
+        return BooksFeed(inst_ids, url=self.ws_url, **kwargs)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class _RetryableError(ExchangeError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message, retryable=True)
+        self.retry_after = retry_after
+
+
+def _retry_after(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,35 @@
+import os
+
+from exchanges.mock import MockAdapter
+from exchanges.okx import OKX_REST, OkxAdapter
+from market.books_feed import OKX_PUBLIC_WS
+
+# Venue name (as sent in InputParams.exchange, case-insensitive) -> adapter class
+ADAPTERS = {
+    "OKX": OkxAdapter,
+    "MOCK": MockAdapter,
+}
+
+
+def create_adapter(name, **options):
+    """
+    Instantiate the adapter registered under name.
+
+    Raises KeyError for unknown venues.
+    """
+    try:
+        cls = ADAPTERS[name.upper()]
+    except KeyError:
+        raise KeyError(f"Unknown exchange {name!r}; known: {', '.join(ADAPTERS)}")
+    return cls(**options)
+
+
+def env_options(name):
+    """Adapter options for name configured through the environment (OKX_REST_URL, ...)."""
+    if name.upper() == "OKX":
+        return {
+            "rest_url": os.getenv("OKX_REST_URL", OKX_REST),
+            "ws_url": os.getenv("OKX_WS_URL", OKX_PUBLIC_WS),
+            "timeout": float(os.getenv("OKX_TIMEOUT", "5.0")),  # seconds
+        }
+    return {}
@@ -1,18 +1,150 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
+from typing import List, Optional
+import asyncio
+import os
 import time
 
-import okx.MarketData as MarketData
+import numpy as np
 
-from models.slippage import estimate_slippage
-from models.fees import estimate_fees
-from models.market_impact import estimate_market_impact
-from models.maker_taker import estimate_maker_taker
-from utils.latency import measure_latency
+from exchanges.registry import create_adapter, env_options
+from market.features import DEFAULT_DEPTHS, compute_features, feature_names
+from market.feed_handler import build_market_data
+from market.shared_market import SharedMarketData
+from market.tape import TapeWriter
+from market.volatility import ESTIMATORS, VolatilityService
 
-app = FastAPI()
+from models.slippage import extract_features_batch as slippage_features_batch
+from models.market_impact import load_impact_table
+from models.maker_taker import extract_features_batch as maker_taker_features_batch
+from models.evaluate import call_with_models, evaluate_costs, evaluate_costs_batch
+from models.execution import closed_form_schedule, dp_schedule
+from models.online import OnlineLearner
+from models.simulation import chunk_seeds, simulate_chunks, simulation_plan, summarize_costs
+from models.surface import cost_surface, grid_axis, interpolate
+from models.registry import generation as model_generation
+from models.registry import snapshot as model_snapshot
+from utils.execution import ExecutionLayer, Overloaded
+from utils.latency import METRICS, measure_latency, request_scope, span
+from utils.profiling import ProfilingMiddleware, SamplingProfiler
+from utils.result_cache import ResultCache
+from utils.streaming import StreamHub
+
+# Venues served, by the name clients send in InputParams.exchange
+EXCHANGES = [e.upper() for e in os.getenv("EXCHANGES", "OKX").split(",") if e]
+exchanges = {name: create_adapter(name, **env_options(name)) for name in EXCHANGES}
+
+# Online recalibration from realized observations posted to /observations
+learner = OnlineLearner(
+    min_samples=int(os.getenv("ONLINE_MIN_SAMPLES", "200")),
+    publish_every=int(os.getenv("ONLINE_PUBLISH_EVERY", "50")),
+)
+
+# Shared ticker snapshot, refreshed in the background
+TICKER_REFRESH_INTERVAL = float(os.getenv("TICKER_REFRESH_INTERVAL", "1.0"))  # seconds
+TICKER_MAX_STALENESS = float(os.getenv("TICKER_MAX_STALENESS", "5.0"))  # seconds
+
+# Streaming volatility per (exchange, instId), used when a request omits volatility
+VOLATILITY_HORIZON = float(os.getenv("VOLATILITY_HORIZON", "86400"))  # seconds the estimate is scaled to
+VOLATILITY_ESTIMATOR = os.getenv("VOLATILITY_ESTIMATOR", "ewma")
+if VOLATILITY_ESTIMATOR not in ESTIMATORS:
+    raise ValueError(f"VOLATILITY_ESTIMATOR must be one of {ESTIMATORS}")
+volatility_service = VolatilityService(
+    horizon=VOLATILITY_HORIZON,
+    max_instruments=int(os.getenv("VOLATILITY_MAX_INSTRUMENTS", "1000")),
+)
+
+# Memoized compute() results per market-data version; 0 entries disables it
+RESULT_CACHE_ENTRIES = int(os.getenv("RESULT_CACHE_ENTRIES", "10000"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+result_cache = (
+    ResultCache(max_entries=RESULT_CACHE_ENTRIES, max_bytes=RESULT_CACHE_MAX_BYTES)
+    if RESULT_CACHE_ENTRIES > 0 else None
+)
+# Cost surfaces per market-data version, same invalidation rules
+surface_cache = ResultCache(max_entries=256, max_bytes=64 * 1024 * 1024) if RESULT_CACHE_ENTRIES > 0 else None
+
+# Model evaluation runs on a worker pool behind admission control, so bursts
+# queue (or are shed with a retry hint) instead of stalling the event loop
+REQUEST_DEADLINE_MS = os.getenv("REQUEST_DEADLINE_MS")  # default per-request deadline
+execution = ExecutionLayer(
+    mode=os.getenv("EXECUTION_MODE", "thread"),  # "thread", "process" or "inline"
+    workers=int(os.getenv("EXECUTION_WORKERS", "4")),
+    max_in_flight=int(os.getenv("MAX_IN_FLIGHT", "256")),
+    max_in_flight_per_key=int(os.getenv("MAX_IN_FLIGHT_PER_INSTRUMENT", "64")),
+    max_queue_delay=float(os.getenv("MAX_QUEUE_DELAY_MS", "250")) / 1000,
+    default_deadline=float(REQUEST_DEADLINE_MS) / 1000 if REQUEST_DEADLINE_MS else None,
+    # Worker processes evaluate against the serving models of this process
+    process_task=lambda fn, args: (call_with_models, (model_snapshot(), fn, *args)),
+)
+
+# Opt-in sampling profiler behind the /profile endpoints; with PROFILING unset
+# neither the endpoints nor the request hook exist
+profiler = (
+    SamplingProfiler(interval=float(os.getenv("PROFILE_INTERVAL_MS", "10")) / 1000)
+    if os.getenv("PROFILING", "0") == "1" else None
+)
+MAX_PROFILE_SECONDS = 3600
+
+# Local L2 books maintained from each venue's streaming book channel
+BOOK_INSTRUMENTS = [i for i in os.getenv("BOOK_INSTRUMENTS", "BTC-USDT-SWAP").split(",") if i]
+BOOK_DEPTH = int(os.getenv("BOOK_DEPTH", "50"))  # levels per side handed to the models
+# Depth bands each book maintains features for; the deepest is BOOK_DEPTH,
+# so the imbalance the models read covers exactly the levels they are given
+FEATURE_DEPTHS = tuple(sorted({d for d in DEFAULT_DEPTHS if d < BOOK_DEPTH} | {BOOK_DEPTH}))
+
+# With MARKET_DATA_SHM set, tickers and books are read from the shared memory
+# segment a separate feed handler (python -m market.feed_handler) publishes,
+# so any number of workers share one set of venue connections
+MARKET_DATA_SHM = os.getenv("MARKET_DATA_SHM")
+if MARKET_DATA_SHM:
+    shared_market = SharedMarketData(MARKET_DATA_SHM)
+    tape_writer = None
+    ticker_caches = {name: shared_market.ticker_cache(name, TICKER_MAX_STALENESS) for name in exchanges}
+    books_feeds = {name: shared_market.books_feed(name) for name in exchanges}
+else:
+    shared_market = None
+    # Optional recording of everything the backend sees to a market data tape
+    TAPE_DIR = os.getenv("TAPE_DIR")
+    tape_writer = TapeWriter(TAPE_DIR) if TAPE_DIR else None
+    ticker_caches, books_feeds = build_market_data(
+        exchanges, BOOK_INSTRUMENTS, TICKER_REFRESH_INTERVAL, TICKER_MAX_STALENESS, tape_writer, FEATURE_DEPTHS
+    )
+
+
+@asynccontextmanager
+async def lifespan(app):
+    stream_hub.attach(asyncio.get_running_loop())
+    # Publish the impact table before serving: a lazy first load would move
+    # the model generation and drop the first cached results
+    load_impact_table()
+    for cache in ticker_caches.values():
+        cache.start()
+    for feed in books_feeds.values():
+        feed.start()
+    if shared_market is not None:
+        shared_market.start()
+    yield
+    if shared_market is not None:
+        await shared_market.stop()
+    for feed in books_feeds.values():
+        await feed.stop()
+    for cache in ticker_caches.values():
+        cache.stop(timeout=TICKER_REFRESH_INTERVAL)
+    execution.shutdown()
+    if profiler is not None:
+        profiler.stop()
+    for adapter in exchanges.values():
+        await adapter.close()
+    if tape_writer is not None:
+        tape_writer.flush()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
@@ -26,9 +158,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-flag = "0"  # Production trading:0 , demo trading:1
-marketDataAPI = MarketData.MarketAPI(flag=flag)
+if profiler is not None:
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, exclude=("/profile",))
 
 
 class InputParams(BaseModel):
@@ -36,47 +167,856 @@ class InputParams(BaseModel):
     spotAsset: str
     orderType: str
     quantity: float
-    volatility: float
+    volatility: Optional[float] = None  # None: use the streaming estimate
     feeTier: str
 
 
+class ScheduleParams(BaseModel):
+    quantity: float
+    timeSteps: int = 5
+    horizon: float = 1.0
+    method: str = "closed_form"  # "closed_form" or "dp"
+    riskAversion: float = 0.001
+    volatility: float = 0.3
+    eta: float = 0.05
+    gamma: float = 0.05
+    alpha: float = 0.5
+    beta: float = 0.5
+    gridSize: int = 200
+
+
+class Observation(BaseModel):
+    exchange: str
+    spotAsset: str
+    quantity: float
+    volatility: float
+    # Realized outcomes; any subset may be reported
+    slippage: Optional[float] = None
+    marketImpact: Optional[float] = None
+    maker: Optional[bool] = None
+
+
+class SurfaceParams(BaseModel):
+    exchange: str
+    spotAsset: str
+    feeTier: str = "1"
+    orderType: str = "market"
+    # Explicit axes, or generated ones (quantities geometric by default)
+    quantities: Optional[List[float]] = None
+    quantityMin: float = 10
+    quantityMax: float = 10000
+    quantitySteps: int = 100
+    logQuantities: bool = True
+    volatilities: Optional[List[float]] = None
+    volatilityMin: float = 0.005
+    volatilityMax: float = 0.05
+    volatilitySteps: int = 50
+    # Off-grid (quantity, volatility) pairs to interpolate
+    points: Optional[List[List[float]]] = None
+    # Also return the slippage / fees / marketImpact grids behind cost
+    components: bool = False
+
+
+class SimulationParams(BaseModel):
+    exchange: str
+    spotAsset: str
+    quantity: float  # parent order notional in USD
+    side: str = "buy"
+    volatility: Optional[float] = None  # None: use the streaming estimate
+    feeTier: str = "1"
+    timeSteps: int = 10
+    horizon: float = 600.0  # seconds the parent order is worked over
+    # Relative child order sizes (e.g. /schedule trades); equal slices if omitted
+    schedule: Optional[List[float]] = None
+    paths: int = 10000
+    seed: Optional[int] = None  # None: a fresh seed, returned for reproduction
+    liquidityVolatility: Optional[float] = None
+    liquidityHalfLife: Optional[float] = None
+    permanentFraction: Optional[float] = None
+
+
+# Upper bounds on /schedule; a dp solve does timeSteps x gridSize^2 work
+# (about 4 ns each, e.g. 1000 steps x 2000 lots takes ~18 s), so the work is
+# bounded as a whole and runs on the execution layer
+MAX_SCHEDULE_STEPS = 1000
+MAX_SCHEDULE_GRID = 2000
+MAX_SCHEDULE_CELLS = int(os.getenv("MAX_SCHEDULE_CELLS", "200000000"))
+# Upper bound on /surface cells
+MAX_SURFACE_CELLS = 100_000
+# Upper bounds on /simulate paths and simulated (path, child order) cells
+MAX_SIMULATION_PATHS = int(os.getenv("MAX_SIMULATION_PATHS", "200000"))
+MAX_SIMULATION_CELLS = int(os.getenv("MAX_SIMULATION_CELLS", "20000000"))
+
+
+def market_key(exchange, spot_asset):
+    """
+    The (exchange, instId) key market data for spot_asset lives under.
+
+    Raises HTTPException 400 for exchanges this backend does not serve.
+    """
+    adapter = exchanges.get(exchange.upper())
+    if adapter is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported exchange: {exchange}")
+    return exchange.upper(), adapter.instrument_id(spot_asset)
+
+
+def resolve_market(params):
+    """Map params to its (exchange, instId) market key."""
+    return market_key(params.exchange, params.spotAsset)
+
+
+def fee_tier(params):
+    """params.feeTier as a models.fees tier (tier 1 if it is not a number)."""
+    return int(params.feeTier) if params.feeTier.isdigit() else 1
+
+
+def resolve_volatility(params, market):
+    """
+    The request's volatility, or the instrument's streaming estimate if omitted.
+
+    Returns:
+    - (volatility, source) where source is "input" or the estimator name
+    Raises HTTPException 503 while no estimate is available yet.
+    """
+    if params.volatility is not None:
+        return params.volatility, "input"
+    volatility = volatility_service.value(market, VOLATILITY_ESTIMATOR)
+    if volatility is None:
+        raise HTTPException(status_code=503, detail="Volatility estimate not available yet")
+    return volatility, VOLATILITY_ESTIMATOR
+
+
+def instrument_label(market):
+    """
+    Metrics label for market: its instId once the ticker cache knows the
+    instrument, else "unknown", so client input cannot add histograms.
+    """
+    exchange, inst_id = market
+    return inst_id if ticker_caches[exchange].get(inst_id) is not None else "unknown"
+
+
+def get_market(market):
+    """
+    Resolve the cached ticker and order book levels for an instrument.
+
+    Parameters:
+    - market: (exchange, instId) key from resolve_market
+
+    Returns:
+    - (ticker, asks, bids, features): TickerSnapshot, [price, qty] levels for
+      the models and the book's feature vector over FEATURE_DEPTHS
+    """
+    exchange, inst_id = market
+    # Market data comes from the shared ticker cache, never the network
+    ticker_cache = ticker_caches[exchange]
+    if not ticker_cache.ready:
+        raise HTTPException(status_code=503, detail="Market data not available yet")
+
+    # Find the instrument matching spotAsset (e.g. "BTC-USDT-SWAP")
+    ticker = ticker_cache.get(inst_id)
+    if ticker is None:
+        raise HTTPException(status_code=404, detail="Instrument not found")
+    instrument_data = ticker.data
+
+    # Prefer the local L2 book; the views stay valid as long as the caller
+    # does not yield to the event loop the feed runs on (see market_inputs)
+    feed = books_feeds.get(exchange)
+    book = feed.get(inst_id) if feed is not None else None
+    if book is not None:
+        asks, bids = book.top(BOOK_DEPTH)
+        features = book.feature_vector(FEATURE_DEPTHS)
+    else:
+        # Fall back to approximating the book from best ask/bid prices and sizes
+        asks = [[instrument_data["askPx"], instrument_data["askSz"]]]
+        bids = [[instrument_data["bidPx"], instrument_data["bidSz"]]]
+        features = compute_features(asks, bids, FEATURE_DEPTHS)
+    return ticker, asks, bids, features
+
+
+def market_inputs(params, market):
+    """
+    Everything the models read for params, with the book levels copied so
+    they stay valid across an await and can be used off the event loop.
+
+    Returns:
+    - (ticker, asks, bids, features, volatility, volatility source)
+    """
+    with span("market_data"):
+        ticker, asks, bids, features = get_market(market)
+        volatility, volatility_source = resolve_volatility(params, market)
+        asks = np.array(asks, dtype=np.float64).reshape(-1, 2)
+        bids = np.array(bids, dtype=np.float64).reshape(-1, 2)
+    return ticker, asks, bids, features, volatility, volatility_source
+
+
+def deadline_seconds(deadline_ms):
+    """Request deadline in seconds (None: the execution layer's default)."""
+    if deadline_ms is None:
+        return None
+    if deadline_ms <= 0:
+        raise HTTPException(status_code=400, detail="deadlineMs must be positive")
+    return deadline_ms / 1000
+
+
+async def price(params, breakdown=False, deadline=None):
+    """
+    Run every cost model for params against the cached market data.
+
+    Market data is read on the event loop; the models run on the execution
+    layer, keyed by instrument for admission control. Each stage is timed
+    into the /metrics histograms; with breakdown=True the per-stage
+    milliseconds are also returned under "breakdown".
+    Raises HTTPException when the instrument or its market data is
+    unavailable and Overloaded when the request is shed.
+    """
+    start_time = time.perf_counter()
+    market = resolve_market(params)
+    with request_scope(instrument_label(market), breakdown) as stages, span("compute"):
+        ticker, asks, bids, features, volatility, volatility_source = market_inputs(params, market)
+        costs = await execution.run(
+            market, evaluate_costs, asks, bids, params.quantity, volatility, market, features,
+            deadline=deadline,
+        )
+    latency_ms = measure_latency(start_time)
+
+    result = dict(
+        costs,
+        latency=latency_ms,
+        marketDataVersion=ticker.version,
+        marketDataAge=round(ticker.age, 3),
+        stale=ticker.stale,
+        bookLevels=[len(asks), len(bids)],
+        volatility=volatility,
+        volatilitySource=volatility_source,
+    )
+    if stages is not None:
+        result["breakdown"] = stages
+    return result
+
+
+def market_version(market):
+    """Version of everything price() reads for an (exchange, instId); moves on any update."""
+    exchange, inst_id = market
+    ticker = ticker_caches[exchange].get(inst_id)
+    feed = books_feeds.get(exchange)
+    book = feed.get(inst_id) if feed is not None else None
+    return (
+        ticker.version if ticker is not None else None,
+        book.version if book is not None else None,
+    )
+
+
+async def cached_price(params, breakdown=False, deadline=None):
+    """
+    price() behind the result cache.
+
+    The key holds the market-data version and the serving-model generation,
+    so a hit is priced on the current book and models, but for the cached
+    request's quantity and volatility: the key keeps them to 4 and 3
+    significant digits, so costs are approximate within that quantization.
+    The echoed volatility is the caller's, and the latency and
+    marketDataAge fields are refreshed. Hits are served on the event loop
+    without admission. Breakdown requests always compute.
+    """
+    if breakdown or result_cache is None:
+        return await price(params, breakdown, deadline)
+    start_time = time.perf_counter()
+    market = resolve_market(params)
+    version = (market_version(market), model_generation())
+    volatility, volatility_source = resolve_volatility(params, market)
+    key = result_cache.key(market, version, params.quantity, volatility, params.feeTier, params.orderType)
+    result = result_cache.get(key)
+    if result is None:
+        result = await price(params, deadline=deadline)
+        # Only cache if nothing moved while computing
+        if (market_version(market), model_generation()) == version:
+            result_cache.put(key, result)
+        return result
+
+    ticker = ticker_caches[market[0]].get(market[1])
+    result = dict(result, volatility=volatility, volatilitySource=volatility_source,
+                  latency=measure_latency(start_time), cached=True)
+    if ticker is not None:
+        result["marketDataAge"] = round(ticker.age, 3)
+        result["stale"] = ticker.stale
+    return result
+
+
+# Shared recomputation for /ws subscribers, keyed by (exchange, instId)
+stream_hub = StreamHub(cached_price, market_version)
+
+
+def on_tickers(exchange, inst_ids):
+    # Instruments with a live book feed get their volatility from book mids instead
+    feed = books_feeds.get(exchange)
+    cache = ticker_caches[exchange]
+    for inst_id in inst_ids:
+        if feed is not None and inst_id in feed.books:
+            continue
+        ticker = cache.get(inst_id)
+        try:
+            mid = (float(ticker.data["askPx"]) + float(ticker.data["bidPx"])) / 2
+            ts = int(ticker.data["ts"])
+        except (TypeError, ValueError, KeyError):
+            continue
+        volatility_service.update((exchange, inst_id), ts, mid)
+    stream_hub.notify_threadsafe([(exchange, i) for i in inst_ids])
+
+
+def on_book(exchange, inst_id):
+    book = books_feeds[exchange].get(inst_id)
+    if book is not None and book.ts is not None:
+        asks, bids = book.top(1)
+        if len(asks) and len(bids):
+            mid = (asks[0, 0] + bids[0, 0]) / 2
+            volatility_service.update((exchange, inst_id), int(book.ts), float(mid))
+    stream_hub.notify((exchange, inst_id))
+
+
+for name in exchanges:
+    ticker_caches[name].on_update = lambda inst_ids, name=name: on_tickers(name, inst_ids)
+    if name in books_feeds:
+        books_feeds[name].on_update = lambda inst_id, name=name: on_book(name, inst_id)
+
+
+def overloaded(error):
+    """HTTPException for a shed request, with a Retry-After hint."""
+    return HTTPException(status_code=error.status, detail=error.detail, headers=error.headers)
+
+
 @app.post("/")
-async def compute(params: InputParams):
+async def compute(params: InputParams, breakdown: bool = False, deadlineMs: Optional[float] = None):
+    try:
+        return await cached_price(params, breakdown, deadline_seconds(deadlineMs))
+    except Overloaded as e:
+        raise overloaded(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.websocket("/ws")
+async def stream(websocket: WebSocket):
+    """
+    Push recomputed costs whenever the subscribed instrument's data changes.
+
+    The client sends an InputParams JSON object to subscribe and may send
+    another one at any time to switch. Clients with identical parameters
+    share one computation per market update, and a slow client only ever
+    receives the latest result.
+    """
+    await websocket.accept()
+    subscription = None
+    receive = asyncio.ensure_future(websocket.receive_json())
+    update = None
+    try:
+        while True:
+            waiting = {receive} if update is None else {receive, update}
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            if update in done:
+                await websocket.send_json(update.result())
+                update = asyncio.ensure_future(subscription[1].next())
+
+            if receive in done:
+                message = receive.result()
+                receive = asyncio.ensure_future(websocket.receive_json())
+                try:
+                    params = InputParams(**message)
+                    market = resolve_market(params)
+                except HTTPException as e:
+                    await websocket.send_json({"error": e.detail})
+                    continue
+                except Exception as e:
+                    await websocket.send_json({"error": str(e)})
+                    continue
+                if subscription is not None:
+                    update.cancel()
+                    stream_hub.unsubscribe(*subscription)
+                key = tuple(sorted(vars(params).items()))
+                subscription = stream_hub.subscribe(key, market, params)
+                update = asyncio.ensure_future(subscription[1].next())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receive.cancel()
+        if update is not None:
+            update.cancel()
+        if subscription is not None:
+            stream_hub.unsubscribe(*subscription)
+
+
+@app.post("/batch")
+async def compute_batch(batch: List[InputParams], deadlineMs: Optional[float] = None):
+    """
+    Price many InputParams in one request.
+
+    Requests are grouped by instrument so each book is resolved once, then
+    every model runs once over the stacked feature matrix of the whole batch
+    (on the execution layer). Results come back in request order; failures
+    are reported per item.
+    """
+    deadline = deadline_seconds(deadlineMs)
+    with request_scope("batch"), span("batch"):
+        try:
+            return await _compute_batch(batch, deadline)
+        except Overloaded as e:
+            raise overloaded(e)
+
+
+async def _compute_batch(batch, deadline=None):
+    start_time = time.perf_counter()
+    results = [None] * len(batch)
+
+    # Group request indices by (exchange, instrument)
+    groups = {}
+    keys = [None] * len(batch)
+    resolved_volatility = [None] * len(batch)
+    for i, params in enumerate(batch):
+        try:
+            keys[i] = resolve_market(params)
+            resolved_volatility[i] = resolve_volatility(params, keys[i])[0]
+        except HTTPException as e:
+            results[i] = {"error": e.detail, "status": e.status_code}
+            continue
+        groups.setdefault(keys[i], []).append(i)
+
+    # Book copies are taken on the event loop; the models run on the pool
+    tasks, markets, members = [], {}, []
+    for market, indices in groups.items():
+        try:
+            ticker, asks, bids, features = get_market(market)
+        except HTTPException as e:
+            for i in indices:
+                results[i] = {"error": e.detail, "status": e.status_code}
+            continue
+        markets[market] = ticker
+        tasks.append((
+            np.array(asks, dtype=np.float64).reshape(-1, 2),
+            np.array(bids, dtype=np.float64).reshape(-1, 2),
+            np.array([batch[i].quantity for i in indices], dtype=np.float64),
+            np.array([resolved_volatility[i] for i in indices], dtype=np.float64),
+            market,
+            features,
+        ))
+        members.append(indices)
+
+    if tasks:
+        evaluated = await execution.run(None, evaluate_costs_batch, tasks, deadline=deadline)
+        for indices, costs in zip(members, evaluated):
+            for j, i in enumerate(indices):
+                ticker = markets[keys[i]]
+                slippage = float(costs["slippage"][j])
+                fees = float(costs["fees"][j])
+                market_impact = float(costs["marketImpact"][j])
+                maker = float(costs["maker"][j])
+                results[i] = {
+                    "slippage": slippage,
+                    "depthSlippage": float(costs["depthSlippage"][j]),
+                    "fees": fees,
+                    "marketImpact": market_impact,
+                    "cost": slippage + fees + market_impact,
+                    "makerTaker": {"maker": maker, "taker": 1 - maker},
+                    "marketDataVersion": ticker.version,
+                    "stale": ticker.stale,
+                }
+
+    return {"results": results, "latency": measure_latency(start_time)}
+
+
+@app.post("/schedule")
+async def schedule(params: ScheduleParams, deadlineMs: Optional[float] = None):
+    """
+    Almgren-Chriss optimal execution schedule for liquidating params.quantity.
+
+    method "closed_form" uses the continuous linear-impact trajectory;
+    "dp" solves the power-law model on an inventory grid of gridSize lots,
+    on the execution layer (admission control and deadline as for /).
+    """
     start_time = time.perf_counter()
+    deadline = deadline_seconds(deadlineMs)
+    if params.quantity <= 0:
+        raise HTTPException(status_code=400, detail="quantity must be positive")
+    if not 1 <= params.timeSteps <= MAX_SCHEDULE_STEPS:
+        raise HTTPException(status_code=400, detail=f"timeSteps must be between 1 and {MAX_SCHEDULE_STEPS}")
+    if params.horizon <= 0:
+        raise HTTPException(status_code=400, detail="horizon must be positive")
+    time_step = params.horizon / params.timeSteps
+
+    if params.method == "closed_form":
+        try:
+            result = closed_form_schedule(
+                params.quantity, params.timeSteps, params.horizon,
+                risk_aversion=params.riskAversion, volatility=params.volatility,
+                eta=params.eta, gamma=params.gamma,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        extra = {"expectedCost": result["expected_cost"], "variance": result["variance"]}
+    elif params.method == "dp":
+        if not 1 <= params.gridSize <= MAX_SCHEDULE_GRID:
+            raise HTTPException(status_code=400, detail=f"gridSize must be between 1 and {MAX_SCHEDULE_GRID}")
+        if params.timeSteps * params.gridSize ** 2 > MAX_SCHEDULE_CELLS:
+            raise HTTPException(status_code=400, detail=f"timeSteps x gridSize^2 is limited to {MAX_SCHEDULE_CELLS}")
+        try:
+            result = await execution.run(
+                None, dp_schedule, params.quantity, params.timeSteps, params.riskAversion,
+                params.alpha, params.beta, params.gamma, params.eta,
+                params.volatility, time_step, params.gridSize,
+                deadline=deadline,
+            )
+        except Overloaded as e:
+            raise overloaded(e)
+        extra = {"cost": result["cost"]}
+    else:
+        raise HTTPException(status_code=400, detail="method must be 'closed_form' or 'dp'")
+
+    return {
+        "method": params.method,
+        "trades": result["trades"].tolist(),
+        "inventory": result["inventory"].tolist(),
+        "timeStep": time_step,
+        **extra,
+        "latency": measure_latency(start_time),
+    }
+
+
+@app.get("/volatility")
+async def volatility(exchange: str, spotAsset: str):
+    """Every streaming volatility estimate for an instrument, scaled to VOLATILITY_HORIZON."""
+    market = market_key(exchange, spotAsset)
+    snapshot = volatility_service.get(market)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No volatility data for instrument")
+    return {
+        "instrument": market[1],
+        "horizonSeconds": VOLATILITY_HORIZON,
+        "default": VOLATILITY_ESTIMATOR,
+        **{name: getattr(snapshot, name) for name in ESTIMATORS},
+        "samples": snapshot.samples,
+        "updatedMs": snapshot.updated_ms,
+    }
+
+
+@app.get("/features")
+async def features(exchange: str, spotAsset: str):
+    """The order book features the models read for an instrument, by name."""
+    market = market_key(exchange, spotAsset)
+    ticker, asks, bids, vector = get_market(market)
+    return {
+        "instrument": market[1],
+        "depths": list(FEATURE_DEPTHS),
+        "marketDataVersion": ticker.version,
+        "bookLevels": [len(asks), len(bids)],
+        **dict(zip(feature_names(FEATURE_DEPTHS), vector.tolist())),
+    }
+
+
+@app.post("/observations")
+async def observations(batch: List[Observation], deadlineMs: Optional[float] = None):
+    """
+    Feed realized costs to the online learners.
+
+    Features are taken from each instrument's current book, the updates
+    run on the execution layer (admission control and deadline as for /),
+    and refreshed models are hot-swapped into the serving path once enough
+    observations have arrived. Impact observations are fitted per
+    (exchange, instId).
+    """
+    deadline = deadline_seconds(deadlineMs)
+    slippage_rows, slippage_y = [], []
+    maker_rows, maker_y = [], []
+    impact_q, impact_vol, impact_y, impact_markets = [], [], [], []
+    rejected = []
+    for i, obs in enumerate(batch):
+        try:
+            market = resolve_market(obs)
+            _, asks, bids, features = get_market(market)
+        except HTTPException as e:
+            rejected.append({"index": i, "error": e.detail})
+            continue
+        if obs.slippage is not None:
+            slippage_rows.append(slippage_features_batch(asks, bids, [obs.quantity], [obs.volatility], features))
+            slippage_y.append(obs.slippage)
+        if obs.maker is not None:
+            maker_rows.append(maker_taker_features_batch(asks, bids, [obs.volatility], features))
+            maker_y.append(float(obs.maker))
+        if obs.marketImpact is not None:
+            impact_q.append(obs.quantity)
+            impact_vol.append(obs.volatility)
+            impact_y.append(obs.marketImpact)
+            impact_markets.append(market)
+
+    def update():
+        if slippage_rows:
+            learner.observe_slippage(np.vstack(slippage_rows), slippage_y)
+        if maker_rows:
+            learner.observe_maker_taker(np.vstack(maker_rows), maker_y)
+        if impact_y:
+            learner.observe_impact(impact_q, impact_vol, impact_y, impact_markets)
+
+    try:
+        await execution.run(None, update, deadline=deadline, in_process=True)
+    except Overloaded as e:
+        raise overloaded(e)
+    return {"accepted": len(batch) - len(rejected), "rejected": rejected, "models": learner.status()}
+
+
+@app.get("/models")
+async def models_status():
+    """Online learner state: samples seen, publishes and current parameters."""
+    return learner.status()
+
+
+@app.post("/models/reset")
+async def models_reset():
+    """Drop online updates and serve the offline-built models again."""
+    learner.reset()
+    return learner.status()
+
+
+@app.post("/models/impact/reload")
+async def impact_reload():
+    """Hot-swap in the latest per-instrument impact table (see models.impact_calibration)."""
+    table = load_impact_table()
+    return {"entries": len(table["lookup"]), "bucketHours": table["bucket_hours"]}
+
+
+def surface_axes(params):
+    """Validated (quantities, volatilities) grid axes for params."""
     try:
-        # Fetch tickers for SWAP instruments
-        result = marketDataAPI.get_tickers(instType="SWAP")
-        if result.get("code") != "0":
-            raise HTTPException(status_code=502, detail="Failed to fetch market data")
-
-        # Find the instrument matching spotAsset (e.g. "BTC-USDT-SWAP")
-        inst_id = f"{params.spotAsset}-SWAP"
-        instrument_data = next(
-            (item for item in result["data"] if item["instId"] == inst_id), None
+        quantities = (
+            np.asarray(params.quantities, dtype=np.float64) if params.quantities is not None
+            else grid_axis(params.quantityMin, params.quantityMax, params.quantitySteps, params.logQuantities)
+        )
+        volatilities = (
+            np.asarray(params.volatilities, dtype=np.float64) if params.volatilities is not None
+            else grid_axis(params.volatilityMin, params.volatilityMax, params.volatilitySteps)
         )
-        if instrument_data is None:
-            raise HTTPException(status_code=404, detail="Instrument not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    for name, axis in (("quantities", quantities), ("volatilities", volatilities)):
+        if len(axis) == 0 or np.any(axis <= 0) or np.any(np.diff(axis) <= 0):
+            raise HTTPException(status_code=400, detail=f"{name} must be positive and strictly increasing")
+    if len(quantities) * len(volatilities) > MAX_SURFACE_CELLS:
+        raise HTTPException(status_code=400, detail=f"surface is limited to {MAX_SURFACE_CELLS} cells")
+    return quantities, volatilities
 
-        # Construct asks and bids for model inputs
-        # Here we approximate asks and bids from best ask/bid prices and sizes
-        asks = [[instrument_data["askPx"], instrument_data["askSz"]]]
-        bids = [[instrument_data["bidPx"], instrument_data["bidSz"]]]
 
-        # Calculate outputs
-        slippage = estimate_slippage(asks, bids, quantity=params.quantity,volatility=params.volatility)
-        fees = estimate_fees(asks, bids,volatility=params.volatility)
-        market_impact = estimate_market_impact(asks, bids, quantity=params.quantity ,volatility=params.volatility)
-        net_cost = slippage + fees + market_impact
-        maker_taker = estimate_maker_taker(asks, bids,volatility=params.volatility)
-        latency_ms = measure_latency(start_time)
-
-        return {
-            "slippage": slippage,
-            "fees": fees,
-            "marketImpact": market_impact,
-            "cost": net_cost,
-            "makerTaker": maker_taker,
-            "latency": latency_ms,
+@app.post("/surface")
+async def surface(params: SurfaceParams, deadlineMs: Optional[float] = None):
+    """
+    Cost surface over a quantity x volatility grid for one instrument and fee tier.
+
+    The whole grid is one vectorized pass through the models and is cached
+    for the current market-data version; "points" are bilinearly
+    interpolated from it. Rows of the 2-D arrays follow quantities and
+    columns follow volatilities.
+    """
+    start_time = time.perf_counter()
+    deadline = deadline_seconds(deadlineMs)
+    quantities, volatilities = surface_axes(params)
+    market = resolve_market(params)
+    with request_scope(instrument_label(market)), span("surface"):
+        version = (market_version(market), model_generation())
+        key = (market, version, params.feeTier, params.orderType, quantities.tobytes(), volatilities.tobytes())
+        grid = surface_cache.get(key) if surface_cache is not None else None
+        cached = grid is not None
+        if grid is None:
+            ticker, asks, bids, features = get_market(market)
+            asks = np.array(asks, dtype=np.float64).reshape(-1, 2)
+            bids = np.array(bids, dtype=np.float64).reshape(-1, 2)
+            try:
+                grid = await execution.run(
+                    market, cost_surface, asks, bids, quantities, volatilities, market, features,
+                    fee_tier(params), deadline=deadline,
+                )
+            except Overloaded as e:
+                raise overloaded(e)
+            grid["marketDataVersion"] = ticker.version
+            if surface_cache is not None and (market_version(market), model_generation()) == version:
+                surface_cache.put(key, grid)
+
+        result = {
+            "instrument": market[1],
+            "feeTier": params.feeTier,
+            "quantities": quantities.tolist(),
+            "volatilities": volatilities.tolist(),
+            "cost": grid["cost"].tolist(),
+            "depthSlippage": grid["depthSlippage"].tolist(),
+            "makerProbability": grid["maker"].tolist(),
+            "marketDataVersion": grid["marketDataVersion"],
+            "cached": cached,
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        if params.components:
+            result.update({name: grid[name].tolist() for name in ("slippage", "fees", "marketImpact")})
+        if params.points:
+            try:
+                points = np.asarray(params.points, dtype=np.float64).reshape(-1, 2)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="points must be [quantity, volatility] pairs")
+            cost, inside = interpolate(quantities, volatilities, grid["cost"], points)
+            result["points"] = [
+                {"quantity": q, "volatility": v, "cost": c, "inside": bool(ok)}
+                for (q, v), c, ok in zip(points.tolist(), cost.tolist(), inside)
+            ]
+    result["latency"] = measure_latency(start_time)
+    # Plain json.dumps; the default encoder walks every cell
+    return JSONResponse(result)
+
+
+@app.post("/simulate")
+async def simulate(params: SimulationParams, deadlineMs: Optional[float] = None):
+    """
+    Monte Carlo distribution of the cost of working params.quantity over
+    timeSteps child orders (see models.simulation).
+
+    Paths start from the instrument's current book and calibrated impact
+    parameters. The chunks are split into at most one admitted task per
+    execution worker, so a large request spreads over the workers without
+    taking the instrument's whole in-flight allowance. The same seed (and
+    inputs) gives the same distribution.
+    """
+    start_time = time.perf_counter()
+    deadline = deadline_seconds(deadlineMs)
+    steps = len(params.schedule) if params.schedule is not None else params.timeSteps
+    if params.quantity <= 0:
+        raise HTTPException(status_code=400, detail="quantity must be positive")
+    if not 1 <= steps <= MAX_SCHEDULE_STEPS:
+        raise HTTPException(status_code=400, detail=f"timeSteps must be between 1 and {MAX_SCHEDULE_STEPS}")
+    if params.horizon <= 0:
+        raise HTTPException(status_code=400, detail="horizon must be positive")
+    if not 1 <= params.paths <= MAX_SIMULATION_PATHS:
+        raise HTTPException(status_code=400, detail=f"paths must be between 1 and {MAX_SIMULATION_PATHS}")
+    if params.paths * steps > MAX_SIMULATION_CELLS:
+        raise HTTPException(status_code=400, detail=f"paths x timeSteps is limited to {MAX_SIMULATION_CELLS}")
+    if params.seed is not None and params.seed < 0:
+        raise HTTPException(status_code=400, detail="seed must be non-negative")
+    seed = params.seed if params.seed is not None else int(np.random.SeedSequence().entropy % 2 ** 63)
+    config = {"time_steps": steps, "horizon": params.horizon, "vol_horizon": VOLATILITY_HORIZON}
+    for key, value in (("liquidity_volatility", params.liquidityVolatility),
+                       ("liquidity_half_life", params.liquidityHalfLife),
+                       ("permanent_fraction", params.permanentFraction)):
+        if value is not None:
+            config[key] = value
+
+    market = resolve_market(params)
+    with request_scope(instrument_label(market)), span("simulate"):
+        ticker, asks, bids, _ = get_market(market)
+        volatility, volatility_source = resolve_volatility(params, market)
+        try:
+            plan = simulation_plan(
+                asks, bids, params.quantity, volatility, side=params.side, schedule=params.schedule,
+                market=market, fee_tier=fee_tier(params),
+                config=config,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        chunks = chunk_seeds(seed, params.paths, plan["config"]["chunk_paths"])
+        parts = min(execution.workers, len(chunks))
+        runs = [
+            asyncio.ensure_future(execution.run(
+                market, simulate_chunks, plan, chunks[i * len(chunks) // parts:(i + 1) * len(chunks) // parts],
+                deadline=deadline,
+            ))
+            for i in range(parts)
+        ]
+        try:
+            results = await asyncio.gather(*runs)
+        except Overloaded as e:
+            raise overloaded(e)
+        finally:
+            # A shed or failed part fails the request: stop its still-queued siblings
+            for run in runs:
+                run.cancel()
+        summary = summarize_costs(plan, [chunk for part in results for chunk in part])
+
+    return dict(
+        summary,
+        instrument=market[1],
+        side=params.side,
+        quantity=params.quantity,
+        timeSteps=steps,
+        horizon=params.horizon,
+        seed=seed,
+        volatility=volatility,
+        volatilitySource=volatility_source,
+        impactParams={"eta": plan["eta"], "alpha": plan["alpha"]},
+        marketDataVersion=ticker.version,
+        latency=measure_latency(start_time),
+    )
+
+
+def require_profiler():
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set PROFILING=1)")
+    return profiler
+
+
+def profile_interval(interval_ms):
+    """Sampling interval in seconds (None: the profiler's default)."""
+    if interval_ms is None:
+        return None
+    if interval_ms < 1:
+        raise HTTPException(status_code=400, detail="intervalMs must be at least 1")
+    return interval_ms / 1000
+
+
+@app.post("/profile/start")
+async def profile_start(seconds: float = 10, intervalMs: Optional[float] = None, idle: bool = False):
+    """Sample every thread of this worker for `seconds` seconds (discards the previous profile)."""
+    sampler = require_profiler()
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {MAX_PROFILE_SECONDS}]")
+    sampler.start(seconds, interval=profile_interval(intervalMs), idle=idle)
+    return sampler.status()
+
+
+@app.post("/profile/requests")
+async def profile_requests(every: int = 1, thresholdMs: float = 0, seconds: Optional[float] = None,
+                           intervalMs: Optional[float] = None, idle: bool = False):
+    """
+    Profile every `every`-th HTTP request that takes at least thresholdMs,
+    until /profile/stop or for `seconds` (discards the previous profile).
+    """
+    sampler = require_profiler()
+    if every < 1:
+        raise HTTPException(status_code=400, detail="every must be at least 1")
+    if thresholdMs < 0:
+        raise HTTPException(status_code=400, detail="thresholdMs must not be negative")
+    if seconds is not None and not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {MAX_PROFILE_SECONDS}]")
+    sampler.profile_requests(every, thresholdMs / 1000, seconds, interval=profile_interval(intervalMs), idle=idle)
+    return sampler.status()
+
+
+@app.post("/profile/stop")
+async def profile_stop():
+    sampler = require_profiler()
+    # Joins the sampler thread, which wakes at least once per interval
+    await asyncio.to_thread(sampler.stop)
+    return sampler.status()
+
+
+@app.get("/profile")
+async def profile(format: str = "collapsed", top: int = 20):
+    """
+    The collected profile: "collapsed" stacks (one "stack count" line each,
+    for flamegraph.pl or speedscope) or "json" status plus the top functions.
+    """
+    sampler = require_profiler()
+    if format == "collapsed":
+        return PlainTextResponse(sampler.collapsed())
+    if format == "json":
+        return dict(sampler.status(), top=sampler.top(top))
+    raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'json'")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage, per-instrument latency quantiles, execution queue and result cache metrics in Prometheus text format."""
+    text = METRICS.render_prometheus() + execution.render_prometheus()
+    if result_cache is not None:
+        text += result_cache.render_prometheus()
+    return text
@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import websockets
+
+from market.features import DEFAULT_DEPTHS
+from market.order_book import OrderBook
+
+OKX_PUBLIC_WS = "wss://ws.okx.com:8443/ws/v5/public"
+
+
+class BooksFeed:
+    """
+    Maintains local order books from the OKX `books` WebSocket channel.
+
+    One connection carries every subscribed instrument. When a book falls
+    out of sync (sequence gap or checksum mismatch) the feed resubscribes
+    that instrument, which makes OKX send a fresh snapshot.
+
+    Parameters:
+    - inst_ids: instruments to subscribe to
+    - url: WebSocket endpoint (point this at a local stand-in for offline runs)
+    - channel: OKX book channel name
+    - reconnect_delay: seconds to wait before reconnecting after a drop
+    - on_update: optional callable(inst_id) invoked on the event loop after
+      each message that leaves a book in sync
+    - on_message: optional callable(inst_id, message) invoked with every
+      data message before it is applied (e.g. a TapeWriter)
+    - depths: depth bands of each book's feature vector (see market.features)
+    """
+
+    def __init__(self, inst_ids, url=OKX_PUBLIC_WS, channel="books", reconnect_delay=1.0,
+                 on_update=None, on_message=None, depths=DEFAULT_DEPTHS):
+        self.url = url
+        self.on_update = on_update
+        self.on_message = on_message
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.books = {inst_id: OrderBook(inst_id, depths=depths) for inst_id in inst_ids}
+        self._pending = set()  # instruments waiting on a fresh snapshot
+        self._task = None
+
+    def get(self, inst_id):
+        """Return the synced OrderBook for inst_id, or None."""
+        book = self.books.get(inst_id)
+        if book is None or not book.synced:
+            return None
+        return book
+
+    def _args(self, inst_ids):
+        return [{"channel": self.channel, "instId": inst_id} for inst_id in inst_ids]
+
+    async def _resync(self, ws, inst_id):
+        self._pending.add(inst_id)
+        self.books[inst_id].reset()
+        args = self._args([inst_id])
+        await ws.send(json.dumps({"op": "unsubscribe", "args": args}))
+        await ws.send(json.dumps({"op": "subscribe", "args": args}))
+
+    async def handle(self, ws, raw):
+        """Process one raw frame received on ws."""
+        message = json.loads(raw)
+        arg = message.get("arg", {})
+        if "data" not in message or arg.get("channel") != self.channel:
+            return
+        book = self.books.get(arg.get("instId"))
+        if book is None:
+            return
+        if self.on_message is not None:
+            self.on_message(book.inst_id, message)
+        if message.get("action") == "snapshot":
+            self._pending.discard(book.inst_id)
+        if book.handle_message(message):
+            if self.on_update is not None:
+                self.on_update(book.inst_id)
+        elif book.inst_id not in self._pending:
+            await self._resync(ws, book.inst_id)
+
+    async def run(self):
+        """Connect, subscribe and process messages until cancelled."""
+        while True:
+            try:
+                async with websockets.connect(self.url) as ws:
+                    self._pending = set(self.books)
+                    for book in self.books.values():
+                        book.reset()
+                    await ws.send(json.dumps({"op": "subscribe", "args": self._args(self.books)}))
+                    async for raw in ws:
+                        await self.handle(ws, raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            await asyncio.sleep(self.reconnect_delay)
+
+    def start(self):
+        """Start the feed as a task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,240 @@
+"""
+Local stand-in for the OKX public WebSocket `books` channel.
+
+Replays a recorded or synthetic stream of book updates so the order book
+engine can be exercised offline. The server keeps a reference copy of each
+book, so a (re)subscribe is always answered with a snapshot of the current
+state followed by the remaining updates, exactly like OKX does.
+
+Usage:
+    python -m market.fake_okx_ws --port 8765 --inst BTC-USDT-SWAP
+"""
+import argparse
+import asyncio
+import json
+import zlib
+
+import numpy as np
+import websockets
+
+
+def _checksum(bids, asks):
+    # Reference implementation over plain dicts, independent of OrderBook
+    top_bids = sorted(bids.items(), key=lambda kv: -float(kv[0]))[:25]
+    top_asks = sorted(asks.items(), key=lambda kv: float(kv[0]))[:25]
+    parts = []
+    for i in range(max(len(top_bids), len(top_asks))):
+        if i < len(top_bids):
+            parts.append(f"{top_bids[i][0]}:{top_bids[i][1]}")
+        if i < len(top_asks):
+            parts.append(f"{top_asks[i][0]}:{top_asks[i][1]}")
+    crc = zlib.crc32(":".join(parts).encode())
+    return crc - (1 << 32) if crc >= (1 << 31) else crc
+
+
+def _level(price, size):
+    return [price, size, "0", "1"]
+
+
+def synthetic_book_stream(inst_id, n_updates=1000, depth=50, mid=95000.0, tick=0.1, seed=42):
+    """
+    Generate a synthetic `books` message stream with valid seqIds and checksums.
+
+    Parameters:
+    - inst_id: instrument id placed in each message's arg
+    - n_updates: number of incremental updates after the snapshot
+    - depth: levels per side in the initial snapshot
+    - mid: starting mid price
+    - tick: price increment
+    - seed: RNG seed
+
+    Returns:
+    - list of message dicts (first one is the snapshot)
+    """
+    rng = np.random.default_rng(seed)
+    arg = {"channel": "books", "instId": inst_id}
+    asks, bids = {}, {}
+    for i in range(depth):
+        asks[f"{mid + (i + 1) * tick:.1f}"] = f"{rng.uniform(0.01, 5):.3f}"
+        bids[f"{mid - i * tick:.1f}"] = f"{rng.uniform(0.01, 5):.3f}"
+
+    ts = 1_700_000_000_000
+    seq_id = 1000
+    messages = [{
+        "arg": arg,
+        "action": "snapshot",
+        "data": [{
+            "asks": [_level(p, s) for p, s in sorted(asks.items(), key=lambda kv: float(kv[0]))],
+            "bids": [_level(p, s) for p, s in sorted(bids.items(), key=lambda kv: -float(kv[0]))],
+            "ts": str(ts),
+            "checksum": _checksum(bids, asks),
+            "prevSeqId": -1,
+            "seqId": seq_id,
+        }],
+    }]
+
+    for _ in range(n_updates):
+        best_bid = max(float(p) for p in bids)
+        best_ask = min(float(p) for p in asks)
+        upd_asks, upd_bids = [], []
+        for _ in range(int(rng.integers(1, 5))):
+            side_is_ask = rng.random() < 0.5
+            book, out = (asks, upd_asks) if side_is_ask else (bids, upd_bids)
+            offset = int(rng.integers(0, depth)) * tick
+            price = f"{best_ask + offset:.1f}" if side_is_ask else f"{best_bid - offset:.1f}"
+            if price in book and rng.random() < 0.3 and len(book) > 5:
+                del book[price]
+                out.append(_level(price, "0"))
+            else:
+                size = f"{rng.uniform(0.01, 5):.3f}"
+                book[price] = size
+                out.append(_level(price, size))
+        ts += int(rng.integers(1, 100))
+        prev_seq_id, seq_id = seq_id, seq_id + int(rng.integers(1, 3))
+        messages.append({
+            "arg": arg,
+            "action": "update",
+            "data": [{
+                "asks": upd_asks,
+                "bids": upd_bids,
+                "ts": str(ts),
+                "checksum": _checksum(bids, asks),
+                "prevSeqId": prev_seq_id,
+                "seqId": seq_id,
+            }],
+        })
+    return messages
+
+
+def load_recording(path):
+    """Load a recorded stream: one raw WebSocket frame (JSON) per line."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class FakeOkxServer:
+    """
+    Serves `books` messages over a local WebSocket.
+
+    Parameters:
+    - streams: dict instId -> list of messages (snapshot first)
+    - host, port: listen address (port 0 picks a free port)
+    - interval: seconds between updates
+    - drop_every: drop every Nth update to simulate sequence gaps (0 = never)
+    """
+
+    def __init__(self, streams, host="127.0.0.1", port=0, interval=0.0, drop_every=0):
+        self.streams = streams
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.drop_every = drop_every
+        self._server = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def _replay(self, ws, inst_id, subscribed, lock, state):
+        asks, bids = {}, {}
+        for i, message in enumerate(self.streams[inst_id]):
+            data = message["data"][0]
+            async with lock:
+                if message["action"] == "snapshot":
+                    asks.clear()
+                    bids.clear()
+                for side, levels in ((asks, data.get("asks", ())), (bids, data.get("bids", ()))):
+                    for level in levels:
+                        if float(level[1]) == 0:
+                            side.pop(level[0], None)
+                        else:
+                            side[level[0]] = level[1]
+                # Reference state used to answer resubscribes
+                state[inst_id] = (asks, bids, data)
+                dropped = i > 0 and self.drop_every and i % self.drop_every == 0
+                if inst_id in subscribed and not dropped:
+                    await ws.send(json.dumps(message))
+            await asyncio.sleep(self.interval)
+
+    @staticmethod
+    def _snapshot(inst_id, state):
+        asks, bids, data = state[inst_id]
+        return {
+            "arg": {"channel": "books", "instId": inst_id},
+            "action": "snapshot",
+            "data": [{
+                "asks": [_level(p, s) for p, s in sorted(asks.items(), key=lambda kv: float(kv[0]))],
+                "bids": [_level(p, s) for p, s in sorted(bids.items(), key=lambda kv: -float(kv[0]))],
+                "ts": data["ts"],
+                "checksum": _checksum(bids, asks),
+                "prevSeqId": -1,
+                "seqId": data["seqId"],
+            }],
+        }
+
+    async def _handler(self, ws):
+        tasks, locks, subscribed, state = {}, {}, set(), {}
+        try:
+            async for raw in ws:
+                request = json.loads(raw)
+                for arg in request.get("args", ()):
+                    inst_id = arg.get("instId")
+                    if inst_id not in self.streams:
+                        continue
+                    if request.get("op") == "unsubscribe":
+                        subscribed.discard(inst_id)
+                        continue
+                    await ws.send(json.dumps({"event": "subscribe", "arg": arg}))
+                    if inst_id in tasks:
+                        # Stream already running: answer with the current state
+                        async with locks[inst_id]:
+                            subscribed.add(inst_id)
+                            await ws.send(json.dumps(self._snapshot(inst_id, state)))
+                    else:
+                        subscribed.add(inst_id)
+                        locks[inst_id] = asyncio.Lock()
+                        tasks[inst_id] = asyncio.ensure_future(
+                            self._replay(ws, inst_id, subscribed, locks[inst_id], state)
+                        )
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    async def start(self):
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+async def _main(args):
+    if args.recording:
+        streams = {args.inst: load_recording(args.recording)}
+    else:
+        streams = {args.inst: synthetic_book_stream(args.inst, n_updates=args.updates)}
+    async with FakeOkxServer(streams, port=args.port, interval=args.interval) as server:
+        print(f"Serving books for {args.inst} on {server.url}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the OKX books channel")
+    parser.add_argument("--inst", default="BTC-USDT-SWAP")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--updates", type=int, default=10000)
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument("--recording", help="JSONL file of recorded frames")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,106 @@
+"""
+Order book features shared by every cost model.
+
+A live OrderBook keeps the cumulative size of its top-k levels (for each
+k in its depth bands) up to date as deltas arrive, in O(bands) per changed
+level (see BookSide.apply). After each message the book writes its
+feature vector from those sums and the best levels, so pricing a request
+reads a preallocated vector instead of re-parsing and re-summing levels.
+
+Vector layout for depth bands d_0 < ... < d_{K-1}:
+    BEST_ASK, BEST_BID, SPREAD, MID, MICROPRICE, IMBALANCE,
+    ask depth at each band (K), bid depth at each band (K),
+    imbalance at each band (K)
+IMBALANCE repeats the imbalance at the deepest band, which is the depth
+the models see (the levels handed to them).
+"""
+import numpy as np
+
+BEST_ASK, BEST_BID, SPREAD, MID, MICROPRICE, IMBALANCE = range(6)
+_HEADER = 6
+
+DEFAULT_DEPTHS = (1, 5, 10, 25, 50)
+
+# Same regularizer as the original per-request imbalance computation
+_EPS = 1e-9
+
+
+def feature_names(depths=DEFAULT_DEPTHS):
+    """Name of every position in the vector for depths."""
+    names = ["best_ask", "best_bid", "spread", "mid", "microprice", "imbalance"]
+    names += [f"ask_depth_{d}" for d in depths]
+    names += [f"bid_depth_{d}" for d in depths]
+    names += [f"imbalance_{d}" for d in depths]
+    return names
+
+
+def feature_count(depths=DEFAULT_DEPTHS):
+    return _HEADER + 3 * len(depths)
+
+
+def _fill(out, best_ask, best_ask_size, best_bid, best_bid_size, ask_sums, bid_sums):
+    k = len(ask_sums)
+    out[BEST_ASK] = best_ask
+    out[BEST_BID] = best_bid
+    out[SPREAD] = best_ask - best_bid
+    out[MID] = (best_ask + best_bid) / 2
+    top = best_ask_size + best_bid_size
+    # Size-weighted toward the side that is more likely to be hit next
+    out[MICROPRICE] = (best_ask * best_bid_size + best_bid * best_ask_size) / top if top > 0 else out[MID]
+    out[_HEADER:_HEADER + k] = ask_sums
+    out[_HEADER + k:_HEADER + 2 * k] = bid_sums
+    asks = out[_HEADER:_HEADER + k]
+    bids = out[_HEADER + k:_HEADER + 2 * k]
+    out[_HEADER + 2 * k:] = (bids - asks) / (bids + asks + _EPS)
+    out[IMBALANCE] = out[-1]
+
+
+def compute_features(asks, bids, depths=DEFAULT_DEPTHS, out=None):
+    """
+    Feature vector of a book given as [price, qty] levels, best first.
+
+    Used for books that are not maintained incrementally (copies read from
+    shared memory, ticker-only approximations, replayed data).
+
+    Returns:
+    - (feature_count(depths),) float array (zeros if either side is empty)
+    """
+    if out is None:
+        out = np.zeros(feature_count(depths))
+    else:
+        out[:] = 0.0
+    asks = np.asarray(asks, dtype=np.float64).reshape(-1, 2)
+    bids = np.asarray(bids, dtype=np.float64).reshape(-1, 2)
+    if len(asks) == 0 or len(bids) == 0:
+        return out
+    ask_cum = np.cumsum(asks[:, 1])
+    bid_cum = np.cumsum(bids[:, 1])
+    ask_sums = [ask_cum[min(d, len(ask_cum)) - 1] for d in depths]
+    bid_sums = [bid_cum[min(d, len(bid_cum)) - 1] for d in depths]
+    _fill(out, asks[0, 0], asks[0, 1], bids[0, 0], bids[0, 1], ask_sums, bid_sums)
+    return out
+
+
+class BookFeatures:
+    """
+    Preallocated feature vector of one incrementally maintained book.
+
+    Parameters:
+    - depths: increasing level-count bands for cumulative depth and imbalance
+    """
+
+    def __init__(self, depths=DEFAULT_DEPTHS):
+        self.depths = tuple(depths)
+        self.vector = np.zeros(feature_count(self.depths))
+
+    def update(self, asks, bids):
+        """Refresh the vector from two BookSides' best levels and band sums; O(bands)."""
+        if asks.count == 0 or bids.count == 0:
+            self.vector[:] = 0.0
+            return
+        ask, bid = asks.levels[0], bids.levels[0]
+        _fill(self.vector, ask[0], ask[1], bid[0], bid[1], asks.depth_sums, bids.depth_sums)
+
+    def named(self):
+        """{name: value} view of the current vector, for inspection."""
+        return dict(zip(feature_names(self.depths), self.vector.tolist()))
@@ -0,0 +1,184 @@
+"""
+Standalone feed handler for multi-worker deployments.
+
+Runs the exchange ticker caches and book feeds once and publishes every
+update into a shared memory segment (market.shared_market). API workers
+started with MARKET_DATA_SHM set to the same name read from the segment
+instead of opening their own venue connections.
+
+Reads the same environment as the API (EXCHANGES, OKX_REST_URL,
+OKX_WS_URL, BOOK_INSTRUMENTS, BOOK_DEPTH, TICKER_REFRESH_INTERVAL,
+TICKER_MAX_STALENESS, TAPE_DIR).
+
+Usage (from backend/):
+    python -m market.feed_handler --name goquant-market
+    MARKET_DATA_SHM=goquant-market uvicorn main:app --workers 8
+"""
+import argparse
+import asyncio
+import os
+import signal
+import time
+
+from exchanges.registry import create_adapter, env_options
+from market.features import DEFAULT_DEPTHS
+from market.shared_market import SharedMarketWriter
+from market.tape import TapeWriter
+from market.ticker_cache import TickerCache
+
+
+def ticker_fetcher(adapter, tape_writer=None):
+    """TickerCache fetch callable wrapping an adapter in an OKX-style response."""
+    async def fetch_tickers(instType):
+        result = {"code": "0", "data": await adapter.fetch_tickers()}
+        if tape_writer is not None:
+            tape_writer.write_tickers(result)
+        return result
+    return fetch_tickers
+
+
+def build_market_data(adapters, book_instruments, refresh_interval=1.0, max_staleness=5.0, tape_writer=None,
+                      feature_depths=DEFAULT_DEPTHS):
+    """
+    Ticker caches and book feeds for a set of exchange adapters.
+
+    Parameters:
+    - adapters: dict of exchange name -> ExchangeAdapter
+    - book_instruments: instruments to maintain L2 books for
+    - refresh_interval, max_staleness: TickerCache settings
+    - tape_writer: optional TapeWriter recording everything received
+    - feature_depths: depth bands of each book's feature vector
+
+    Returns:
+    - (ticker_caches, books_feeds): dicts keyed by exchange name; venues
+      without a streaming book channel have no books feed
+    """
+    ticker_caches = {
+        name: TickerCache(
+            ticker_fetcher(adapter, tape_writer),
+            inst_type=adapter.inst_type,
+            refresh_interval=refresh_interval,
+            max_staleness=max_staleness,
+        )
+        for name, adapter in adapters.items()
+    }
+    books_feeds = {}
+    for name, adapter in adapters.items():
+        feed = adapter.books_feed(
+            book_instruments,
+            on_message=tape_writer.write_book_message if tape_writer is not None else None,
+            depths=feature_depths,
+        )
+        if feed is not None:
+            books_feeds[name] = feed
+    return ticker_caches, books_feeds
+
+
+class FeedHandler:
+    """
+    Publishes ticker caches and book feeds into a SharedMarketWriter.
+
+    Tickers and books are written from the caches' and feeds' own update
+    callbacks; a status loop additionally publishes each exchange's last
+    refresh time (which moves even when no ticker changed) and withdraws
+    books that fell out of sync.
+
+    Parameters:
+    - writer: SharedMarketWriter to publish into
+    - ticker_caches, books_feeds: as returned by build_market_data
+    - status_interval: seconds between status publications
+    """
+
+    def __init__(self, writer, ticker_caches, books_feeds, status_interval=0.1):
+        self.writer = writer
+        self.ticker_caches = ticker_caches
+        self.books_feeds = books_feeds
+        self.status_interval = status_interval
+        self._published = set()  # (exchange, instId) books currently in the segment
+        for name, cache in ticker_caches.items():
+            cache.on_update = lambda inst_ids, name=name: self.on_tickers(name, inst_ids)
+        for name, feed in books_feeds.items():
+            feed.on_update = lambda inst_id, name=name: self.on_book(name, inst_id)
+
+    def on_tickers(self, exchange, inst_ids):
+        cache = self.ticker_caches[exchange]
+        for inst_id in inst_ids:
+            ticker = cache.get(inst_id)
+            if ticker is not None:
+                self.writer.write_ticker(exchange, inst_id, ticker.data, ticker.version)
+
+    def on_book(self, exchange, inst_id):
+        book = self.books_feeds[exchange].get(inst_id)
+        if book is None:
+            return
+        asks, bids = book.top(self.writer.depth)
+        self.writer.write_book(exchange, inst_id, asks, bids, book.version, book.ts)
+        self._published.add((exchange, inst_id))
+
+    def publish_status(self):
+        now = time.time()
+        for name, cache in self.ticker_caches.items():
+            if cache.ready:
+                self.writer.write_status(name, now - cache.age())
+        for exchange, inst_id in list(self._published):
+            if self.books_feeds[exchange].get(inst_id) is None:
+                self.writer.clear_book(exchange, inst_id)
+                self._published.discard((exchange, inst_id))
+
+    async def run(self):
+        """Start every cache and feed and publish until cancelled."""
+        for cache in self.ticker_caches.values():
+            cache.start()
+        for feed in self.books_feeds.values():
+            feed.start()
+        try:
+            while True:
+                self.publish_status()
+                await asyncio.sleep(self.status_interval)
+        finally:
+            for feed in self.books_feeds.values():
+                await feed.stop()
+            for cache in self.ticker_caches.values():
+                cache.stop()
+
+
+async def serve(name, exchange_names, book_instruments, depth=50, slots=2048, refresh_interval=1.0,
+                max_staleness=5.0, tape_dir=None):
+    """Run a feed handler publishing into segment `name` until SIGINT/SIGTERM."""
+    adapters = {e: create_adapter(e, **env_options(e)) for e in exchange_names}
+    tape_writer = TapeWriter(tape_dir) if tape_dir else None
+    ticker_caches, books_feeds = build_market_data(
+        adapters, book_instruments, refresh_interval, max_staleness, tape_writer
+    )
+    writer = SharedMarketWriter(name, slots=slots, depth=depth)
+    handler = FeedHandler(writer, ticker_caches, books_feeds)
+    task = asyncio.get_running_loop().create_task(handler.run())
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        asyncio.get_running_loop().add_signal_handler(sig, task.cancel)
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        for adapter in adapters.values():
+            await adapter.close()
+        if tape_writer is not None:
+            tape_writer.flush()
+        writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish market data into shared memory for API workers")
+    parser.add_argument("--name", default=os.getenv("MARKET_DATA_SHM", "goquant-market"))
+    parser.add_argument("--slots", type=int, default=int(os.getenv("MARKET_DATA_SHM_SLOTS", "2048")))
+    args = parser.parse_args()
+    asyncio.run(serve(
+        args.name,
+        [e.upper() for e in os.getenv("EXCHANGES", "OKX").split(",") if e],
+        [i for i in os.getenv("BOOK_INSTRUMENTS", "BTC-USDT-SWAP").split(",") if i],
+        depth=int(os.getenv("BOOK_DEPTH", "50")),
+        slots=args.slots,
+        refresh_interval=float(os.getenv("TICKER_REFRESH_INTERVAL", "1.0")),
+        max_staleness=float(os.getenv("TICKER_MAX_STALENESS", "5.0")),
+        tape_dir=os.getenv("TAPE_DIR"),
+    ))
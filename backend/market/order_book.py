@@ -0,0 +1,266 @@
+import zlib
+
+import numpy as np
+
+from market.features import DEFAULT_DEPTHS, BookFeatures, compute_features
+
+# OKX checksums cover the top 25 levels of each side
+CHECKSUM_DEPTH = 25
+# Incremental band sums are recomputed exactly this often to bound float drift
+RESUM_EVERY = 4096
+
+
+class BookSide:
+    """
+    One side of an L2 book kept as sorted, preallocated numpy arrays.
+
+    Levels are stored best-first: ascending prices for asks, descending for
+    bids. `levels[:count]` is an (n, 2) [price, size] array, so the top of
+    the book can be handed to the models as a zero-copy view. The original
+    price/size strings are kept alongside for the OKX checksum.
+
+    depth_sums[j] is the total size of the best depths[j] levels, kept up to
+    date by apply() in O(len(depths)) per changed level.
+
+    Parameters:
+    - descending: True for bids, False for asks
+    - capacity: initial number of preallocated levels
+    - depths: level-count bands to maintain cumulative size for
+    """
+
+    def __init__(self, descending, capacity=512, depths=DEFAULT_DEPTHS):
+        self.descending = descending
+        self.count = 0
+        self.levels = np.empty((capacity, 2), dtype=np.float64)
+        # Sort keys (price, negated for bids) so searchsorted works on both sides
+        self._keys = np.empty(capacity, dtype=np.float64)
+        self._raw = []  # [(price_str, size_str), ...] in the same order
+        self.depths = tuple(depths)
+        self.depth_sums = [0.0] * len(self.depths)
+        self._applied = 0
+
+    def clear(self):
+        self.count = 0
+        self._raw = []
+        self.depth_sums = [0.0] * len(self.depths)
+
+    def resum(self):
+        """Recompute depth_sums exactly from the levels."""
+        cum = np.cumsum(self.levels[: self.count, 1])
+        self.depth_sums = [float(cum[min(d, self.count) - 1]) if self.count else 0.0 for d in self.depths]
+        self._applied = 0
+
+    def _grow(self):
+        capacity = len(self._keys) * 2
+        levels = np.empty((capacity, 2), dtype=np.float64)
+        levels[: self.count] = self.levels[: self.count]
+        keys = np.empty(capacity, dtype=np.float64)
+        keys[: self.count] = self._keys[: self.count]
+        self.levels, self._keys = levels, keys
+
+    def apply(self, price_str, size_str):
+        """
+        Insert, update or delete (size 0) a single price level in place.
+
+        Parameters:
+        - price_str: price as sent by the exchange
+        - size_str: new size at that price as sent by the exchange
+        """
+        price = float(price_str)
+        size = float(size_str)
+        key = -price if self.descending else price
+        n = self.count
+        i = int(np.searchsorted(self._keys[:n], key))
+        exists = i < n and self._keys[i] == key
+        sums = self.depth_sums
+
+        if size == 0:
+            if exists:
+                old = self.levels[i, 1]
+                # Shift the tail up by one level
+                self._keys[i : n - 1] = self._keys[i + 1 : n]
+                self.levels[i : n - 1] = self.levels[i + 1 : n]
+                del self._raw[i]
+                self.count = n - 1
+                for j, d in enumerate(self.depths):
+                    if i < d:
+                        # The level that moved up into the band joins it
+                        sums[j] += (self.levels[d - 1, 1] if n - 1 >= d else 0.0) - old
+                self._changed()
+            return
+
+        if exists:
+            delta = size - self.levels[i, 1]
+            self.levels[i, 1] = size
+            self._raw[i] = (price_str, size_str)
+            for j, d in enumerate(self.depths):
+                if i < d:
+                    sums[j] += delta
+            self._changed()
+            return
+
+        if n == len(self._keys):
+            self._grow()
+        # Shift the tail down by one level and insert
+        self._keys[i + 1 : n + 1] = self._keys[i:n]
+        self.levels[i + 1 : n + 1] = self.levels[i:n]
+        self._keys[i] = key
+        self.levels[i, 0] = price
+        self.levels[i, 1] = size
+        self._raw.insert(i, (price_str, size_str))
+        self.count = n + 1
+        for j, d in enumerate(self.depths):
+            if i < d:
+                # The level pushed out of the band leaves it
+                sums[j] += size - (self.levels[d, 1] if n >= d else 0.0)
+        self._changed()
+
+    def _changed(self):
+        self._applied += 1
+        if self._applied >= RESUM_EVERY:
+            self.resum()
+
+    def top(self, n=None):
+        """
+        Zero-copy (n, 2) view of the best n levels.
+
+        The view is only valid until the next update to this side.
+        """
+        if n is None or n > self.count:
+            n = self.count
+        return self.levels[:n]
+
+
+class OrderBook:
+    """
+    Local L2 order book for one instrument, maintained from the OKX `books`
+    channel (snapshot followed by incremental updates).
+
+    Every update is checked for sequence continuity (prevSeqId must match
+    the last seqId) and against the exchange CRC32 checksum. On a gap or a
+    checksum mismatch the book is marked out of sync and must be rebuilt
+    from a fresh snapshot.
+
+    Parameters:
+    - inst_id: instrument id, e.g. "BTC-USDT-SWAP"
+    - capacity: initial number of preallocated levels per side
+    - depths: depth bands of the feature vector (see market.features)
+    """
+
+    def __init__(self, inst_id, capacity=512, depths=DEFAULT_DEPTHS):
+        self.inst_id = inst_id
+        self.asks = BookSide(descending=False, capacity=capacity, depths=depths)
+        self.bids = BookSide(descending=True, capacity=capacity, depths=depths)
+        self.features = BookFeatures(depths)
+        self.seq_id = None
+        self.ts = None
+        self.version = 0
+        self.synced = False
+        self.resyncs = 0
+
+    def reset(self):
+        """Drop all state; the next message must be a snapshot."""
+        self.asks.clear()
+        self.bids.clear()
+        self.seq_id = None
+        self.synced = False
+
+    def _apply_levels(self, data):
+        for level in data.get("asks", ()):
+            self.asks.apply(level[0], level[1])
+        for level in data.get("bids", ()):
+            self.bids.apply(level[0], level[1])
+
+    def apply_snapshot(self, data):
+        """
+        Rebuild the book from a snapshot payload.
+
+        Returns:
+        - bool: True if the snapshot passed the checksum
+        """
+        self.reset()
+        self._apply_levels(data)
+        self.asks.resum()
+        self.bids.resum()
+        return self._commit(data)
+
+    def apply_update(self, data):
+        """
+        Apply an incremental update payload.
+
+        Returns:
+        - bool: True if the book is still in sync after the update
+        """
+        if not self.synced:
+            return False
+        prev_seq_id = data.get("prevSeqId")
+        if prev_seq_id is not None and self.seq_id is not None and int(prev_seq_id) != self.seq_id:
+            # Sequence gap: we missed at least one update
+            self.synced = False
+            self.resyncs += 1
+            return False
+        self._apply_levels(data)
+        return self._commit(data)
+
+    def _commit(self, data):
+        checksum = data.get("checksum")
+        if checksum is not None and int(checksum) != self.checksum():
+            self.synced = False
+            self.resyncs += 1
+            return False
+        seq_id = data.get("seqId")
+        self.seq_id = int(seq_id) if seq_id is not None else None
+        self.ts = data.get("ts")
+        self.version += 1
+        self.features.update(self.asks, self.bids)
+        self.synced = True
+        return True
+
+    def checksum(self):
+        """
+        OKX book checksum: CRC32 over "bid:size:ask:size:..." for the top 25
+        levels, interleaving bids and asks, as a signed 32-bit integer.
+        """
+        bids = self.bids._raw[:CHECKSUM_DEPTH]
+        asks = self.asks._raw[:CHECKSUM_DEPTH]
+        parts = []
+        for i in range(max(len(bids), len(asks))):
+            if i < len(bids):
+                parts.append(f"{bids[i][0]}:{bids[i][1]}")
+            if i < len(asks):
+                parts.append(f"{asks[i][0]}:{asks[i][1]}")
+        crc = zlib.crc32(":".join(parts).encode())
+        return crc - (1 << 32) if crc >= (1 << 31) else crc
+
+    def handle_message(self, message):
+        """
+        Route one parsed `books` channel message to snapshot/update handling.
+
+        Returns:
+        - bool: True if the book is in sync afterwards
+        """
+        action = message.get("action")
+        for data in message.get("data", ()):
+            if action == "snapshot":
+                self.apply_snapshot(data)
+            else:
+                self.apply_update(data)
+        return self.synced
+
+    def top(self, n=None):
+        """
+        Zero-copy views of the best n levels per side.
+
+        Returns:
+        - (asks, bids): two (n, 2) float arrays of [price, size]
+        """
+        return self.asks.top(n), self.bids.top(n)
+
+    def feature_vector(self, depths):
+        """
+        Copy of the book's feature vector for depths (maintained
+        incrementally when they are the book's own bands).
+        """
+        if tuple(depths) == self.features.depths:
+            return self.features.vector.copy()
+        return compute_features(self.asks.top(), self.bids.top(), depths)
@@ -0,0 +1,533 @@
+"""
+Market data published through shared memory for multi-worker deployments.
+
+One feed-handler process (market.feed_handler) owns the exchange
+connections and writes tickers and top-of-book levels into a single
+multiprocessing.shared_memory segment. Every API worker maps the segment
+and reads snapshots straight out of it: no sockets, pipes or pickling per
+read, and one set of venue connections however many workers run.
+
+Layout: a small header followed by fixed-size slots, one per
+(exchange, instId) plus one status slot per exchange. Each slot is guarded
+by a seqlock: the writer makes the slot's sequence number odd, writes,
+then makes it even again; a reader copies the slot and retries if the
+sequence was odd or moved while it copied. Readers never block the writer
+and a copy of a 50-level book is ~2 KB.
+
+The protocol relies on stores becoming visible in program order, which
+holds for plain stores on x86-64 (TSO); the writer is single-threaded.
+"""
+import asyncio
+import os
+import sys
+import time
+from collections import namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from market.features import compute_features
+from market.ticker_cache import TickerSnapshot
+
+MAGIC = 0x474F514D4B544431  # "GOQMKTD1"
+KEY_BYTES = 64
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "<u8"),
+    ("slots", "<i8"),
+    ("depth", "<i8"),
+    ("used", "<i8"),  # slots allocated so far; keys are written before this moves
+    ("closed", "<i8"),  # set when the writer shuts down, so readers re-attach
+    ("pid", "<i8"),
+], align=True)
+HEADER_BYTES = 64
+
+# Numeric ticker fields kept per slot, in column order
+TICKER_COLUMNS = ("askPx", "askSz", "bidPx", "bidSz", "last")
+
+
+def slot_dtype(depth):
+    return np.dtype([
+        ("seq", "<i8"),
+        ("key", f"S{KEY_BYTES}"),
+        ("refreshed", "<f8"),  # wall-clock time of the last write (status slots: last refresh)
+        ("ticker_version", "<i8"),
+        ("ticker_ts", "<i8"),
+        ("ticker", "<f8", (len(TICKER_COLUMNS),)),
+        ("book_version", "<i8"),
+        ("book_ts", "<i8"),
+        ("n_asks", "<i8"),
+        ("n_bids", "<i8"),
+        ("asks", "<f8", (depth, 2)),
+        ("bids", "<f8", (depth, 2)),
+    ], align=True)
+
+
+def segment_size(slots, depth):
+    return HEADER_BYTES + slots * slot_dtype(depth).itemsize
+
+
+def slot_key(exchange, inst_id=None):
+    """Directory key of an instrument slot, or of the exchange's status slot."""
+    return f"{exchange}|{inst_id}" if inst_id is not None else exchange
+
+
+class BookSnapshot(namedtuple("BookSnapshot", ["inst_id", "asks", "bids", "version", "ts"])):
+    """A consistent copy of one book as published by the feed handler."""
+
+    __slots__ = ()
+
+    def top(self, n=None):
+        """(asks, bids): the best n levels per side, like OrderBook.top."""
+        return self.asks[:n], self.bids[:n]
+
+    def feature_vector(self, depths):
+        """Feature vector of the copied levels (see market.features)."""
+        return compute_features(self.asks, self.bids, depths)
+
+
+class _Segment:
+    """Typed numpy views over a mapped segment."""
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=shm.buf)
+        depth = int(self.header["depth"])
+        slots = int(self.header["slots"])
+        self.depth = depth
+        self.capacity = slots
+        self.slots = np.ndarray((slots,), slot_dtype(depth), buffer=shm.buf, offset=HEADER_BYTES)
+        # Per-field views, so the hot paths skip the structured-dtype lookup
+        for field in self.slots.dtype.names:
+            setattr(self, field, self.slots[field])
+
+    def release(self):
+        # Views must go before the mapping can close
+        for field in self.slots.dtype.names:
+            delattr(self, field)
+        self.header = self.slots = None
+        self.shm.close()
+
+
+class SharedMarketWriter:
+    """
+    The feed handler's side: allocates slots and publishes into them.
+
+    Parameters:
+    - name: shared memory segment name
+    - slots: slot capacity (instruments plus one per exchange)
+    - depth: book levels kept per side
+    - replace: unlink a leftover segment of the same name first
+    """
+
+    def __init__(self, name, slots=2048, depth=50, replace=True):
+        size = segment_size(slots, depth)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            if not replace:
+                raise
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:HEADER_BYTES] = bytes(HEADER_BYTES)
+        header = np.ndarray((), HEADER_DTYPE, buffer=shm.buf)
+        header["slots"] = slots
+        header["depth"] = depth
+        header["pid"] = os.getpid()
+        header["magic"] = MAGIC
+        del header
+        self.name = name
+        self._segment = _Segment(shm)
+        self._index = {}
+
+    @property
+    def depth(self):
+        return self._segment.depth
+
+    def slot(self, key):
+        """Index of key's slot, allocating it on first use."""
+        i = self._index.get(key)
+        if i is not None:
+            return i
+        segment = self._segment
+        i = len(self._index)
+        if i >= segment.capacity:
+            raise RuntimeError(f"shared market segment full ({segment.capacity} slots)")
+        segment.key[i] = key.encode()
+        # Publish the key before the slot count that makes it visible
+        segment.header["used"] = i + 1
+        self._index[key] = i
+        return i
+
+    def write_ticker(self, exchange, inst_id, data, version):
+        """Publish one ticker (a dict with TICKER_FIELDS) at the cache's version."""
+        segment = self._segment
+        i = self.slot(slot_key(exchange, inst_id))
+        row = [_float(data.get(column)) for column in TICKER_COLUMNS]
+        try:
+            ts = int(data.get("ts"))
+        except (TypeError, ValueError):
+            ts = 0
+        segment.seq[i] += 1
+        segment.ticker[i] = row
+        segment.ticker_ts[i] = ts
+        segment.ticker_version[i] = version
+        segment.refreshed[i] = time.time()
+        segment.seq[i] += 1
+
+    def write_book(self, exchange, inst_id, asks, bids, version, ts):
+        """Publish the best `depth` levels of a book."""
+        segment = self._segment
+        i = self.slot(slot_key(exchange, inst_id))
+        depth = segment.depth
+        n_asks, n_bids = min(len(asks), depth), min(len(bids), depth)
+        segment.seq[i] += 1
+        segment.asks[i, :n_asks] = asks[:n_asks]
+        segment.bids[i, :n_bids] = bids[:n_bids]
+        segment.n_asks[i] = n_asks
+        segment.n_bids[i] = n_bids
+        segment.book_ts[i] = int(ts) if ts is not None else 0
+        segment.book_version[i] = version
+        segment.refreshed[i] = time.time()
+        segment.seq[i] += 1
+
+    def clear_book(self, exchange, inst_id):
+        """Withdraw a book (e.g. it fell out of sync)."""
+        segment = self._segment
+        i = self.slot(slot_key(exchange, inst_id))
+        segment.seq[i] += 1
+        segment.n_asks[i] = segment.n_bids[i] = 0
+        segment.book_version[i] = 0
+        segment.seq[i] += 1
+
+    def write_status(self, exchange, refreshed):
+        """Wall-clock time of the exchange's last successful ticker refresh."""
+        segment = self._segment
+        i = self.slot(slot_key(exchange))
+        segment.seq[i] += 1
+        segment.refreshed[i] = refreshed
+        segment.seq[i] += 1
+
+    def close(self, unlink=True):
+        segment = self._segment
+        if segment is None:
+            return
+        segment.header["closed"] = 1
+        shm = segment.shm
+        segment.release()
+        self._segment = None
+        if unlink:
+            shm.unlink()
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _attach(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching registers the segment with the resource tracker,
+    # which unlinks it when the attaching process exits; only the writer owns it
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedMarketReader:
+    """
+    A worker's read-only view of the segment.
+
+    Attaches lazily (the feed handler may start after the workers) and
+    re-attaches when the writer restarts.
+
+    Parameters:
+    - name: shared memory segment name
+    - max_retries: seqlock retries before a read gives up and returns None
+    """
+
+    def __init__(self, name, max_retries=1000):
+        self.name = name
+        self.max_retries = max_retries
+        self.retries = 0  # reads that raced a write and went again
+        self._segment = None
+        self._index = {}
+        self._scanned = 0
+
+    def _get_segment(self):
+        segment = self._segment
+        if segment is not None and not segment.header["closed"]:
+            return segment
+        if segment is not None:
+            self._segment = None
+            segment.release()
+            self._index = {}
+            self._scanned = 0
+        try:
+            shm = _attach(self.name)
+        except FileNotFoundError:
+            return None
+        if len(shm.buf) < HEADER_BYTES or np.ndarray((), HEADER_DTYPE, buffer=shm.buf)["magic"] != MAGIC:
+            shm.close()
+            return None
+        self._segment = _Segment(shm)
+        return self._segment
+
+    @property
+    def attached(self):
+        return self._get_segment() is not None
+
+    def slot(self, key):
+        """Index of key's slot, or None if the writer has not published it."""
+        i = self._index.get(key)
+        if i is not None:
+            return i
+        segment = self._get_segment()
+        if segment is None:
+            return None
+        used = int(segment.header["used"])
+        if used > self._scanned:
+            for j in range(self._scanned, used):
+                self._index[segment.key[j].decode()] = j
+            self._scanned = used
+        return self._index.get(key)
+
+    def _read(self, key, copy):
+        i = self.slot(key)
+        if i is None:
+            return None
+        segment = self._segment
+        seq = segment.seq
+        for _ in range(self.max_retries):
+            before = seq[i]
+            if before & 1:
+                self.retries += 1
+                time.sleep(0)
+                continue
+            result = copy(segment, i)
+            if seq[i] == before:
+                return result
+            self.retries += 1
+        return None
+
+    def read_book(self, exchange, inst_id):
+        """BookSnapshot copied out of the segment, or None if there is no synced book."""
+        return self._read(slot_key(exchange, inst_id), _copy_book)
+
+    def read_ticker(self, exchange, inst_id):
+        """(ticker dict with string fields like the REST API, version), or None."""
+        return self._read(slot_key(exchange, inst_id), _copy_ticker)
+
+    def refreshed(self, exchange):
+        """Wall-clock time of the exchange's last ticker refresh, or None."""
+        return self._read(slot_key(exchange), _copy_refreshed)
+
+    def versions(self):
+        """
+        Unsynchronized (keys, ticker versions, book versions) of every slot.
+
+        Only meant for change detection; read the slot itself for data.
+        """
+        segment = self._get_segment()
+        if segment is None:
+            return [], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        self.slot("")  # pick up newly allocated keys
+        used = self._scanned
+        keys = [None] * used
+        for key, i in self._index.items():
+            keys[i] = key
+        return keys, segment.ticker_version[:used].copy(), segment.book_version[:used].copy()
+
+    def close(self):
+        if self._segment is not None:
+            self._segment.release()
+            self._segment = None
+
+
+def _copy_book(segment, i):
+    version = int(segment.book_version[i])
+    if version <= 0:
+        return None
+    n_asks, n_bids = int(segment.n_asks[i]), int(segment.n_bids[i])
+    return BookSnapshot(
+        segment.key[i].decode().partition("|")[2],
+        segment.asks[i, :n_asks].copy(),
+        segment.bids[i, :n_bids].copy(),
+        version,
+        int(segment.book_ts[i]),
+    )
+
+
+def _copy_ticker(segment, i):
+    version = int(segment.ticker_version[i])
+    if version <= 0:
+        return None
+    data = {"instId": segment.key[i].decode().partition("|")[2], "ts": str(int(segment.ticker_ts[i]))}
+    for column, value in zip(TICKER_COLUMNS, segment.ticker[i].tolist()):
+        data[column] = repr(value)
+    return data, version
+
+
+def _copy_refreshed(segment, i):
+    refreshed = float(segment.refreshed[i])
+    return refreshed if refreshed > 0 else None
+
+
+class SharedTickerCache:
+    """
+    TickerCache interface over the shared segment (read side only).
+
+    Parameters:
+    - market: the SharedMarketData the cache reads through
+    - exchange: venue name the feed handler publishes under
+    - max_staleness: age in seconds after which a snapshot is flagged stale
+    """
+
+    def __init__(self, market, exchange, max_staleness=5.0, on_update=None):
+        self.market = market
+        self.exchange = exchange
+        self.max_staleness = max_staleness
+        self.on_update = on_update
+
+    def get(self, inst_id):
+        entry = self.market.reader.read_ticker(self.exchange, inst_id)
+        if entry is None:
+            return None
+        age = self.age()
+        return TickerSnapshot(entry[0], entry[1], age, age > self.max_staleness)
+
+    def age(self):
+        refreshed = self.market.reader.refreshed(self.exchange)
+        if refreshed is None:
+            return float("inf")
+        return max(time.time() - refreshed, 0.0)
+
+    @property
+    def ready(self):
+        return self.market.reader.refreshed(self.exchange) is not None
+
+    def start(self):
+        pass
+
+    def stop(self, timeout=None):
+        pass
+
+
+class SharedBooksFeed:
+    """
+    BooksFeed interface over the shared segment (read side only).
+
+    `books` holds the instruments a book has been published for.
+    """
+
+    def __init__(self, market, exchange, on_update=None):
+        self.market = market
+        self.exchange = exchange
+        self.on_update = on_update
+        self.books = {}
+
+    def get(self, inst_id):
+        return self.market.reader.read_book(self.exchange, inst_id)
+
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class SharedMarketData:
+    """
+    A worker's market data: ticker caches and book feeds backed by the
+    shared segment, plus a poller that turns version changes into the same
+    on_update callbacks the in-process feeds make.
+
+    Parameters:
+    - name: shared memory segment name
+    - poll_interval: seconds between change scans
+    """
+
+    def __init__(self, name, poll_interval=0.005):
+        self.reader = SharedMarketReader(name)
+        self.poll_interval = poll_interval
+        self.ticker_caches = {}
+        self.books_feeds = {}
+        self._ticker_versions = np.zeros(0, dtype=np.int64)
+        self._book_versions = np.zeros(0, dtype=np.int64)
+        self._task = None
+
+    def ticker_cache(self, exchange, max_staleness=5.0):
+        cache = self.ticker_caches.get(exchange)
+        if cache is None:
+            cache = self.ticker_caches[exchange] = SharedTickerCache(self, exchange, max_staleness)
+        return cache
+
+    def books_feed(self, exchange):
+        feed = self.books_feeds.get(exchange)
+        if feed is None:
+            feed = self.books_feeds[exchange] = SharedBooksFeed(self, exchange)
+        return feed
+
+    def poll(self):
+        """Dispatch on_update callbacks for every slot whose version moved since the last poll."""
+        keys, ticker_versions, book_versions = self.reader.versions()
+        if len(keys) < len(self._ticker_versions):
+            # The writer restarted with a fresh segment
+            self._ticker_versions = self._ticker_versions[:0]
+            self._book_versions = self._book_versions[:0]
+        n = len(self._ticker_versions)
+        ticker_moved = np.ones(len(keys), dtype=bool)
+        book_moved = np.ones(len(keys), dtype=bool)
+        ticker_moved[:n] = ticker_versions[:n] != self._ticker_versions
+        book_moved[:n] = book_versions[:n] != self._book_versions
+        self._ticker_versions = ticker_versions
+        self._book_versions = book_versions
+
+        changed = {}
+        for i in np.flatnonzero(ticker_moved & (ticker_versions > 0)):
+            exchange, _, inst_id = keys[i].partition("|")
+            if inst_id:
+                changed.setdefault(exchange, []).append(inst_id)
+        for i in np.flatnonzero(book_moved & (book_versions > 0)):
+            exchange, _, inst_id = keys[i].partition("|")
+            feed = self.books_feeds.get(exchange)
+            if feed is not None:
+                feed.books[inst_id] = True
+                if feed.on_update is not None:
+                    feed.on_update(inst_id)
+        for exchange, inst_ids in changed.items():
+            cache = self.ticker_caches.get(exchange)
+            if cache is not None and cache.on_update is not None:
+                cache.on_update(inst_ids)
+
+    async def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                pass
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        """Start polling on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.reader.close()
@@ -0,0 +1,358 @@
+"""
+Compact on-disk market data tape.
+
+Tickers and L2 book updates are appended as fixed-width numpy structured
+records, one file per (instrument, UTC day, kind):
+
+    <root>/<instId>/<YYYY-MM-DD>/tickers.bin
+    <root>/<instId>/<YYYY-MM-DD>/book.bin
+
+Each data file has a sparse time index (<kind>.idx: exchange ts and row
+number every INDEX_EVERY rows) so time ranges can be located without
+scanning. Readers memory-map the files, so days of data can be scanned
+without loading them into RAM or parsing JSON, and replayed as the same
+messages the live feeds produce.
+"""
+import asyncio
+import datetime
+import heapq
+import os
+import time
+
+import numpy as np
+
+TICKER_DTYPE = np.dtype([
+    ("ts", "<i8"),        # exchange timestamp, ms
+    ("recv_ns", "<i8"),   # local receive time, ns since epoch
+    ("last", "<f8"),
+    ("last_sz", "<f8"),
+    ("bid_px", "<f8"),
+    ("bid_sz", "<f8"),
+    ("ask_px", "<f8"),
+    ("ask_sz", "<f8"),
+])
+
+# One row per price level in a book message; the first row of every
+# message carries FLAG_FIRST so messages can be reassembled
+BOOK_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("recv_ns", "<i8"),
+    ("seq_id", "<i8"),
+    ("prev_seq_id", "<i8"),
+    ("price", "<f8"),
+    ("size", "<f8"),
+    ("side", "i1"),       # 1 = bid, -1 = ask, 0 = message without levels
+    ("flags", "u1"),
+])
+FLAG_SNAPSHOT = 1
+FLAG_FIRST = 2
+
+INDEX_DTYPE = np.dtype([("ts", "<i8"), ("row", "<i8")])
+INDEX_EVERY = 4096
+
+KINDS = {"tickers": TICKER_DTYPE, "book": BOOK_DTYPE}
+
+_TICKER_FIELDS = (
+    ("last", "last"), ("last_sz", "lastSz"), ("bid_px", "bidPx"),
+    ("bid_sz", "bidSz"), ("ask_px", "askPx"), ("ask_sz", "askSz"),
+)
+
+
+def _day(ts_ms):
+    return datetime.datetime.fromtimestamp(ts_ms / 1000, datetime.timezone.utc).strftime("%Y-%m-%d")
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class _Chunk:
+    """Append-only data file plus its sparse index."""
+
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = dtype
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.rows = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+        self.pending = []
+
+    def append(self, records):
+        self.pending.append(records)
+
+    def flush(self):
+        if not self.pending:
+            return
+        records = np.concatenate(self.pending)
+        self.pending = []
+        # Index rows that cross an INDEX_EVERY boundary
+        first = self.rows
+        marks = np.arange(-(-first // INDEX_EVERY) * INDEX_EVERY, first + len(records), INDEX_EVERY)
+        with open(self.path, "ab") as f:
+            records.tofile(f)
+        if len(marks):
+            index = np.empty(len(marks), dtype=INDEX_DTYPE)
+            index["row"] = marks
+            index["ts"] = records["ts"][marks - first]
+            with open(self.path[:-4] + ".idx", "ab") as f:
+                index.tofile(f)
+        self.rows += len(records)
+
+
+class TapeWriter:
+    """
+    Records live tickers and book messages to the tape.
+
+    Writes are buffered per file and appended on flush(), which happens
+    automatically every flush_interval seconds of wall time.
+
+    Parameters:
+    - root: tape directory
+    - flush_interval: seconds between automatic flushes
+    """
+
+    def __init__(self, root, flush_interval=1.0):
+        self.root = root
+        self.flush_interval = flush_interval
+        self._chunks = {}
+        self._last_flush = time.monotonic()
+
+    def _chunk(self, inst_id, day, kind):
+        key = (inst_id, day, kind)
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            path = os.path.join(self.root, inst_id, day, f"{kind}.bin")
+            chunk = self._chunks[key] = _Chunk(path, KINDS[kind])
+        return chunk
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def write_tickers(self, result):
+        """Record every ticker of an OKX get_tickers response."""
+        if result.get("code") != "0":
+            return
+        recv_ns = time.time_ns()
+        for item in result["data"]:
+            record = np.zeros(1, dtype=TICKER_DTYPE)
+            record["ts"] = int(item.get("ts") or 0)
+            record["recv_ns"] = recv_ns
+            for field, key in _TICKER_FIELDS:
+                record[field] = _float(item.get(key))
+            self._chunk(item["instId"], _day(int(record["ts"][0])), "tickers").append(record)
+        self._maybe_flush()
+
+    def write_book_message(self, inst_id, message):
+        """Record one OKX `books` channel message (snapshot or update)."""
+        snapshot = message.get("action") == "snapshot"
+        recv_ns = time.time_ns()
+        for data in message.get("data", ()):
+            asks = data.get("asks", ())
+            bids = data.get("bids", ())
+            records = np.zeros(max(len(asks) + len(bids), 1), dtype=BOOK_DTYPE)
+            records["ts"] = int(data.get("ts") or 0)
+            records["recv_ns"] = recv_ns
+            records["seq_id"] = int(data.get("seqId", -1))
+            records["prev_seq_id"] = int(data.get("prevSeqId", -1))
+            if asks:
+                records["price"][: len(asks)] = [float(level[0]) for level in asks]
+                records["size"][: len(asks)] = [float(level[1]) for level in asks]
+                records["side"][: len(asks)] = -1
+            if bids:
+                records["price"][len(asks):] = [float(level[0]) for level in bids]
+                records["size"][len(asks):] = [float(level[1]) for level in bids]
+                records["side"][len(asks):] = 1
+            records["flags"][0] |= FLAG_FIRST
+            if snapshot:
+                records["flags"] |= FLAG_SNAPSHOT
+            self._chunk(inst_id, _day(int(records["ts"][0])), "book").append(records)
+        self._maybe_flush()
+
+    def flush(self):
+        for chunk in self._chunks.values():
+            chunk.flush()
+        self._last_flush = time.monotonic()
+
+
+class TapeReader:
+    """
+    Memory-mapped access to a recorded tape.
+
+    Parameters:
+    - root: tape directory
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def instruments(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(os.listdir(self.root))
+
+    def days(self, inst_id):
+        path = os.path.join(self.root, inst_id)
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+    def open(self, inst_id, day, kind):
+        """
+        Memory-map one data file.
+
+        Returns:
+        - read-only structured np.memmap (or an empty array if there is no data)
+        """
+        path = os.path.join(self.root, inst_id, day, f"{kind}.bin")
+        dtype = KINDS[kind]
+        if not os.path.exists(path) or os.path.getsize(path) < dtype.itemsize:
+            return np.empty(0, dtype=dtype)
+        # A writer may be mid-append; only map whole records
+        rows = os.path.getsize(path) // dtype.itemsize
+        return np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+
+    def index(self, inst_id, day, kind):
+        path = os.path.join(self.root, inst_id, day, f"{kind}.idx")
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.empty(0, dtype=INDEX_DTYPE)
+        return np.fromfile(path, dtype=INDEX_DTYPE)
+
+    def range(self, inst_id, day, kind, start_ts=None, end_ts=None):
+        """
+        Records with start_ts <= ts < end_ts (exchange ms), as a memmap slice.
+
+        The sparse index narrows the search to a few INDEX_EVERY-row blocks;
+        the final boundaries come from a searchsorted on the ts column.
+        """
+        records = self.open(inst_id, day, kind)
+        if len(records) == 0:
+            return records
+        index = self.index(inst_id, day, kind)
+        lo, hi = 0, len(records)
+        if len(index):
+            if start_ts is not None:
+                i = np.searchsorted(index["ts"], start_ts, side="left") - 1
+                lo = int(index["row"][i]) if i >= 0 else 0
+            if end_ts is not None:
+                i = np.searchsorted(index["ts"], end_ts, side="right")
+                hi = int(index["row"][i]) if i < len(index) else len(records)
+        window = records[lo:hi]
+        start = np.searchsorted(window["ts"], start_ts, side="left") if start_ts is not None else 0
+        end = np.searchsorted(window["ts"], end_ts, side="left") if end_ts is not None else len(window)
+        return window[start:end]
+
+    def book_messages(self, inst_id, day, start_ts=None, end_ts=None):
+        """
+        Rebuild OKX `books` channel messages from the tape.
+
+        Prices and sizes come back as decimal strings of the stored floats,
+        so the exchange checksum is not reproduced (messages carry none).
+
+        Yields:
+        - message dicts in the live feed format
+        """
+        records = self.range(inst_id, day, "book", start_ts, end_ts)
+        if len(records) == 0:
+            return
+        starts = np.flatnonzero(records["flags"] & FLAG_FIRST)
+        bounds = np.append(starts, len(records))
+        arg = {"channel": "books", "instId": inst_id}
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            rows = np.asarray(records[lo:hi])
+            first = rows[0]
+            asks = rows[rows["side"] == -1]
+            bids = rows[rows["side"] == 1]
+            yield {
+                "arg": arg,
+                "action": "snapshot" if first["flags"] & FLAG_SNAPSHOT else "update",
+                "data": [{
+                    "asks": [[repr(float(p)), repr(float(s)), "0", "0"] for p, s in zip(asks["price"], asks["size"])],
+                    "bids": [[repr(float(p)), repr(float(s)), "0", "0"] for p, s in zip(bids["price"], bids["size"])],
+                    "ts": str(int(first["ts"])),
+                    "seqId": int(first["seq_id"]),
+                    "prevSeqId": int(first["prev_seq_id"]),
+                }],
+            }
+
+    def ticker_messages(self, inst_id, day, start_ts=None, end_ts=None):
+        """
+        Rebuild ticker dicts (get_tickers `data` items) from the tape.
+
+        Yields:
+        - ticker dicts with string fields like the REST API
+        """
+        records = self.range(inst_id, day, "tickers", start_ts, end_ts)
+        for row in np.asarray(records):
+            item = {"instType": "SWAP", "instId": inst_id, "ts": str(int(row["ts"]))}
+            for field, key in _TICKER_FIELDS:
+                item[key] = repr(float(row[field]))
+            yield item
+
+
+class TapeReplay:
+    """
+    Replays recorded days through the live data interfaces.
+
+    Book messages are handed to on_book(inst_id, message), the same
+    callback signature BooksFeed uses for live messages, and ticker
+    snapshots are served by fetch(), a drop-in for marketDataAPI.get_tickers
+    that a TickerCache can poll.
+
+    Parameters:
+    - reader: TapeReader
+    - inst_ids: instruments to replay
+    - day: UTC day, "YYYY-MM-DD"
+    - speed: 1.0 for real time, >1 to accelerate, float("inf") for as fast as possible
+    """
+
+    def __init__(self, reader, inst_ids, day, speed=1.0):
+        self.reader = reader
+        self.inst_ids = inst_ids
+        self.day = day
+        self.speed = speed
+        self._tickers = {}
+
+    def fetch(self, instType=None, **kwargs):
+        """Latest replayed ticker per instrument, as a get_tickers response."""
+        return {"code": "0", "msg": "", "data": list(self._tickers.values())}
+
+    def _events(self):
+        streams = []
+        for inst_id in self.inst_ids:
+            streams.append(
+                (int(m["data"][0]["ts"]), 0, inst_id, m)
+                for m in self.reader.book_messages(inst_id, self.day)
+            )
+            streams.append(
+                (int(t["ts"]), 1, inst_id, t)
+                for t in self.reader.ticker_messages(inst_id, self.day)
+            )
+        return heapq.merge(*streams, key=lambda event: event[0])
+
+    async def run(self, on_book=None):
+        """
+        Replay the day, pacing events by their exchange timestamps.
+
+        Returns:
+        - int: number of events replayed
+        """
+        start_wall = time.monotonic()
+        start_ts = None
+        count = 0
+        for ts, kind, inst_id, payload in self._events():
+            if start_ts is None:
+                start_ts = ts
+            if self.speed != float("inf"):
+                delay = (ts - start_ts) / 1000 / self.speed - (time.monotonic() - start_wall)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if kind == 0:
+                if on_book is not None:
+                    on_book(inst_id, payload)
+            else:
+                self._tickers[inst_id] = payload
+            count += 1
+            if count % 1024 == 0:
+                await asyncio.sleep(0)
+        return count
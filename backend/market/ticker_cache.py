@@ -0,0 +1,163 @@
+import asyncio
+import inspect
+import threading
+import time
+from collections import namedtuple
+
+# A single cached ticker as seen by request handlers
+TickerSnapshot = namedtuple("TickerSnapshot", ["data", "version", "age", "stale"])
+
+
+class TickerCache:
+    """
+    Background-refreshed ticker snapshot indexed by instId.
+
+    One refresher polls the whole instrument universe and swaps in a fresh
+    dict keyed by instId. Request handlers only ever do an O(1) dict lookup
+    and never touch the network. A blocking fetch runs on a background
+    thread; a coroutine fetch (an async exchange adapter) runs as a task on
+    the event loop.
+
+    Parameters:
+    - fetch: callable (or coroutine function) returning an OKX-style
+      response ({"code": "0", "data": [...]})
+    - inst_type: instrument type passed to fetch (e.g. "SWAP")
+    - refresh_interval: seconds between refreshes
+    - max_staleness: age in seconds after which a snapshot is flagged stale
+    - on_update: optional callable(changed_inst_ids) invoked from the
+      refresher thread or task after each published snapshot
+    """
+
+    def __init__(self, fetch, inst_type="SWAP", refresh_interval=1.0, max_staleness=5.0, on_update=None):
+        self.fetch = fetch
+        self.on_update = on_update
+        self.inst_type = inst_type
+        self.refresh_interval = refresh_interval
+        self.max_staleness = max_staleness
+
+        # instId -> (ticker dict, per-instrument version)
+        self._tickers = {}
+        self._updated_at = None
+        self.version = 0
+        self.last_error = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._task = None
+
+    def refresh(self):
+        """
+        Fetch the full ticker universe once and publish it.
+
+        The per-instrument version only moves when that instrument's ticker
+        timestamp changes, so consumers can tell whether their data moved.
+
+        Returns:
+        - bool: True if a new snapshot was published
+        """
+        try:
+            result = self.fetch(instType=self.inst_type)
+        except Exception as e:
+            self.last_error = str(e)
+            return False
+        return self._publish(result)
+
+    async def refresh_async(self):
+        """refresh() for a coroutine fetch; runs on the event loop."""
+        try:
+            result = await self.fetch(instType=self.inst_type)
+        except Exception as e:
+            self.last_error = str(e)
+            return False
+        return self._publish(result)
+
+    def _publish(self, result):
+        if result.get("code") != "0":
+            self.last_error = result.get("msg") or "Failed to fetch market data"
+            return False
+
+        with self._lock:
+            version = self.version + 1
+            previous = self._tickers
+            tickers = {}
+            changed = []
+            for item in result["data"]:
+                inst_id = item["instId"]
+                old = previous.get(inst_id)
+                if old is not None and old[0].get("ts") == item.get("ts"):
+                    tickers[inst_id] = (item, old[1])
+                else:
+                    tickers[inst_id] = (item, version)
+                    changed.append(inst_id)
+            # Readers grab the dict reference without locking; swap it whole
+            self._tickers = tickers
+            self._updated_at = time.monotonic()
+            self.version = version
+            self.last_error = None
+        if self.on_update is not None and changed:
+            self.on_update(changed)
+        return True
+
+    def get(self, inst_id):
+        """
+        Look up the latest ticker for an instrument.
+
+        Parameters:
+        - inst_id: instrument id, e.g. "BTC-USDT-SWAP"
+
+        Returns:
+        - TickerSnapshot or None if the instrument is not in the snapshot
+        """
+        entry = self._tickers.get(inst_id)
+        if entry is None:
+            return None
+        age = self.age()
+        return TickerSnapshot(entry[0], entry[1], age, age > self.max_staleness)
+
+    def age(self):
+        """Seconds since the last successful refresh (inf if never refreshed)."""
+        updated_at = self._updated_at
+        if updated_at is None:
+            return float("inf")
+        return time.monotonic() - updated_at
+
+    @property
+    def ready(self):
+        return self._updated_at is not None
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.refresh()
+            elapsed = time.monotonic() - started
+            self._stop.wait(max(self.refresh_interval - elapsed, 0))
+
+    async def _run_async(self):
+        while True:
+            started = time.monotonic()
+            await self.refresh_async()
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(self.refresh_interval - elapsed, 0))
+
+    def start(self):
+        """Start the background refresher thread or task (idempotent)."""
+        if inspect.iscoroutinefunction(self.fetch):
+            if self._task is None or self._task.done():
+                self._task = asyncio.get_running_loop().create_task(self._run_async())
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ticker-cache", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the background refresher thread or task."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,171 @@
+import math
+import threading
+from collections import namedtuple
+
+# Current estimates for one instrument, each a volatility over the service horizon
+VolatilitySnapshot = namedtuple(
+    "VolatilitySnapshot", ["ewma", "realized", "parkinson", "garman_klass", "samples", "updated_ms"]
+)
+
+ESTIMATORS = ("ewma", "realized", "parkinson", "garman_klass")
+
+_LN2 = math.log(2)
+_GK_CLOSE = 2 * _LN2 - 1
+
+
+class VolatilityEstimator:
+    """
+    O(1)-per-update volatility estimators for one price stream.
+
+    Returns are normalized by their time step, so every estimator tracks a
+    variance rate (per second) regardless of how irregular the updates are:
+    - ewma: exponentially weighted r^2 / dt with a half-life in seconds
+    - realized: sum r^2 / sum dt over a ring buffer of the last `returns` returns
+    - parkinson, garman_klass: range estimators over a ring of `candles`
+      closed candles of `candle_seconds` each
+
+    All buffers are preallocated, so memory is fixed per instrument.
+    """
+
+    __slots__ = (
+        "halflife", "candle_ms", "ewma_rate", "samples", "last_price", "last_ms",
+        "_r2", "_dt", "_ret_i", "_ret_n", "_r2_sum", "_dt_sum",
+        "_open", "_high", "_low", "_close", "_candle_start",
+        "_park", "_gk", "_candle_i", "_candle_n", "_park_sum", "_gk_sum",
+    )
+
+    def __init__(self, halflife=300.0, returns=512, candle_seconds=60, candles=60):
+        self.halflife = halflife
+        self.candle_ms = int(candle_seconds * 1000)
+        self.ewma_rate = None
+        self.samples = 0
+        self.last_price = None
+        self.last_ms = None
+        self._r2 = [0.0] * returns
+        self._dt = [0.0] * returns
+        self._ret_i = self._ret_n = 0
+        self._r2_sum = self._dt_sum = 0.0
+        self._open = self._high = self._low = self._close = None
+        self._candle_start = None
+        self._park = [0.0] * candles
+        self._gk = [0.0] * candles
+        self._candle_i = self._candle_n = 0
+        self._park_sum = self._gk_sum = 0.0
+
+    def update(self, ts_ms, price):
+        """Feed one price observation (timestamps must not go backwards)."""
+        if price <= 0 or (self.last_ms is not None and ts_ms < self.last_ms):
+            return
+        self._update_candle(ts_ms, price)
+        if self.last_price is not None and ts_ms > self.last_ms:
+            r = math.log(price / self.last_price)
+            dt = (ts_ms - self.last_ms) / 1000.0
+            r2 = r * r
+            # EWMA of the variance rate with a time-based decay
+            if self.ewma_rate is None:
+                self.ewma_rate = r2 / dt
+            else:
+                w = math.exp(-dt * _LN2 / self.halflife)
+                self.ewma_rate = w * self.ewma_rate + (1 - w) * r2 / dt
+            # Realized variance ring buffer with running sums
+            i = self._ret_i
+            self._r2_sum += r2 - self._r2[i]
+            self._dt_sum += dt - self._dt[i]
+            self._r2[i], self._dt[i] = r2, dt
+            self._ret_i = (i + 1) % len(self._r2)
+            self._ret_n = min(self._ret_n + 1, len(self._r2))
+            self.samples += 1
+        # An update with the same timestamp only replaces the price
+        self.last_price = price
+        self.last_ms = ts_ms
+
+    def _update_candle(self, ts_ms, price):
+        start = ts_ms - ts_ms % self.candle_ms
+        if self._candle_start is None:
+            self._candle_start = start
+            self._open = self._high = self._low = self._close = price
+            return
+        if start != self._candle_start:
+            self._close_candle()
+            self._candle_start = start
+            # The new candle opens at the previous close
+            self._open = self._high = self._low = self._close
+        self._close = price
+        if price > self._high:
+            self._high = price
+        if price < self._low:
+            self._low = price
+
+    def _close_candle(self):
+        hl = math.log(self._high / self._low)
+        co = math.log(self._close / self._open)
+        park = hl * hl / (4 * _LN2)
+        gk = 0.5 * hl * hl - _GK_CLOSE * co * co
+        i = self._candle_i
+        self._park_sum += park - self._park[i]
+        self._gk_sum += gk - self._gk[i]
+        self._park[i], self._gk[i] = park, gk
+        self._candle_i = (i + 1) % len(self._park)
+        self._candle_n = min(self._candle_n + 1, len(self._park))
+
+    def rates(self):
+        """Variance rates per second (None where there is not enough data yet)."""
+        realized = self._r2_sum / self._dt_sum if self._ret_n and self._dt_sum > 0 else None
+        candle_seconds = self.candle_ms / 1000.0
+        parkinson = garman_klass = None
+        if self._candle_n:
+            parkinson = max(self._park_sum, 0.0) / (self._candle_n * candle_seconds)
+            garman_klass = max(self._gk_sum, 0.0) / (self._candle_n * candle_seconds)
+        return self.ewma_rate, realized, parkinson, garman_klass
+
+
+class VolatilityService:
+    """
+    Per-instrument streaming volatility, served without recomputation.
+
+    Parameters:
+    - horizon: seconds the served volatilities are scaled to (86400 = daily)
+    - max_instruments: instruments tracked; further ones are ignored, which
+      keeps memory fixed
+    - estimator_options: passed to every VolatilityEstimator
+    """
+
+    def __init__(self, horizon=86400.0, max_instruments=1000, **estimator_options):
+        self.horizon = horizon
+        self.max_instruments = max_instruments
+        self.estimator_options = estimator_options
+        self._estimators = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, ts_ms, price):
+        """Feed a price for key (e.g. an (exchange, instId) pair)."""
+        estimator = self._estimators.get(key)
+        if estimator is None:
+            with self._lock:
+                if len(self._estimators) >= self.max_instruments:
+                    return
+                estimator = self._estimators.setdefault(key, VolatilityEstimator(**self.estimator_options))
+        estimator.update(ts_ms, price)
+
+    def get(self, key):
+        """
+        Current estimates for key.
+
+        Returns:
+        - VolatilitySnapshot (fields are None until enough data arrived), or None if untracked
+        """
+        estimator = self._estimators.get(key)
+        if estimator is None:
+            return None
+        scaled = [math.sqrt(rate * self.horizon) if rate is not None else None for rate in estimator.rates()]
+        return VolatilitySnapshot(*scaled, estimator.samples, estimator.last_ms)
+
+    def value(self, key, estimator="ewma"):
+        """One estimate for key, or None if it is not available yet."""
+        snapshot = self.get(key)
+        if snapshot is None or snapshot.samples == 0:
+            return None
+        return getattr(snapshot, estimator)
+
+    def __len__(self):
+        return len(self._estimators)
@@ -0,0 +1,76 @@
+"""
+Offline build step for the model registry.
+
+Trains every model (and calibrates the impact parameters) once and writes
+the artifacts that serving workers load lazily on first use.
+
+Usage (from backend/):
+    python -m models.build                # build missing artifacts
+    python -m models.build --force        # rebuild even if present
+    python -m models.build --cold-start   # measure cold start to first response
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from models import maker_taker, market_impact, registry, slippage
+
+BUILDERS = {
+    "slippage": (slippage.MODEL_CONFIG, slippage.train_model),
+    "slippage_compiled": (slippage.MODEL_CONFIG, slippage.compile_model),
+    "maker_taker": (maker_taker.MODEL_CONFIG, maker_taker.train_model),
+    "maker_taker_compiled": (maker_taker.MODEL_CONFIG, maker_taker.compile_model),
+    "market_impact": (market_impact.CALIBRATION_CONFIG, market_impact.calibrate),
+}
+
+# Run in a fresh interpreter so nothing is already imported or cached
+COLD_START_SCRIPT = """
+import time
+start = time.perf_counter()
+from models.slippage import estimate_slippage
+from models.fees import estimate_fees
+from models.market_impact import estimate_market_impact
+from models.maker_taker import estimate_maker_taker
+imported = time.perf_counter()
+asks, bids = [[95445.5, 9.06]], [[95445.4, 1104.23]]
+estimate_slippage(asks, bids, quantity=100, volatility=0.02)
+estimate_fees(asks, bids, volatility=0.02)
+estimate_market_impact(asks, bids, quantity=100, volatility=0.02)
+estimate_maker_taker(asks, bids, volatility=0.02)
+done = time.perf_counter()
+print(f"{(imported - start) * 1000:.1f} {(done - start) * 1000:.1f}")
+"""
+
+
+def build(force=False):
+    for name, (config, train) in BUILDERS.items():
+        path = registry.artifact_path(name, config)
+        if os.path.exists(path) and not force:
+            print(f"{name}: up to date ({path})")
+            continue
+        start = time.perf_counter()
+        registry.save(name, config, train(config))
+        print(f"{name}: built in {(time.perf_counter() - start) * 1000:.1f} ms ({path})")
+
+
+def measure_cold_start(runs=3):
+    """Time import and first prediction of every model in fresh interpreters."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for i in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", COLD_START_SCRIPT],
+            cwd=backend_dir, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        print(f"run {i + 1}: import {out[-2]} ms, first response {out[-1]} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build model artifacts")
+    parser.add_argument("--force", action="store_true", help="rebuild existing artifacts")
+    parser.add_argument("--cold-start", action="store_true", help="measure cold start after building")
+    args = parser.parse_args()
+    build(force=args.force)
+    if args.cold_start:
+        measure_cold_start()
@@ -0,0 +1,175 @@
+import numpy as np
+
+from utils.latency import timed
+
+
+def _side_arrays(levels):
+    """
+    Turn [[price, qty], ...] levels into prices, cumulative size and
+    cumulative notional arrays (levels must be best-first).
+    """
+    levels = np.asarray(levels, dtype=np.float64).reshape(-1, 2)
+    prices = levels[:, 0]
+    sizes = levels[:, 1]
+    cum_size = np.cumsum(sizes)
+    cum_notional = np.cumsum(prices * sizes)
+    return prices, cum_size, cum_notional
+
+
+class DepthWalk:
+    """
+    Depth-walk slippage for one order book snapshot.
+
+    Both sides are turned into cumulative-size and cumulative-notional
+    arrays once; any number of order sizes is then priced with a single
+    searchsorted per side instead of a Python loop per size.
+
+    Parameters:
+    - asks: list or array of [price, qty] for ask side, best first
+    - bids: list or array of [price, qty] for bid side, best first
+    """
+
+    def __init__(self, asks, bids):
+        self.asks = _side_arrays(asks)
+        self.bids = _side_arrays(bids)
+
+    def walk(self, quantities, side="buy", notional=False):
+        """
+        Price market orders of the given sizes against the book.
+
+        Parameters:
+        - quantities: float or array of order sizes
+        - side: "buy" walks the asks, "sell" walks the bids
+        - notional: if True, quantities are in quote currency (e.g. USD)
+          rather than base units
+
+        Returns:
+        - dict of arrays shaped like quantities:
+          - fill_price: VWAP of the filled part
+          - slippage: VWAP distance from the best price as a fraction of it
+            (positive means worse than the touch)
+          - levels: number of price levels consumed
+          - filled: base units filled
+          - notional: quote currency spent/received
+          - complete: False where the book was too thin to fill the order
+        """
+        prices, cum_size, cum_notional = self.asks if side == "buy" else self.bids
+        q = np.asarray(quantities, dtype=np.float64)
+        n = len(prices)
+        if n == 0:
+            nan = np.full(q.shape, np.nan)
+            zeros = np.zeros(q.shape)
+            return {
+                "fill_price": nan,
+                "slippage": nan,
+                "levels": np.zeros(q.shape, dtype=np.int64),
+                "filled": zeros,
+                "notional": zeros,
+                "complete": np.zeros(q.shape, dtype=bool),
+            }
+
+        cum = cum_notional if notional else cum_size
+        complete = q <= cum[-1]
+        q_fill = np.minimum(q, cum[-1])
+
+        # Index of the level on which each order completes
+        k = np.minimum(np.searchsorted(cum, q_fill, side="left"), n - 1)
+        prev_size = np.where(k > 0, cum_size[k - 1], 0.0)
+        prev_notional = np.where(k > 0, cum_notional[k - 1], 0.0)
+        if notional:
+            spent = q_fill
+            filled = prev_size + (q_fill - prev_notional) / prices[k]
+        else:
+            filled = q_fill
+            spent = prev_notional + (q_fill - prev_size) * prices[k]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fill_price = np.where(filled > 0, spent / filled, prices[0])
+        best = prices[0]
+        if side == "buy":
+            slippage = (fill_price - best) / best
+        else:
+            slippage = (best - fill_price) / best
+
+        return {
+            "fill_price": fill_price,
+            "slippage": slippage,
+            "levels": np.where(q_fill > 0, k + 1, 0),
+            "filled": filled,
+            "notional": spent,
+            "complete": complete,
+        }
+
+    def walk_both(self, quantities, notional=False):
+        """Price the same sizes on both sides; returns {"buy": ..., "sell": ...}."""
+        return {
+            "buy": self.walk(quantities, side="buy", notional=notional),
+            "sell": self.walk(quantities, side="sell", notional=notional),
+        }
+
+
+@timed("depth_slippage")
+def estimate_depth_slippage(asks, bids, quantity_usd=100, side="buy"):
+    """
+    Slippage cost in USD of a market order of quantity_usd walking the book.
+
+    Parameters:
+    - asks: list of [price, qty] for ask side
+    - bids: list of [price, qty] for bid side
+    - quantity_usd: order notional in USD
+    - side: "buy" or "sell"
+
+    Returns:
+    - float: slippage cost versus the best price, rounded to 6 decimals
+    """
+    if len(asks) == 0 or len(bids) == 0:
+        return 0.0
+    result = DepthWalk(asks, bids).walk(quantity_usd, side=side, notional=True)
+    # Clip float noise on single-level fills
+    return round(max(float(result["slippage"] * result["notional"]), 0.0), 6)
+
+
+def walk_books(levels, quantities, side="buy", notional=False):
+    """
+    Depth walk over many book snapshots of one side at once.
+
+    Parameters:
+    - levels: array of shape (n_books, depth, 2) of [price, qty], best first;
+      missing levels padded with qty 0
+    - quantities: array of order sizes (base units, or quote if notional)
+    - side: "buy" if levels are asks, "sell" if they are bids
+    - notional: if True, quantities are in quote currency
+
+    Returns:
+    - dict of (n_books, n_sizes) arrays: fill_price, slippage (fraction of
+      the best price, sign-adjusted so positive is worse), notional, complete
+    """
+    levels = np.asarray(levels, dtype=np.float64)
+    q = np.asarray(quantities, dtype=np.float64)[None, :]
+    prices, sizes = levels[:, :, 0], levels[:, :, 1]
+    cum_size = np.cumsum(sizes, axis=1)
+    cum_notional = np.cumsum(prices * sizes, axis=1)
+    cum = cum_notional if notional else cum_size
+    depth = levels.shape[1]
+
+    complete = q <= cum[:, -1:]
+    q_fill = np.minimum(q, cum[:, -1:])
+    # Level index on which each order completes: count of levels fully consumed
+    k = np.minimum((cum[:, :, None] < q_fill[:, None, :]).sum(axis=1), depth - 1)
+    rows = np.arange(len(levels))[:, None]
+    prev_size = np.where(k > 0, cum_size[rows, k - 1], 0.0)
+    prev_notional = np.where(k > 0, cum_notional[rows, k - 1], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if notional:
+            spent = q_fill
+            filled = prev_size + (q_fill - prev_notional) / prices[rows, k]
+        else:
+            filled = q_fill
+            spent = prev_notional + (q_fill - prev_size) * prices[rows, k]
+        best = prices[:, :1]
+        fill_price = np.where(filled > 0, spent / filled, best)
+        if side == "buy":
+            slippage = (fill_price - best) / best
+        else:
+            slippage = (best - fill_price) / best
+    return {"fill_price": fill_price, "slippage": slippage, "notional": spent, "complete": complete}
@@ -0,0 +1,101 @@
+"""
+The CPU-bound part of pricing: every cost model against a copied book.
+
+These functions only touch their arguments and the model registry, so
+they can run on a worker thread or in a worker process (see
+utils.execution) while the event loop keeps serving.
+"""
+import numpy as np
+
+from models import registry
+from models.depth_walk import DepthWalk, estimate_depth_slippage
+from models.fees import estimate_fees, estimate_fees_batch
+from models.maker_taker import estimate_maker_taker, estimate_maker_taker_batch
+from models.maker_taker import extract_features_batch as maker_taker_features_batch
+from models.market_impact import estimate_market_impact, estimate_market_impact_batch
+from models.slippage import estimate_slippage, estimate_slippage_batch
+from models.slippage import extract_features_batch as slippage_features_batch
+
+
+def evaluate_costs(asks, bids, quantity, volatility, market=None, features=None):
+    """
+    Run every cost model for one order.
+
+    Parameters:
+    - asks, bids: [price, qty] levels (copies; never live book views off the event loop)
+    - quantity: order size
+    - volatility: volatility to price with
+    - market: (exchange, instId) market key for the calibrated impact parameters
+    - features: the book's feature vector (market.features), if maintained
+
+    Returns:
+    - dict with slippage, depthSlippage, fees, marketImpact, cost and makerTaker
+    """
+    slippage = estimate_slippage(asks, bids, quantity=quantity, volatility=volatility, features=features)
+    depth_slippage = estimate_depth_slippage(asks, bids, quantity_usd=quantity)
+    fees = estimate_fees(asks, bids, volatility=volatility)
+    market_impact = estimate_market_impact(asks, bids, quantity=quantity, volatility=volatility, market=market)
+    return {
+        "slippage": slippage,
+        "depthSlippage": depth_slippage,
+        "fees": fees,
+        "marketImpact": market_impact,
+        "cost": slippage + fees + market_impact,
+        "makerTaker": estimate_maker_taker(asks, bids, volatility=volatility, features=features),
+    }
+
+
+def evaluate_costs_batch(groups):
+    """
+    Run every cost model once over the stacked orders of several books.
+
+    Parameters:
+    - groups: list of (asks, bids, quantities, volatilities, market, features),
+      one per book (features may be None)
+
+    Returns:
+    - list of dicts of per-order arrays (slippage, depthSlippage, fees,
+      marketImpact, maker), one per group
+    """
+    if not groups:
+        return []
+    slippage_rows, maker_taker_rows, impact_q, impact_v, impact_markets = [], [], [], [], []
+    results = []
+    for asks, bids, quantities, volatilities, market, features in groups:
+        quantities = np.asarray(quantities, dtype=np.float64)
+        volatilities = np.asarray(volatilities, dtype=np.float64)
+        slippage_rows.append(slippage_features_batch(asks, bids, quantities, volatilities, features))
+        maker_taker_rows.append(maker_taker_features_batch(asks, bids, volatilities, features))
+        impact_q.append(quantities)
+        impact_v.append(volatilities)
+        impact_markets.extend([market] * len(quantities))
+        if len(asks) and len(bids):
+            walk = DepthWalk(asks, bids).walk(quantities, side="buy", notional=True)
+            depth = np.round(np.maximum(walk["slippage"] * walk["notional"], 0.0), 6)
+        else:
+            depth = np.zeros(len(quantities))
+        results.append({"fees": estimate_fees_batch(asks, bids, volatilities), "depthSlippage": depth})
+
+    # One vectorized call per model over every group
+    slippages = estimate_slippage_batch(np.vstack(slippage_rows))
+    makers = estimate_maker_taker_batch(np.vstack(maker_taker_rows))
+    impacts = estimate_market_impact_batch(np.concatenate(impact_q), np.concatenate(impact_v), impact_markets)
+    start = 0
+    for result, quantities in zip(results, impact_q):
+        end = start + len(quantities)
+        result["slippage"] = slippages[start:end]
+        result["maker"] = makers[start:end]
+        result["marketImpact"] = impacts[start:end]
+        start = end
+    return results
+
+
+def call_with_models(snapshot, fn, *args):
+    """
+    Run fn(*args) in a worker process against the parent's serving models.
+
+    Parameters:
+    - snapshot: registry.snapshot() taken in the parent when the task was submitted
+    """
+    registry.install(snapshot)
+    return fn(*args)
@@ -1,3 +1,16 @@
+import numpy as np
+
+from utils.latency import timed
+
+# Fee tiers example (OKX-like), adjusted for demonstration
+FEE_STRUCTURE = {
+    1: {'maker': 0.0009, 'taker': 0.0011},
+    2: {'maker': 0.0007, 'taker': 0.0009},
+    3: {'maker': 0.0005, 'taker': 0.0007},
+}
+
+
+@timed("fees")
 def estimate_fees(asks, bids, quantity_usd=100, fee_tier=1, is_maker=False, volatility=0.02):
     """
     Estimate trading fees based on notional amount, fee tier, order type, and market volatility.
@@ -14,16 +27,9 @@ def estimate_fees(asks, bids, quantity_usd=100, fee_tier=1, is_maker=False, vola
         float: Estimated fee amount in USD, adjusted by volatility
     """
     # Return zero fee if order book data is missing
-    if not asks or not bids:
+    if len(asks) == 0 or len(bids) == 0:
         return 0.0
     
-    # Fee tiers example (OKX-like), adjusted for demonstration
-    fee_structure = {
-        1: {'maker': 0.0009, 'taker': 0.0011},
-        2: {'maker': 0.0007, 'taker': 0.0009},
-        3: {'maker': 0.0005, 'taker': 0.0007},
-    }
-    
     # Use best ask price for notional calculation (assuming buy order)
     best_ask = float(asks[0][0])
     
@@ -31,7 +37,7 @@ def estimate_fees(asks, bids, quantity_usd=100, fee_tier=1, is_maker=False, vola
     notional = quantity_usd
     
     # Select fee rate based on fee tier and order type (maker/taker)
-    tier_fees = fee_structure.get(fee_tier, fee_structure[1])
+    tier_fees = FEE_STRUCTURE.get(fee_tier, FEE_STRUCTURE[1])
     fee_rate = tier_fees['maker'] if is_maker else tier_fees['taker']
     
     # Adjust fee rate by volatility factor (example: fee increases by up to 20% if volatility is high)
@@ -42,3 +48,24 @@ def estimate_fees(asks, bids, quantity_usd=100, fee_tier=1, is_maker=False, vola
     
     # Round fee to 6 decimal places for precision
     return round(fee, 6)
+
+
+@timed("fees_batch")
+def estimate_fees_batch(asks, bids, volatilities, quantity_usd=100, fee_tier=1, is_maker=False):
+    """
+    Vectorized estimate_fees over an array of volatilities for one order book.
+
+    quantity_usd may be a scalar or an array the same length as volatilities.
+
+    Returns:
+    - np.array: estimated fee per row in USD rounded to 6 decimals
+    """
+    volatilities = np.asarray(volatilities, dtype=np.float64)
+    if len(asks) == 0 or len(bids) == 0:
+        return np.zeros(len(volatilities))
+
+    tier_fees = FEE_STRUCTURE.get(fee_tier, FEE_STRUCTURE[1])
+    fee_rate = tier_fees['maker'] if is_maker else tier_fees['taker']
+
+    volatility_adjustment = 1 + np.clip(volatilities / 0.05, 0, 0.2)
+    return np.round(np.asarray(quantity_usd, dtype=np.float64) * fee_rate * volatility_adjustment, 6)
@@ -0,0 +1,229 @@
+"""
+Per-instrument (and optionally per-time-of-day) market impact calibration.
+
+Fits the Almgren-Chriss impact curve impact = eta * q^alpha * sigma to
+historical fills, one curve_fit per (instrument, time-of-day bucket),
+spread over a process pool. Each fit is warm-started from the previous
+table's parameters for the same key, and the result is written as a JSON
+parameter table that models.market_impact resolves with a dict lookup.
+
+Fits are keyed by venue and instrument, since one instId trades
+differently on each exchange. Fill data is a CSV with columns: exchange,
+instId, ts (ms), quantity, volatility, impact (exchange is optional and
+defaults to OKX).
+
+Usage (from backend/):
+    python -m models.impact_calibration --fills fills.csv --workers 8
+    python -m models.impact_calibration --fills fills.csv --bucket-hours 4
+    python -m models.impact_calibration --demo     # synthetic fills for a few instruments
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models import registry
+
+ALL_DAY = "all"
+
+# Tables are {"params": {exchange: {instId: {bucket: fit}}}, ...}; version 1
+# tables (no "version") held {instId: {bucket: fit}} fitted on OKX fills
+TABLE_VERSION = 2
+DEFAULT_EXCHANGE = "OKX"
+
+
+def time_bucket(ts_ms, bucket_hours):
+    """Time-of-day bucket label for a millisecond UTC timestamp (or array of them)."""
+    hours = (np.asarray(ts_ms, dtype=np.int64) // 3_600_000) % 24
+    return hours // bucket_hours
+
+
+def impact_table_path():
+    """Where the serving path looks for the parameter table: $IMPACT_TABLE, else the artifact dir."""
+    return os.getenv("IMPACT_TABLE") or os.path.join(registry.ARTIFACT_DIR, "impact_params.json")
+
+
+def load_table(path=None):
+    """Previously written table (default: impact_table_path()), or None."""
+    path = path or impact_table_path()
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def table_params(table):
+    """The fits of a table as {exchange: {instId: {bucket: fit}}} (any table version)."""
+    table = table or {}
+    params = table.get("params", {})
+    if table.get("version", 1) < TABLE_VERSION:
+        return {DEFAULT_EXCHANGE: params}
+    return params
+
+
+def write_table(table, path=None):
+    """Write the table atomically (default: impact_table_path()) and return its path."""
+    path = path or impact_table_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(table, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+    return path
+
+
+def fit_group(args):
+    """
+    Fit one (instrument, bucket) group.
+
+    Parameters:
+    - args: (exchange, inst_id, bucket, quantities, volatilities, impacts, p0)
+
+    Returns:
+    - (exchange, inst_id, bucket, params dict or None)
+    """
+    from scipy.optimize import curve_fit
+
+    from models.market_impact import fit_func
+
+    exchange, inst_id, bucket, q, sigma, impact, p0 = args
+    start = time.perf_counter()
+    try:
+        (eta, alpha), _ = curve_fit(fit_func, np.vstack((q, sigma)), impact, p0=p0, maxfev=5000)
+    except (RuntimeError, ValueError):
+        return exchange, inst_id, bucket, None
+    if not (np.isfinite(eta) and np.isfinite(alpha) and eta > 0):
+        return exchange, inst_id, bucket, None
+    residuals = impact - eta * q ** alpha * sigma
+    return exchange, inst_id, bucket, {
+        "eta": float(eta),
+        "alpha": float(alpha),
+        "n": int(len(q)),
+        "rmse": float(np.sqrt(np.mean(residuals ** 2))),
+        "ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+def calibrate_table(fills, bucket_hours=None, min_fills=30, workers=None, previous=None):
+    """
+    Fit impact parameters for every (exchange, instrument) and time-of-day bucket.
+
+    Parameters:
+    - fills: dict of column -> array with exchange, instId, ts, quantity,
+      volatility, impact (without exchange every fill is DEFAULT_EXCHANGE's)
+    - bucket_hours: width of the time-of-day buckets, or None for all-day fits only
+    - min_fills: groups with fewer usable fills are skipped (serving falls back)
+    - workers: process count (default: os.cpu_count())
+    - previous: prior table used for warm starts
+
+    Returns:
+    - table dict as written by write_table
+    """
+    from models.market_impact import get_impact_params
+
+    inst_ids = np.asarray(fills["instId"])
+    venues = np.asarray(fills.get("exchange", np.full(len(inst_ids), DEFAULT_EXCHANGE)))
+    q = np.asarray(fills["quantity"], dtype=np.float64)
+    sigma = np.asarray(fills["volatility"], dtype=np.float64)
+    impact = np.asarray(fills["impact"], dtype=np.float64)
+    usable = (q > 0) & (sigma > 0) & np.isfinite(impact)
+    buckets = time_bucket(fills["ts"], bucket_hours) if bucket_hours else None
+
+    global_p0 = list(get_impact_params())
+    prior = table_params(previous)
+
+    tasks = []
+    for exchange, inst_id in sorted(set(zip(venues[usable].tolist(), inst_ids[usable].tolist()))):
+        rows = usable & (venues == exchange) & (inst_ids == inst_id)
+        groups = [(ALL_DAY, rows)]
+        if buckets is not None:
+            groups += [(str(b), rows & (buckets == b)) for b in np.unique(buckets[rows])]
+        for bucket, mask in groups:
+            if mask.sum() < min_fills:
+                continue
+            previous_fits = prior.get(exchange, {}).get(inst_id, {})
+            warm = previous_fits.get(bucket) or previous_fits.get(ALL_DAY)
+            p0 = [warm["eta"], warm["alpha"]] if warm else global_p0
+            tasks.append((str(exchange), str(inst_id), bucket, q[mask], sigma[mask], impact[mask], p0))
+
+    params = {}
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for exchange, inst_id, bucket, result in pool.map(fit_group, tasks, chunksize=max(1, len(tasks) // 64)):
+            if result is None:
+                failed.append([exchange, inst_id, bucket])
+            else:
+                params.setdefault(exchange, {}).setdefault(inst_id, {})[bucket] = result
+
+    return {
+        "version": TABLE_VERSION,
+        "created": int(time.time()),
+        "bucket_hours": bucket_hours,
+        "min_fills": min_fills,
+        "params": params,
+        "failed": failed,
+    }
+
+
+def load_fills(path):
+    """Read a fills CSV into a dict of column arrays."""
+    import pandas as pd
+
+    df = pd.read_csv(path, dtype={"exchange": str, "instId": str})
+    if "exchange" not in df:
+        df["exchange"] = DEFAULT_EXCHANGE
+    df["exchange"] = df["exchange"].str.upper()
+    columns = ("exchange", "instId", "ts", "quantity", "volatility", "impact")
+    return {column: df[column].to_numpy() for column in columns}
+
+
+def generate_synthetic_fills(n_instruments=8, n=5000, seed=0):
+    """Fills whose true eta/alpha differ per instrument and by hour of day."""
+    rng = np.random.default_rng(seed)
+    columns = {key: [] for key in ("instId", "ts", "quantity", "volatility", "impact")}
+    truth = {}
+    for k in range(n_instruments):
+        inst_id = f"SYN{k}-USDT-SWAP"
+        eta, alpha = 10 ** rng.uniform(-4.5, -3), rng.uniform(0.4, 0.9)
+        truth[inst_id] = (eta, alpha)
+        ts = 1_700_000_000_000 + rng.integers(0, 30 * 86_400_000, n)
+        q = rng.uniform(10, 2000, n)
+        sigma = rng.uniform(0.005, 0.03, n)
+        # Thinner liquidity (higher impact) during the Asian night
+        session = np.where(time_bucket(ts, 1) < 6, 1.5, 1.0)
+        impact = session * eta * q ** alpha * sigma * np.exp(rng.normal(0, 0.1, n))
+        for key, values in zip(columns, ([inst_id] * n, ts, q, sigma, impact)):
+            columns[key].extend(values)
+    return {key: np.asarray(values) for key, values in columns.items()}, truth
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate per-instrument market impact parameters")
+    parser.add_argument("--fills", help="CSV with [exchange,] instId, ts, quantity, volatility, impact")
+    parser.add_argument("--demo", action="store_true", help="calibrate on synthetic fills instead")
+    parser.add_argument("--bucket-hours", type=int, help="also fit time-of-day buckets of this width")
+    parser.add_argument("--min-fills", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default=impact_table_path())
+    args = parser.parse_args()
+    if not (args.fills or args.demo):
+        parser.error("--fills or --demo is required")
+
+    truth = None
+    if args.demo:
+        fills, truth = generate_synthetic_fills()
+    else:
+        fills = load_fills(args.fills)
+    start = time.perf_counter()
+    table = calibrate_table(fills, args.bucket_hours, args.min_fills, args.workers, load_table(args.output))
+    elapsed = time.perf_counter() - start
+    markets = [buckets for instruments in table["params"].values() for buckets in instruments.values()]
+    print(f"{sum(len(b) for b in markets)} fits over {len(markets)} instruments "
+          f"in {elapsed:.2f} s ({len(table['failed'])} failed) -> {write_table(table, args.output)}")
+    if truth:
+        for inst_id, (eta, alpha) in truth.items():
+            fit = table["params"][DEFAULT_EXCHANGE][inst_id][ALL_DAY]
+            print(f"{inst_id}: eta {eta:.2e} -> {fit['eta']:.2e}   alpha {alpha:.3f} -> {fit['alpha']:.3f}")
@@ -0,0 +1,287 @@
+"""
+Low-latency inference for the fitted cost models.
+
+The slippage RandomForest is exported into flat numpy node arrays and
+evaluated for single rows and small batches without sklearn's input
+validation and joblib dispatch; the maker/taker LogisticRegression becomes
+a plain dot product plus sigmoid. Neither class needs sklearn at predict
+time.
+
+CompiledForest.predict steps every (row, tree) pair in numpy, so its cost
+grows with rows x trees: it wins on single rows but is slower than
+sklearn's compiled walk from a few hundred rows up (about 3x at 10k rows),
+and estimate_slippage_batch hands such batches to the sklearn forest.
+
+Usage (from backend/):
+    python -m models.inference   # parity check against sklearn and latency benchmark
+"""
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Flat-array form of a fitted sklearn forest regressor.
+
+    All trees share one set of node arrays (feature, threshold, left, right,
+    value, missing_left); leaves point to themselves so every (row, tree)
+    pair can be stepped in lockstep for max_depth iterations. NaN features
+    follow each node's missing_left like sklearn's missing_go_to_left.
+
+    Parameters:
+    - forest: fitted sklearn RandomForestRegressor (or any forest of
+      single-output regression trees)
+    """
+
+    # Unset in artifacts compiled before NaN routing was exported: NaN goes
+    # right at every node there (rebuild with python -m models.build --force)
+    missing_left = None
+
+    def __init__(self, forest):
+        features, thresholds, lefts, rights, values, roots, missing = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            node_ids = np.arange(n, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(tree.value[:, 0, 0])
+            missing.append(getattr(tree, "missing_go_to_left", np.zeros(n, dtype=np.uint8)))
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        self.feature = np.concatenate(features).astype(np.int64)
+        self.threshold = np.concatenate(thresholds).astype(np.float64)
+        self.left = np.concatenate(lefts).astype(np.int64)
+        self.right = np.concatenate(rights).astype(np.int64)
+        self.value = np.concatenate(values).astype(np.float64)
+        self.missing_left = np.concatenate(missing).astype(bool)
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.max_depth = max_depth
+        self.n_features = forest.n_features_in_
+
+    def predict(self, X):
+        """
+        Mean prediction over all trees; matches the sklearn forest up to
+        float rounding of the mean.
+
+        Meant for single rows and small batches; see the module docstring.
+
+        Parameters:
+        - X: array of shape (n, n_features) or a single row of shape (n_features,)
+
+        Returns:
+        - np.array of shape (n,)
+        """
+        # sklearn compares float32 inputs against the stored thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64).reshape(-1, self.n_features)
+        n_rows, n_trees = len(X), len(self.roots)
+        flat_X = X.ravel()
+        # One entry per (row, tree) pair; only pairs not yet at a leaf are stepped
+        nodes = np.tile(self.roots, n_rows)
+        base = np.repeat(np.arange(n_rows, dtype=np.int64) * self.n_features, n_trees)
+        active = np.arange(len(nodes))
+        has_nan = self.missing_left is not None and np.isnan(flat_X).any()
+        for _ in range(self.max_depth):
+            current = nodes[active]
+            x = flat_X[base[active] + self.feature[current]]
+            go_left = x <= self.threshold[current]
+            if has_nan:
+                go_left |= np.isnan(x) & self.missing_left[current]
+            nxt = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = nxt
+            moving = nxt != current
+            if not moving.all():
+                active = active[moving]
+                if len(active) == 0:
+                    break
+        return self.value[nodes].reshape(n_rows, n_trees).mean(axis=1)
+
+    def predict_grid(self, row, feature_a, values_a, feature_b, values_b):
+        """
+        predict() for row with two features swept over a grid.
+
+        Instead of stepping every (cell, tree) pair, each tree is walked once
+        over rectangles of grid indices: a split on a swept feature cuts the
+        rectangle at the threshold, any other split follows the one branch
+        the fixed row takes. The leaf rectangles are then painted into a
+        (cell, tree) leaf map and averaged like predict().
+
+        Parameters:
+        - row: feature row holding the fixed features
+        - feature_a, feature_b: indices of the swept features
+        - values_a, values_b: non-decreasing grid axes for those features
+          (no NaN; the fixed features of row may be NaN)
+
+        Returns:
+        - np.array of shape (len(values_a), len(values_b))
+        """
+        row = np.asarray(row, dtype=np.float32).astype(np.float64).ravel()
+        a = np.asarray(values_a, dtype=np.float32).astype(np.float64)
+        b = np.asarray(values_b, dtype=np.float32).astype(np.float64)
+        na, nb, n_trees = len(a), len(b), len(self.roots)
+        # Plain views: indexing a memory-mapped array goes through np.memmap's Python hooks
+        left_of, right_of = np.asarray(self.left), np.asarray(self.right)
+        feature_of, threshold_of = np.asarray(self.feature), np.asarray(self.threshold)
+        missing_of = None if self.missing_left is None else np.asarray(self.missing_left)
+
+        # Frontier of (tree, node, a range, b range); ranges are [lo, hi)
+        tree = np.arange(n_trees, dtype=np.int64)
+        node = np.array(self.roots)
+        a_lo, a_hi = np.zeros(n_trees, dtype=np.int64), np.full(n_trees, na, dtype=np.int64)
+        b_lo, b_hi = np.zeros(n_trees, dtype=np.int64), np.full(n_trees, nb, dtype=np.int64)
+        leaves = []
+        while len(node):
+            at_leaf = left_of[node] == node
+            leaves.append((tree[at_leaf], node[at_leaf], a_lo[at_leaf], a_hi[at_leaf], b_lo[at_leaf], b_hi[at_leaf]))
+            keep = ~at_leaf
+            tree, node, a_lo, a_hi, b_lo, b_hi = tree[keep], node[keep], a_lo[keep], a_hi[keep], b_lo[keep], b_hi[keep]
+
+            feature, threshold = feature_of[node], threshold_of[node]
+            on_a, on_b = feature == feature_a, feature == feature_b
+            fixed = ~(on_a | on_b)
+            go_left = row[feature] <= threshold
+            if missing_of is not None:
+                go_left |= np.isnan(row[feature]) & missing_of[node]
+            # Grid cells with value <= threshold go left
+            cut_a = np.clip(np.searchsorted(a, threshold, side="right"), a_lo, a_hi)
+            cut_b = np.clip(np.searchsorted(b, threshold, side="right"), b_lo, b_hi)
+            left = ~fixed | go_left
+            right = ~fixed | ~go_left
+            tree = np.concatenate((tree[left], tree[right]))
+            node = np.concatenate((left_of[node][left], right_of[node][right]))
+            a_lo, a_hi = (
+                np.concatenate((a_lo[left], np.where(on_a, cut_a, a_lo)[right])),
+                np.concatenate((np.where(on_a, cut_a, a_hi)[left], a_hi[right])),
+            )
+            b_lo, b_hi = (
+                np.concatenate((b_lo[left], np.where(on_b, cut_b, b_lo)[right])),
+                np.concatenate((np.where(on_b, cut_b, b_hi)[left], b_hi[right])),
+            )
+            nonempty = (a_lo < a_hi) & (b_lo < b_hi)
+            tree, node, a_lo, a_hi, b_lo, b_hi = (
+                tree[nonempty], node[nonempty], a_lo[nonempty], a_hi[nonempty], b_lo[nonempty], b_hi[nonempty]
+            )
+
+        tree, node, a_lo, a_hi, b_lo, b_hi = (np.concatenate(column) for column in zip(*leaves))
+        # Split rectangles into one segment per grid row; per (row, tree) the
+        # segments tile the b axis, so ordering them by (row, tree, b_lo)
+        # and repeating each leaf over its width paints the leaf map
+        rows = a_hi - a_lo
+        rect = np.repeat(np.arange(len(node)), rows)
+        row_index = a_lo[rect] + np.arange(len(rect)) - np.repeat(np.cumsum(rows) - rows, rows)
+        order = np.lexsort((b_lo[rect], tree[rect], row_index))
+        rect = rect[order]
+        leaf = np.repeat(node[rect], (b_hi - b_lo)[rect]).reshape(na, n_trees, nb)
+        return np.asarray(self.value)[leaf.transpose(0, 2, 1)].reshape(-1, n_trees).mean(axis=1).reshape(na, nb)
+
+
+class CompiledLogistic:
+    """
+    Binary LogisticRegression as a dot product plus sigmoid.
+
+    Parameters:
+    - logreg: fitted binary sklearn LogisticRegression
+    """
+
+    def __init__(self, logreg):
+        self.coef = np.asarray(logreg.coef_[0], dtype=np.float64)
+        self.intercept = float(logreg.intercept_[0])
+
+    @classmethod
+    def from_params(cls, coef, intercept):
+        """Build from raw coefficients (e.g. an online learner's snapshot)."""
+        model = cls.__new__(cls)
+        model.coef = np.array(coef, dtype=np.float64)
+        model.intercept = float(intercept)
+        return model
+
+    def predict_positive(self, X):
+        """
+        Probability of the positive class (column 1 of predict_proba).
+
+        Parameters:
+        - X: array of shape (n, n_features) or a single row
+
+        Returns:
+        - np.array of shape (n,)
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.coef))
+        return 1.0 / (1.0 + np.exp(-(X @ self.coef + self.intercept)))
+
+
+class CompiledLinear:
+    """
+    Linear regression with optional |x| feature transforms and a floor.
+
+    Parameters:
+    - coef: weights, one per feature
+    - intercept: bias term
+    - abs_columns: feature indices used by absolute value
+    - lower: optional floor applied to predictions
+    """
+
+    def __init__(self, coef, intercept, abs_columns=(), lower=None):
+        self.coef = np.array(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.abs_columns = list(abs_columns)
+        self.lower = lower
+
+    def predict(self, X):
+        X = np.array(X, dtype=np.float64).reshape(-1, len(self.coef))
+        if self.abs_columns:
+            X[:, self.abs_columns] = np.abs(X[:, self.abs_columns])
+        y = X @ self.coef + self.intercept
+        if self.lower is not None:
+            y = np.maximum(y, self.lower)
+        return y
+
+
+def _benchmark(fn, arg, repeat=2000):
+    import time
+
+    fn(arg)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+if __name__ == "__main__":
+    from models import maker_taker, slippage
+
+    rng = np.random.default_rng(0)
+    n = 10000
+    X_slip = np.column_stack((
+        rng.uniform(0, 0.2, n), rng.uniform(-1, 1, n), rng.uniform(0, 1000, n), rng.uniform(0, 0.05, n)
+    ))
+    X_mt = X_slip[:, [0, 3]]
+
+    forest = slippage.get_model()
+    compiled_forest = slippage.get_compiled_model()
+    logreg = maker_taker.get_model()
+    compiled_logreg = maker_taker.get_compiled_model()
+
+    # Parity against sklearn
+    forest_err = np.max(np.abs(forest.predict(X_slip) - compiled_forest.predict(X_slip)))
+    logreg_err = np.max(np.abs(logreg.predict_proba(X_mt)[:, 1] - compiled_logreg.predict_positive(X_mt)))
+    print(f"forest max abs diff over {n} rows: {forest_err:.3e}")
+    print(f"logreg max abs diff over {n} rows: {logreg_err:.3e}")
+    assert forest_err < 1e-12 and logreg_err < 1e-12, "compiled models diverge from sklearn"
+
+    # Per-call latency
+    row_slip, row_mt = X_slip[:1], X_mt[:1]
+    print(f"forest single row: sklearn {_benchmark(forest.predict, row_slip, 200):.1f} us, "
+          f"compiled {_benchmark(compiled_forest.predict, row_slip):.1f} us")
+    for rows in (100, 1000, 10000):
+        print(f"forest {rows} rows: sklearn {_benchmark(forest.predict, X_slip[:rows], 5):.1f} us, "
+              f"compiled {_benchmark(compiled_forest.predict, X_slip[:rows], 5):.1f} us")
+    print(f"logreg single row: sklearn {_benchmark(logreg.predict_proba, row_mt):.1f} us, "
+          f"compiled {_benchmark(compiled_logreg.predict_positive, row_mt):.1f} us")
@@ -1,9 +1,17 @@
+from functools import partial
+
 import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
+
+from market.features import SPREAD
+from models.registry import live, load_or_build, promoted
+from utils.latency import timed
+
+# Everything that affects the trained model; part of the artifact key
+MODEL_CONFIG = {"n": 1200, "seed": 42, "test_size": 0.2, "random_state": 42}
 
 # Step 1: Feature extraction including volatility
-def extract_features(asks, bids, volatility):
+@timed("maker_taker_features")
+def extract_features(asks, bids, volatility, features=None):
     """
     Extract features: spread and volatility.
     
@@ -11,57 +19,118 @@ def extract_features(asks, bids, volatility):
     - asks: List of [price, quantity] for ask side
     - bids: List of [price, quantity] for bid side
     - volatility: Current market volatility (float)
+    - features: optional book feature vector (market.features) to read the spread from
     
     Returns:
     - List of features: [spread, volatility]
     """
-    if not asks or not bids:
+    if len(asks) == 0 or len(bids) == 0:
         return [0.0, volatility]
+    if features is not None:
+        return [float(features[SPREAD]), volatility]
     best_ask = float(asks[0][0])
     best_bid = float(bids[0][0])
     spread = best_ask - best_bid
     return [spread, volatility]
 
+def extract_features_batch(asks, bids, volatilities, features=None):
+    """
+    Build the feature matrix for many volatilities against the same order book.
+
+    Returns:
+    - np.array of shape (n, 2): [spread, volatility] rows
+    """
+    volatilities = np.asarray(volatilities, dtype=np.float64)
+    spread, _ = extract_features(asks, bids, 0.0, features)
+    return np.column_stack((np.full(len(volatilities), spread, dtype=np.float64), volatilities))
+
 # Step 2: Generate synthetic data with spread and volatility
-def generate_synthetic_maker_taker_data(n=1200):
+def synthetic_chunk(rng, n):
     """
-    Generate synthetic data with spread and volatility features.
-    
+    n synthetic maker/taker rows drawn from rng (a numpy Generator or RandomState).
+
     Returns:
     - X: Feature matrix with columns [spread, volatility]
     - y: Binary labels (1=maker, 0=taker)
     """
-    np.random.seed(42)
-    
     # Generate spreads uniformly between 0.002 and 0.12
-    spreads = np.random.uniform(0.002, 0.12, n)
+    spreads = rng.uniform(0.002, 0.12, n)
     
     # Generate volatilities uniformly between 0.005 and 0.03 (typical intraday vol range)
-    volatilities = np.random.uniform(0.005, 0.03, n)
+    volatilities = rng.uniform(0.005, 0.03, n)
     
     # Simulate logits with both spread and volatility influencing maker probability
     logits = -4 + 40 * spreads - 20 * volatilities  # Volatility negatively impacts maker probability here
     
     probs = 1 / (1 + np.exp(-logits))
     
-    labels = np.random.binomial(1, probs)
-    
-    print("Class distribution (0=taker, 1=maker):", np.bincount(labels))
+    labels = rng.binomial(1, probs)
     
     X = np.column_stack((spreads, volatilities))
-    y = labels
-    return X, y
+    return X, labels
+
+def generate_synthetic_maker_taker_data(n=1200, seed=42):
+    """
+    Generate synthetic data with spread and volatility features.
+
+    Drawn from a private RandomState(seed): the same rows as the former
+    global np.random.seed, without touching the global state.
+    
+    Returns:
+    - X: Feature matrix with columns [spread, volatility]
+    - y: Binary labels (1=maker, 0=taker)
+    """
+    return synthetic_chunk(np.random.RandomState(seed), n)
 
 # Step 3: Train logistic regression model
-X, y = generate_synthetic_maker_taker_data()
+def train_model(config=MODEL_CONFIG):
+    """
+    Train the maker/taker logistic regression on synthetic data.
+
+    sklearn is imported here so serving workers that load a prebuilt
+    artifact never pay for training.
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+
+    X, y = generate_synthetic_maker_taker_data(config["n"], config["seed"])
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=config["test_size"], random_state=config["random_state"]
+    )
+    logreg = LogisticRegression()
+    logreg.fit(X_train, y_train)
+    return logreg
+
+
+def serving_config():
+    """Config of the served artifacts: the latest models.training run promoted, else MODEL_CONFIG."""
+    return promoted("maker_taker", MODEL_CONFIG)
+
+
+def get_model(config=None):
+    """Trained maker/taker model for config (default: serving_config()), loaded on first use."""
+    config = config or serving_config()
+    return load_or_build("maker_taker", config, partial(train_model, config))
+
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+def compile_model(config=MODEL_CONFIG):
+    """Export the trained classifier to a dot product plus sigmoid."""
+    from models.inference import CompiledLogistic
 
-logreg = LogisticRegression()
-logreg.fit(X_train, y_train)
+    return CompiledLogistic(get_model(config))
+
+
+def get_compiled_model():
+    """Maker/taker model used on the serving path (an online update if one is published)."""
+    model = live("maker_taker")
+    if model is not None:
+        return model
+    config = serving_config()
+    return load_or_build("maker_taker_compiled", config, partial(compile_model, config))
 
 # Step 4: Prediction function including volatility input
-def estimate_maker_taker(asks, bids, volatility):
+@timed("maker_taker")
+def estimate_maker_taker(asks, bids, volatility, features=None):
     """
     Predict maker/taker probabilities using spread and volatility features.
     
@@ -69,11 +138,28 @@ def estimate_maker_taker(asks, bids, volatility):
     - asks: List of [price, quantity] for ask side
     - bids: List of [price, quantity] for bid side
     - volatility: Current market volatility (float)
+    - features: optional book feature vector (see extract_features)
     
     Returns:
     - Dictionary with keys 'maker' and 'taker' containing probabilities.
     """
-    features = extract_features(asks, bids, volatility)
-    prob_maker = logreg.predict_proba([features])[0][1]
+    row = extract_features(asks, bids, volatility, features)
+    prob_maker = float(get_compiled_model().predict_positive(row)[0])
     prob_taker = 1 - prob_maker
     return {"maker": prob_maker, "taker": prob_taker}
+
+
+@timed("maker_taker_batch")
+def estimate_maker_taker_batch(features):
+    """
+    Vectorized estimate_maker_taker: one model call for a whole feature matrix.
+
+    Parameters:
+    - features: np.array of shape (n, 2), e.g. from extract_features_batch
+
+    Returns:
+    - np.array: maker probability per row (taker is 1 - maker)
+    """
+    if len(features) == 0:
+        return np.empty(0)
+    return get_compiled_model().predict_positive(features)
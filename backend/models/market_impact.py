@@ -1,5 +1,10 @@
+import time
+
 import numpy as np
-from scipy.optimize import curve_fit
+
+from models.impact_calibration import ALL_DAY, load_table, table_params
+from models.registry import live, load_or_build, publish
+from utils.latency import timed
 
 # Almgren-Chriss market impact function with volatility
 def impact_func_with_volatility(q, sigma, eta, alpha):
@@ -30,17 +35,96 @@ def fit_func(q_sigma, eta, alpha):
     q, sigma = q_sigma
     return impact_func_with_volatility(q, sigma, eta, alpha)
 
-# Prepare combined independent variables for curve_fit
-independent_vars = np.vstack((quantities, volatilities))
+# Everything that affects the calibration; part of the artifact key
+CALIBRATION_CONFIG = {
+    "quantities": quantities.tolist(),
+    "volatilities": volatilities.tolist(),
+    "observed_impacts": observed_impacts.tolist(),
+    "initial_guess": initial_guess,
+}
+
+def calibrate(config=CALIBRATION_CONFIG):
+    """
+    Calibrate eta and alpha by fitting the model to historical data.
+
+    Returns:
+    - dict with keys 'eta' and 'alpha'
+    """
+    from scipy.optimize import curve_fit
+
+    # Prepare combined independent variables for curve_fit
+    independent_vars = np.vstack((config["quantities"], config["volatilities"]))
+    params, covariance = curve_fit(
+        fit_func, independent_vars, np.asarray(config["observed_impacts"]), p0=config["initial_guess"]
+    )
+    return {"eta": float(params[0]), "alpha": float(params[1])}
+
+def load_impact_table(path=None):
+    """
+    Load the per-instrument table written by models.impact_calibration
+    (default: impact_table_path()) and publish it to the serving path (an
+    empty table if there is none).
+
+    Returns:
+    - dict with "lookup" {((exchange, instId), bucket): (eta, alpha)} and "bucket_hours"
+    """
+    table = load_table(path) or {}
+    lookup = {
+        ((exchange, inst_id), bucket): (fit["eta"], fit["alpha"])
+        for exchange, instruments in table_params(table).items()
+        for inst_id, buckets in instruments.items()
+        for bucket, fit in buckets.items()
+    }
+    impact_table = {"lookup": lookup, "bucket_hours": table.get("bucket_hours")}
+    publish("impact_table", impact_table)
+    return impact_table
+
+def get_impact_table():
+    table = live("impact_table")
+    if table is None:
+        table = load_impact_table()
+    return table
 
-# Calibrate eta and alpha by fitting the model to historical data
-params, covariance = curve_fit(fit_func, independent_vars, observed_impacts, p0=initial_guess)
-eta_calibrated, alpha_calibrated = params
+def get_impact_params(market=None, ts_ms=None):
+    """
+    Calibrated (eta, alpha) for a market.
 
-print(f"Calibrated eta (scale factor): {eta_calibrated:.8f}")
-print(f"Calibrated alpha (exponent): {alpha_calibrated:.4f}")
+    Resolution order: the market's online re-fit if one is published (it
+    is fitted on the market's live fills, so it supersedes its offline
+    calibrations until retracted), then the market's time-of-day bucket,
+    its all-day fit, the pooled re-fit of unkeyed observations, and finally
+    the registry artifact. Every step is a dict lookup.
 
-def estimate_market_impact(asks, bids, quantity=100, volatility=0.015):
+    Parameters:
+    - market: (exchange, instId) key, or None for the global parameters
+    - ts_ms: timestamp selecting the time-of-day bucket (default: now)
+    """
+    refits = live("market_impact") or {}
+    if market is not None:
+        market = tuple(market)
+        params = refits.get(market)
+        if params is not None:
+            return params["eta"], params["alpha"]
+        table = get_impact_table()
+        lookup = table["lookup"]
+        if lookup:
+            bucket_hours = table["bucket_hours"]
+            if bucket_hours:
+                ts_ms = time.time() * 1000 if ts_ms is None else ts_ms
+                params = lookup.get((market, str(int(ts_ms // 3_600_000 % 24) // bucket_hours)))
+                if params is not None:
+                    return params
+            params = lookup.get((market, ALL_DAY))
+            if params is not None:
+                return params
+    params = refits.get(None)
+    if params is not None:
+        return params["eta"], params["alpha"]
+    params = load_or_build("market_impact", CALIBRATION_CONFIG, calibrate, mmap=False)
+    return params["eta"], params["alpha"]
+
+@timed("market_impact")
+def estimate_market_impact(asks, bids, quantity=100, volatility=0.015, market=None):
     """
     Estimate market impact cost for a given order quantity and volatility.
     
@@ -49,17 +133,46 @@ def estimate_market_impact(asks, bids, quantity=100, volatility=0.015):
     - bids (list): Order book bids (not used in this simplified model).
     - quantity (float): Order quantity.
     - volatility (float): Market volatility (input from server).
+    - market (tuple): (exchange, instId) whose calibrated parameters to use (global if None).
     
     Returns:
     - float: Estimated market impact cost rounded to 6 decimals.
     """
+    eta_calibrated, alpha_calibrated = get_impact_params(market)
     impact = eta_calibrated * (quantity ** alpha_calibrated) * volatility
     return round(impact, 6)
 
-# Example usage with volatility input from server
-asks_example = [[95445.5, 9.06]]
-bids_example = [[95445.4, 1104.23]]
-server_volatility = 0.018  # Example volatility received from server
+@timed("market_impact_batch")
+def estimate_market_impact_batch(quantities, volatilities, markets=None):
+    """
+    Vectorized estimate_market_impact over arrays of quantities and volatilities.
+
+    Parameters:
+    - markets: optional (exchange, instId) key per row (or one key for
+      every row); parameters are resolved once per market
+
+    Returns:
+    - np.array: estimated market impact per row rounded to 6 decimals
+    """
+    quantities = np.asarray(quantities, dtype=np.float64)
+    volatilities = np.asarray(volatilities, dtype=np.float64)
+    if markets is None or isinstance(markets, tuple):
+        eta_calibrated, alpha_calibrated = get_impact_params(markets)
+    else:
+        params = {}
+        resolved = [params.get(m) or params.setdefault(m, get_impact_params(m)) for m in map(tuple, markets)]
+        eta_calibrated, alpha_calibrated = np.array(resolved, dtype=np.float64).reshape(-1, 2).T
+    return np.round(eta_calibrated * (quantities ** alpha_calibrated) * volatilities, 6)
+
+if __name__ == "__main__":
+    eta_calibrated, alpha_calibrated = get_impact_params()
+    print(f"Calibrated eta (scale factor): {eta_calibrated:.8f}")
+    print(f"Calibrated alpha (exponent): {alpha_calibrated:.4f}")
+
+    # Example usage with volatility input from server
+    asks_example = [[95445.5, 9.06]]
+    bids_example = [[95445.4, 1104.23]]
+    server_volatility = 0.018  # Example volatility received from server
 
-predicted_impact = estimate_market_impact(asks_example, bids_example, quantity=500, volatility=server_volatility)
-print(f"Predicted market impact for quantity 500 with volatility {server_volatility}: {predicted_impact}")
+    predicted_impact = estimate_market_impact(asks_example, bids_example, quantity=500, volatility=server_volatility)
+    print(f"Predicted market impact for quantity 500 with volatility {server_volatility}: {predicted_impact}")
@@ -0,0 +1,299 @@
+"""
+Online recalibration of the cost models.
+
+Realized observations update three incremental estimators:
+- slippage: recursive least squares with exponential forgetting over
+  [spread, |depth_imbalance|, quantity, volatility]
+- maker/taker: logistic regression updated by partial_fit-style Newton
+  steps, warm-started from the trained classifier
+- market impact: Almgren-Chriss eta/alpha re-fitted on a rolling window
+  per (exchange, instId), as a least-squares line in log space:
+  log(impact / sigma) = log(eta) + alpha * log(q)
+
+Every publish_every observations a frozen snapshot is published through
+models.registry.publish, which swaps it into the serving path atomically.
+Requests never wait on a fit and workers are never reloaded.
+"""
+import threading
+from collections import deque
+
+import numpy as np
+
+from models import registry
+from models.inference import CompiledLinear, CompiledLogistic
+
+
+class RecursiveLeastSquares:
+    """
+    Exponentially weighted recursive least squares with an intercept.
+
+    Parameters:
+    - n_features: number of input features
+    - forgetting: weight decay per observation (1.0 = never forget)
+    - delta: initial covariance scale (large = weak prior)
+    """
+
+    def __init__(self, n_features, forgetting=0.999, delta=1e3):
+        self.forgetting = forgetting
+        self.theta = np.zeros(n_features + 1)
+        self.P = np.eye(n_features + 1) * delta
+        self.n = 0
+
+    def update(self, x, y):
+        x = np.append(np.asarray(x, dtype=np.float64), 1.0)
+        Px = self.P @ x
+        gain = Px / (self.forgetting + x @ Px)
+        self.theta += gain * (y - x @ self.theta)
+        self.P = (self.P - np.outer(gain, Px)) / self.forgetting
+        self.n += 1
+
+    def update_batch(self, X, y):
+        for row, target in zip(np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)):
+            self.update(row, target)
+
+    @property
+    def coef(self):
+        return self.theta[:-1].copy()
+
+    @property
+    def intercept(self):
+        return float(self.theta[-1])
+
+
+class OnlineLogistic:
+    """
+    Binary logistic regression updated one mini-batch at a time.
+
+    Each partial_fit takes a Newton step using a running, exponentially
+    forgotten Hessian, so it converges in a few batches even when the
+    features are badly scaled (spreads and volatilities are ~1e-2).
+
+    Parameters:
+    - coef, intercept: starting weights (e.g. from the offline model)
+    - forgetting: per-observation decay of the accumulated Hessian
+    - prior: precision of the starting weights (larger = stiffer)
+    """
+
+    def __init__(self, coef, intercept=0.0, forgetting=0.999, prior=1.0):
+        self.theta = np.append(np.asarray(coef, dtype=np.float64), float(intercept))
+        self.H = np.eye(len(self.theta)) * prior
+        self.forgetting = forgetting
+        self.n = 0
+
+    def partial_fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.theta) - 1)
+        X = np.column_stack((X, np.ones(len(X))))
+        y = np.asarray(y, dtype=np.float64)
+        p = 1.0 / (1.0 + np.exp(-(X @ self.theta)))
+        self.H = self.H * self.forgetting ** len(y) + (X * (p * (1 - p))[:, None]).T @ X
+        self.theta -= np.linalg.solve(self.H, X.T @ (p - y))
+        self.n += len(y)
+
+    @property
+    def coef(self):
+        return self.theta[:-1].copy()
+
+    @property
+    def intercept(self):
+        return float(self.theta[-1])
+
+
+class RollingImpactFit:
+    """
+    Almgren-Chriss eta/alpha re-fitted over the last `window` observations.
+
+    Parameters:
+    - window: observations kept
+    - alpha_bounds: fits with alpha outside these bounds are rejected
+    """
+
+    def __init__(self, window=2000, alpha_bounds=(0.05, 2.0)):
+        self.observations = deque(maxlen=window)
+        self.alpha_bounds = alpha_bounds
+        self.n = 0
+
+    def update_batch(self, quantities, volatilities, impacts):
+        for q, sigma, impact in zip(quantities, volatilities, impacts):
+            # Log-space fit only sees strictly positive observations
+            if q > 0 and sigma > 0 and impact > 0:
+                self.observations.append((q, sigma, impact))
+                self.n += 1
+
+    def fit(self):
+        """
+        Returns:
+        - {"eta", "alpha"} or None if the window is degenerate
+        """
+        if len(self.observations) < 3:
+            return None
+        q, sigma, impact = np.asarray(self.observations, dtype=np.float64).T
+        log_q = np.log(q)
+        if np.ptp(log_q) == 0:
+            return None
+        A = np.column_stack((np.ones_like(log_q), log_q))
+        (log_eta, alpha), *_ = np.linalg.lstsq(A, np.log(impact / sigma), rcond=None)
+        if not (np.isfinite(log_eta) and self.alpha_bounds[0] <= alpha <= self.alpha_bounds[1]):
+            return None
+        return {"eta": float(np.exp(log_eta)), "alpha": float(alpha)}
+
+
+class OnlineLearner:
+    """
+    Owns the online estimators and publishes their snapshots.
+
+    Parameters:
+    - min_samples: observations a model needs before its first publish
+    - publish_every: observations between publishes
+    - forgetting: RLS forgetting factor for slippage
+    - impact_window: rolling window for each market's eta/alpha re-fit
+    """
+
+    def __init__(self, min_samples=200, publish_every=50, forgetting=0.999, impact_window=2000):
+        self.min_samples = min_samples
+        self.publish_every = publish_every
+        self.slippage = RecursiveLeastSquares(4, forgetting=forgetting)
+        self.maker_taker = None  # warm-started from the offline model on first use
+        self.impact_window = impact_window
+        self.impact = {}  # (exchange, instId), or None for unkeyed observations -> RollingImpactFit
+        self.published = {}  # name -> publish count
+        self._since_publish = {"slippage": 0, "maker_taker": 0, "market_impact": 0}
+        self._lock = threading.Lock()
+
+    def observe_slippage(self, features, realized):
+        """
+        Parameters:
+        - features: (n, 4) rows as built by slippage.extract_features_batch
+        - realized: (n,) realized slippage
+        """
+        features = np.array(features, dtype=np.float64).reshape(-1, 4)
+        features[:, 1] = np.abs(features[:, 1])
+        with self._lock:
+            self.slippage.update_batch(features, realized)
+            self._after_update("slippage", len(features), self.slippage.n)
+
+    def observe_maker_taker(self, features, maker_filled):
+        """
+        Parameters:
+        - features: (n, 2) rows as built by maker_taker.extract_features_batch
+        - maker_filled: (n,) 1 if the order filled passively, else 0
+        """
+        with self._lock:
+            if self.maker_taker is None:
+                from models.maker_taker import get_compiled_model
+
+                base = get_compiled_model()
+                self.maker_taker = OnlineLogistic(base.coef, base.intercept)
+            self.maker_taker.partial_fit(features, maker_filled)
+            self._after_update("maker_taker", len(maker_filled), self.maker_taker.n)
+
+    def observe_impact(self, quantities, volatilities, impacts, markets=None):
+        """
+        Parameters:
+        - quantities, volatilities, impacts: (n,) realized impact observations
+        - markets: (exchange, instId) per observation; each market is fitted
+          on its own window (None: one pooled fit, used where a market has none)
+        """
+        markets = [None] * len(impacts) if markets is None else [tuple(m) for m in markets]
+        rows = {}
+        for market, row in zip(markets, zip(quantities, volatilities, impacts)):
+            rows.setdefault(market, []).append(row)
+        with self._lock:
+            added = 0
+            for market, market_rows in rows.items():
+                fit = self.impact.setdefault(market, RollingImpactFit(window=self.impact_window))
+                before = fit.n
+                fit.update_batch(*zip(*market_rows))
+                added += fit.n - before
+            total = max((fit.n for fit in self.impact.values()), default=0)
+            self._after_update("market_impact", added, total)
+
+    def _after_update(self, name, count, total):
+        self._since_publish[name] += count
+        if total >= self.min_samples and self._since_publish[name] >= self.publish_every:
+            self._publish(name)
+
+    def _publish(self, name):
+        if name == "slippage":
+            snapshot = CompiledLinear(
+                self.slippage.coef, self.slippage.intercept, abs_columns=(1,), lower=0.0
+            )
+        elif name == "maker_taker":
+            snapshot = CompiledLogistic.from_params(self.maker_taker.coef, self.maker_taker.intercept)
+        else:
+            # {market: {"eta", "alpha"}} for every market with enough observations
+            snapshot = {}
+            for market, fit in self.impact.items():
+                params = fit.fit() if fit.n >= self.min_samples else None
+                if params is not None:
+                    snapshot[market] = params
+            if not snapshot:
+                return
+        registry.publish(name, snapshot)
+        self.published[name] = self.published.get(name, 0) + 1
+        self._since_publish[name] = 0
+
+    def reset(self):
+        """Forget everything learned and fall back to the offline models."""
+        with self._lock:
+            self.slippage = RecursiveLeastSquares(4, forgetting=self.slippage.forgetting)
+            self.maker_taker = None
+            self.impact = {}
+            self.published = {}
+            self._since_publish = dict.fromkeys(self._since_publish, 0)
+        for name in ("slippage", "maker_taker", "market_impact"):
+            registry.retract(name)
+
+    def status(self):
+        """Per-model sample counts, publish counts and current parameters."""
+        impact_params = registry.live("market_impact") or {}
+        return {
+            "slippage": {
+                "samples": self.slippage.n,
+                "published": self.published.get("slippage", 0),
+                "coef": self.slippage.coef.tolist(),
+                "intercept": self.slippage.intercept,
+            },
+            "maker_taker": {
+                "samples": self.maker_taker.n if self.maker_taker is not None else 0,
+                "published": self.published.get("maker_taker", 0),
+            },
+            "market_impact": {
+                "samples": sum(fit.n for fit in self.impact.values()),
+                "published": self.published.get("market_impact", 0),
+                "markets": [
+                    {
+                        "exchange": market[0] if market else None,
+                        "instId": market[1] if market else None,
+                        "samples": fit.n,
+                        "params": impact_params.get(market),
+                    }
+                    for market, fit in self.impact.items()
+                ],
+            },
+        }
+
+
+if __name__ == "__main__":
+    # Recover the synthetic generating processes from streamed observations
+    from models.maker_taker import generate_synthetic_maker_taker_data
+    from models.market_impact import get_impact_params
+    from models.slippage import generate_synthetic_data
+
+    learner = OnlineLearner(min_samples=100, publish_every=100)
+    X, y = generate_synthetic_data(5000, seed=7)
+    for i in range(0, len(X), 100):
+        learner.observe_slippage(X[i:i + 100], y[i:i + 100])
+    print("slippage coef", np.round(learner.slippage.coef, 4), "intercept", round(learner.slippage.intercept, 4))
+
+    X, y = generate_synthetic_maker_taker_data(5000, seed=7)
+    for i in range(0, len(X), 100):
+        learner.observe_maker_taker(X[i:i + 100], y[i:i + 100])
+    print("maker_taker coef", np.round(learner.maker_taker.coef, 3), "intercept", round(learner.maker_taker.intercept, 3))
+
+    rng = np.random.default_rng(7)
+    q = rng.uniform(10, 1000, 1000)
+    sigma = rng.uniform(0.005, 0.03, 1000)
+    impact = 2e-4 * q ** 0.7 * sigma * np.exp(rng.normal(0, 0.05, 1000))
+    learner.observe_impact(q, sigma, impact, [("OKX", "BTC-USDT-SWAP")] * len(q))
+    print("serving impact params (eta, alpha)", get_impact_params(("OKX", "BTC-USDT-SWAP")))
+    print(learner.status()["market_impact"])
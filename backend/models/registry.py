@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+from importlib import metadata
+
+# Where trained model artifacts live; shared by every worker on the host
+ARTIFACT_DIR = os.getenv(
+    "MODEL_ARTIFACT_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "artifacts")
+)
+
+# Libraries whose versions are part of the artifact key (pickles are not portable across them)
+KEY_LIBRARIES = ("numpy", "scipy", "scikit-learn")
+
+_lock = threading.Lock()  # guards _key_locks
+_key_locks = {}  # (name, key) -> lock held while that artifact is loaded or built
+_loaded = {}
+# Models published at runtime (e.g. by online recalibration); they take
+# precedence over the built artifact until retracted
+_live = {}
+_generation = 0  # bumped on every publish/retract
+_installed = None  # snapshot token last installed from a parent process
+_promoted = {}  # name -> config resolved by promoted(), read once per process
+
+
+@lru_cache(maxsize=None)
+def _library_versions():
+    versions = {}
+    for name in KEY_LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def library_versions():
+    # Package metadata lookups cost milliseconds; versions cannot change in-process
+    return dict(_library_versions())
+
+
+def artifact_key(name, config):
+    """
+    Hash of the training config plus library versions.
+
+    Parameters:
+    - name: model name, e.g. "slippage"
+    - config: JSON-serializable dict of everything that affects training
+
+    Returns:
+    - str: short hex digest
+    """
+    payload = json.dumps(
+        {"name": name, "config": config, "libraries": library_versions()}, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def artifact_path(name, config):
+    return os.path.join(ARTIFACT_DIR, f"{name}-{artifact_key(name, config)}.joblib")
+
+
+def save(name, config, obj):
+    """Write an artifact atomically and return its path."""
+    import joblib
+
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    path = artifact_path(name, config)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    # Uncompressed so numpy arrays inside can be memory-mapped on load
+    joblib.dump(obj, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def load_or_build(name, config, build, mmap=True):
+    """
+    Return the model for (name, config), loading it on first use.
+
+    Looks for an artifact keyed by the config hash; if there is none the
+    model is built with build() and written so the next worker can load it.
+
+    Parameters:
+    - name: model name
+    - config: training config dict (see artifact_key)
+    - build: zero-argument callable returning the trained object
+    - mmap: memory-map numpy arrays in the artifact instead of reading them
+
+    Returns:
+    - the trained object
+    """
+    key = (name, artifact_key(name, config))
+    obj = _loaded.get(key)
+    if obj is not None:
+        return obj
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    # Per-artifact lock: build() may load other artifacts (a compiled model
+    # loads its fitted model), which must not wait on this one
+    with key_lock:
+        obj = _loaded.get(key)
+        if obj is not None:
+            return obj
+        path = artifact_path(name, config)
+        if os.path.exists(path):
+            import joblib
+
+            obj = joblib.load(path, mmap_mode="r" if mmap else None)
+        else:
+            obj = build()
+            save(name, config, obj)
+        _loaded[key] = obj
+        return obj
+
+
+def _promotion_path(name):
+    return os.path.join(ARTIFACT_DIR, f"{name}.promoted.json")
+
+
+def promote(name, config, artifacts):
+    """
+    Make the artifacts built for config the ones served for name.
+
+    Takes effect in processes that have not resolved name yet (new workers);
+    running workers keep the artifacts they loaded.
+
+    Parameters:
+    - name: model family, e.g. "slippage"
+    - config: training config the artifacts were saved under
+    - artifacts: artifact names that must exist for config, e.g.
+      ("slippage", "slippage_compiled")
+    """
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    path = _promotion_path(name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"config": config, "artifacts": list(artifacts)}, f, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def promoted(name, default):
+    """
+    The promoted config for name, or default if none was promoted or any of
+    its artifacts is missing (e.g. built with other library versions).
+    """
+    config = _promoted.get(name)
+    if config is not None:
+        return config
+    config = default
+    try:
+        with open(_promotion_path(name)) as f:
+            promotion = json.load(f)
+    except (OSError, ValueError):
+        promotion = None
+    if promotion is not None and all(
+        os.path.exists(artifact_path(artifact, promotion["config"])) for artifact in promotion["artifacts"]
+    ):
+        config = promotion["config"]
+    _promoted[name] = config
+    return config
+
+
+def publish(name, obj):
+    """
+    Hot-swap the serving model for name.
+
+    A single dict store, so concurrent readers see either the previous or
+    the new object, never a partially updated one. Published objects must
+    not be mutated afterwards.
+    """
+    global _generation
+    _live[name] = obj
+    _generation += 1
+
+
+def retract(name):
+    """Drop a published model; serving falls back to the built artifact."""
+    global _generation
+    if _live.pop(name, None) is not None:
+        _generation += 1
+
+
+def generation():
+    """Counter that moves whenever the serving models change (e.g. for cache keys)."""
+    return _generation
+
+
+def live(name):
+    """The published model for name, or None."""
+    return _live.get(name)
+
+
+def snapshot():
+    """Published models plus a token naming this process's generation, for worker processes."""
+    return (os.getpid(), _generation), dict(_live)
+
+
+def install(snapshot):
+    """
+    Serve the published models of a snapshot() taken in another process
+    (worker processes only). A no-op when that generation is already installed.
+    """
+    global _installed
+    token, published = snapshot
+    if token == _installed:
+        return
+    _live.clear()
+    _live.update(published)
+    _installed = token
@@ -0,0 +1,288 @@
+"""
+Monte Carlo execution-cost simulator.
+
+A parent order of `quantity` USD is split into child orders by a schedule
+(equal slices by default, or explicit sizes, e.g. from /schedule) sent at
+the start of each of `time_steps` intervals over `horizon` seconds. Every
+path draws
+- the mid price: geometric Brownian motion with the given volatility
+  (per vol_horizon seconds), shifted by the permanent part of the impact
+  of earlier child orders;
+- the liquidity: a log-AR(1) multiplier on every level size of the
+  current book, starting at 1 and reverting with liquidity_half_life.
+Each child order walks the current book scaled by that path's liquidity
+(the book is assumed to refill between slices) and pays the calibrated
+Almgren-Chriss impact eta * (x / L)^alpha * volatility of models.market_impact.
+Cost is the implementation shortfall against the arrival mid, in USD,
+plus taker fees.
+
+Paths are simulated in fixed-size chunks, each from its own child of one
+SeedSequence, so results for a seed do not depend on how the chunks are
+spread over workers. Memory is bounded by chunk_paths x time_steps.
+
+Usage (from backend/):
+    python -m models.simulation --quantity 1000000 --paths 100000 --workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models.depth_walk import DepthWalk
+from models.fees import estimate_fees
+from models.market_impact import get_impact_params
+
+DEFAULT_CONFIG = {
+    "time_steps": 10,
+    "horizon": 600.0,               # seconds over which the parent order is worked
+    "vol_horizon": 86400.0,         # seconds the volatility input refers to
+    "liquidity_volatility": 0.25,   # stationary std of log book liquidity
+    "liquidity_half_life": 60.0,    # seconds for a liquidity shock to halve
+    "permanent_fraction": 0.5,      # share of each child's impact that stays in the price
+    "chunk_paths": 4096,            # paths simulated per vectorized chunk
+}
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+CONFIDENCE = (0.95, 0.99)
+
+
+def child_orders(quantity, time_steps, schedule=None):
+    """
+    Child order sizes (USD) summing to quantity.
+
+    Parameters:
+    - schedule: optional relative sizes per interval (e.g. /schedule trades);
+      equal slices if None
+
+    Returns:
+    - (time_steps,) float array
+    """
+    if schedule is None:
+        return np.full(time_steps, quantity / time_steps)
+    weights = np.asarray(schedule, dtype=np.float64)
+    if weights.ndim != 1 or len(weights) == 0 or np.any(weights < 0) or weights.sum() <= 0:
+        raise ValueError("schedule must be non-negative sizes with a positive total")
+    return quantity * weights / weights.sum()
+
+
+def simulation_plan(asks, bids, quantity, volatility, side="buy", schedule=None, market=None,
+                    fee_tier=1, config=None):
+    """
+    Everything a chunk needs, resolved once (and picklable for worker processes).
+
+    Parameters:
+    - asks, bids: [price, qty] levels of the current book, best first
+    - quantity: parent order notional in USD
+    - volatility: volatility per config["vol_horizon"] seconds
+    - side: "buy" or "sell"
+    - schedule: optional relative child sizes (its length sets time_steps)
+    - market: (exchange, instId) market key for the calibrated impact parameters
+    - fee_tier: taker fee tier (models.fees)
+    - config: overrides for DEFAULT_CONFIG
+
+    Returns:
+    - dict plan for simulate_chunk / simulate_costs
+    """
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    if side not in ("buy", "sell"):
+        raise ValueError("side must be 'buy' or 'sell'")
+    if quantity <= 0:
+        raise ValueError("quantity must be positive")
+    # Copies: the plan outlives the (possibly live) levels it was built from
+    asks = np.array(asks, dtype=np.float64).reshape(-1, 2)
+    bids = np.array(bids, dtype=np.float64).reshape(-1, 2)
+    if len(asks) == 0 or len(bids) == 0:
+        raise ValueError("order book is empty")
+    time_steps = len(schedule) if schedule is not None else config["time_steps"]
+    children = child_orders(quantity, time_steps, schedule)
+    dt = config["horizon"] / time_steps
+    eta, alpha = get_impact_params(market)
+    return {
+        "asks": asks,
+        "bids": bids,
+        "side": side,
+        "quantity": float(quantity),
+        "children": children,
+        "mid": (asks[0, 0] + bids[0, 0]) / 2,
+        "volatility": float(volatility),
+        "step_volatility": float(volatility) * np.sqrt(dt / config["vol_horizon"]),
+        "liquidity_rho": 0.5 ** (dt / config["liquidity_half_life"]),
+        "liquidity_volatility": config["liquidity_volatility"],
+        "permanent_fraction": config["permanent_fraction"],
+        "eta": float(eta),
+        "alpha": float(alpha),
+        "fees": estimate_fees(asks, bids, quantity_usd=quantity, fee_tier=fee_tier, volatility=volatility),
+        "config": config,
+    }
+
+
+def chunk_seeds(seed, paths, chunk_paths):
+    """[(SeedSequence, n_paths), ...] covering paths, independent of the worker count."""
+    sizes = [chunk_paths] * (paths // chunk_paths)
+    if paths % chunk_paths:
+        sizes.append(paths % chunk_paths)
+    return list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+
+def simulate_chunk(plan, seed_sequence, n_paths):
+    """
+    Simulate n_paths paths of the plan.
+
+    Returns:
+    - dict of (n_paths,) arrays in USD: timing (mid move since arrival,
+      including permanent impact), book (walk against the scaled book
+      versus the mid), impact, total (including fees); and the bool array
+      exceeded, True where a child order was larger than the visible book
+    """
+    rng = np.random.default_rng(seed_sequence)
+    children = plan["children"]
+    steps = len(children)
+    sign = 1.0 if plan["side"] == "buy" else -1.0
+
+    # Liquidity multiplier: log-AR(1) from 1 (the book as it is now)
+    rho, liq_vol = plan["liquidity_rho"], plan["liquidity_volatility"]
+    shocks = rng.standard_normal((n_paths, steps))
+    log_liquidity = np.empty((n_paths, steps))
+    log_liquidity[:, 0] = 0.0
+    innovation = liq_vol * np.sqrt(1 - rho ** 2)
+    for k in range(1, steps):
+        log_liquidity[:, k] = rho * log_liquidity[:, k - 1] + innovation * shocks[:, k]
+    liquidity = np.exp(log_liquidity)
+
+    # Mid relative to arrival at the start of each interval (the first child trades at arrival)
+    sigma = plan["step_volatility"]
+    returns = rng.standard_normal((n_paths, steps)) * sigma - 0.5 * sigma ** 2
+    returns[:, 0] = 0.0
+    drift = np.exp(np.cumsum(returns, axis=1)) - 1
+
+    # Scaling every size by L prices x like x / L on the unscaled book
+    scaled = children[None, :] / liquidity
+    walk = DepthWalk(plan["asks"], plan["bids"]).walk(scaled, side=plan["side"], notional=True)
+    levels = plan["asks"] if plan["side"] == "buy" else plan["bids"]
+    best, mid = levels[0, 0], plan["mid"]
+    # Anything beyond the visible book fills at its last price
+    worst = sign * (levels[-1, 0] - best) / best
+    # Zero-sized children (e.g. the tail of a dp schedule) trade nothing: no fill ratio, no impact
+    filled = np.divide(walk["notional"], scaled, out=np.ones_like(scaled), where=scaled > 0)
+    premium = filled * walk["slippage"] + (1 - filled) * worst
+    book_fraction = sign * (best * (1 + sign * premium) / mid - 1)
+
+    impact = plan["eta"] * scaled ** plan["alpha"] * plan["volatility"]
+    # The permanent part of earlier children's impact moves the mid for later ones
+    permanent = plan["permanent_fraction"] * np.divide(impact, children, out=np.zeros_like(impact), where=children > 0)
+    drift = drift + sign * (np.cumsum(permanent, axis=1) - permanent)
+
+    timing = (sign * drift * children).sum(axis=1)
+    book = (book_fraction * children).sum(axis=1)
+    impact = impact.sum(axis=1)
+    return {
+        "timing": timing,
+        "book": book,
+        "impact": impact,
+        "total": timing + book + impact + plan["fees"],
+        "exceeded": ~walk["complete"].all(axis=1),
+    }
+
+
+def simulate_chunks(plan, chunks):
+    """
+    simulate_chunk over several chunks in turn, e.g. one worker's share of a run.
+
+    Parameters:
+    - chunks: [(SeedSequence, n_paths), ...] from chunk_seeds
+
+    Returns:
+    - list of simulate_chunk results, in chunk order
+    """
+    return [simulate_chunk(plan, seed_sequence, n_paths) for seed_sequence, n_paths in chunks]
+
+
+def _chunk_task(args):
+    plan, seed_sequence, n_paths = args
+    return simulate_chunk(plan, seed_sequence, n_paths)
+
+
+def summarize_costs(plan, chunks):
+    """
+    Distribution of the parent order's cost over every simulated path.
+
+    Parameters:
+    - chunks: simulate_chunk results, in chunk order
+
+    Returns:
+    - dict with mean, std, quantiles, VaR/CVaR at CONFIDENCE (cost is a
+      loss, so VaR is the upper quantile and CVaR the mean beyond it), the
+      mean of each component, all in USD, plus costBps quantiles against
+      the parent notional
+    """
+    total = np.concatenate([c["total"] for c in chunks])
+    notional = plan["quantity"]
+    quantiles = np.quantile(total, QUANTILES)
+    summary = {
+        "paths": int(len(total)),
+        "mean": float(total.mean()),
+        "std": float(total.std()),
+        "quantiles": {f"q{round(q * 100):02d}": float(v) for q, v in zip(QUANTILES, quantiles)},
+        "costBps": {f"q{round(q * 100):02d}": float(v / notional * 1e4) for q, v in zip(QUANTILES, quantiles)},
+        "components": {
+            name: float(np.concatenate([c[name] for c in chunks]).mean())
+            for name in ("timing", "book", "impact")
+        },
+        "fees": plan["fees"],
+        "exceededDepth": float(np.concatenate([c["exceeded"] for c in chunks]).mean()),
+    }
+    for level in CONFIDENCE:
+        var = float(np.quantile(total, level))
+        tail = total[total >= var]
+        summary[f"var{round(level * 100)}"] = var
+        summary[f"cvar{round(level * 100)}"] = float(tail.mean()) if len(tail) else var
+    return summary
+
+
+def simulate_costs(plan, paths=10000, seed=0, workers=1, executor=None):
+    """
+    Simulate paths paths of the plan, spread over a process pool.
+
+    Parameters:
+    - plan: from simulation_plan
+    - paths: number of paths
+    - seed: SeedSequence entropy; a seed gives the same result for any workers
+    - workers: processes (1 runs the chunks in this process)
+    - executor: existing pool to use instead of starting one
+
+    Returns:
+    - summarize_costs dict
+    """
+    tasks = [(plan, s, n) for s, n in chunk_seeds(seed, paths, plan["config"]["chunk_paths"])]
+    if executor is not None:
+        chunks = list(executor.map(_chunk_task, tasks))
+    elif workers <= 1:
+        chunks = [_chunk_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_chunk_task, tasks))
+    return summarize_costs(plan, chunks)
+
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description="Monte Carlo execution cost of a parent order")
+    parser.add_argument("--quantity", type=float, default=1_000_000, help="parent order notional (USD)")
+    parser.add_argument("--volatility", type=float, default=0.02)
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--steps", type=int, default=DEFAULT_CONFIG["time_steps"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    from benchmarks.micro import synthetic_book
+
+    asks, bids = synthetic_book(400)
+    plan = simulation_plan(asks, bids, args.quantity, args.volatility, config={"time_steps": args.steps})
+    start = time.perf_counter()
+    result = simulate_costs(plan, args.paths, args.seed, args.workers)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    print(json.dumps(result, indent=1))
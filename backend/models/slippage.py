@@ -1,9 +1,21 @@
+from functools import partial
+
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
+
+from market.features import IMBALANCE, SPREAD
+from models.registry import live, load_or_build, promoted
+from utils.latency import timed
+
+# Everything that affects the trained model; part of the artifact key
+MODEL_CONFIG = {"n": 1000, "seed": 42, "test_size": 0.2, "n_estimators": 100, "random_state": 42}
+
+# From this many rows sklearn's compiled tree walk beats the numpy lockstep
+# walk of CompiledForest.predict (python -m models.inference)
+SKLEARN_BATCH_ROWS = 256
 
 # Step 1: Feature extraction including volatility
-def extract_features(asks, bids, quantity, volatility):
+@timed("slippage_features")
+def extract_features(asks, bids, quantity, volatility, features=None):
     """
     Extract features from order book data, quantity, and volatility.
     
@@ -12,12 +24,16 @@ def extract_features(asks, bids, quantity, volatility):
     - bids: list of [price, qty] for bid side
     - quantity: float, order size
     - volatility: float, current market volatility
+    - features: optional book feature vector (market.features) for these
+      levels; spread and imbalance are read from it instead of recomputed
     
     Returns:
     - list of features: [spread, depth_imbalance, quantity, volatility]
     """
-    if not asks or not bids:
+    if len(asks) == 0 or len(bids) == 0:
         return [0, 0, 0, volatility]
+    if features is not None:
+        return [float(features[SPREAD]), float(features[IMBALANCE]), quantity, volatility]
 
     best_ask = float(asks[0][0])
     best_bid = float(bids[0][0])
@@ -29,23 +45,48 @@ def extract_features(asks, bids, quantity, volatility):
 
     return [spread, depth_imbalance, quantity, volatility]
 
-# Step 2: Generate synthetic training data including volatility
-def generate_synthetic_data(n=1000):
+def extract_features_batch(asks, bids, quantities, volatilities, features=None):
     """
-    Generate synthetic data for slippage prediction including volatility.
-    
+    Build the feature matrix for many orders against the same order book.
+
+    Spread and depth imbalance are computed once for the book and broadcast
+    across the (quantity, volatility) rows.
+
     Parameters:
-    - n: int, number of samples
-    
+    - asks: list of [price, qty] for ask side
+    - bids: list of [price, qty] for bid side
+    - quantities: array of order sizes
+    - volatilities: array of volatilities, same length as quantities
+    - features: optional book feature vector, as for extract_features
+
     Returns:
-    - X: np.array, features matrix
-    - y: np.array, target vector (slippage)
+    - np.array of shape (n, 4): [spread, depth_imbalance, quantity, volatility] rows
     """
-    np.random.seed(42)
-    spreads = np.random.uniform(0.01, 0.1, n)
-    depth_imbalances = np.random.uniform(-1, 1, n)
-    quantities = np.random.uniform(10, 500, n)
-    volatilities = np.random.uniform(0.005, 0.03, n)  # Typical intraday volatility range
+    volatilities = np.asarray(volatilities, dtype=np.float64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    spread, depth_imbalance, _, _ = extract_features(asks, bids, 0, 0, features)
+    if len(asks) == 0 or len(bids) == 0:
+        quantities = np.zeros_like(volatilities)
+    return np.column_stack((
+        np.full(len(volatilities), spread, dtype=np.float64),
+        np.full(len(volatilities), depth_imbalance, dtype=np.float64),
+        quantities,
+        volatilities,
+    ))
+
+# Step 2: Generate synthetic training data including volatility
+def synthetic_chunk(rng, n):
+    """
+    n synthetic slippage rows drawn from rng (a numpy Generator or RandomState).
+
+    Returns:
+    - X: np.array of shape (n, 4), [spread, depth_imbalance, quantity, volatility]
+    - y: np.array of shape (n,), slippage
+    """
+    spreads = rng.uniform(0.01, 0.1, n)
+    depth_imbalances = rng.uniform(-1, 1, n)
+    quantities = rng.uniform(10, 500, n)
+    volatilities = rng.uniform(0.005, 0.03, n)  # Typical intraday volatility range
 
     # Slippage formula with noise and volatility effect
     slippage = (
@@ -53,23 +94,79 @@ def generate_synthetic_data(n=1000):
         + 0.3 * np.abs(depth_imbalances)
         + 0.0005 * quantities
         + 0.2 * volatilities  # Volatility contribution
-        + np.random.normal(0, 0.005, n)
+        + rng.normal(0, 0.005, n)
     )
     slippage = np.maximum(slippage, 0)  # Slippage can't be negative
 
     X = np.column_stack((spreads, depth_imbalances, quantities, volatilities))
-    y = slippage
-    return X, y
+    return X, slippage
+
+def generate_synthetic_data(n=1000, seed=42):
+    """
+    Generate synthetic data for slippage prediction including volatility.
+    
+    Parameters:
+    - n: int, number of samples
+    - seed: int, seed of a private RandomState (same rows as the former
+      global np.random.seed; the global state is left alone)
+    
+    Returns:
+    - X: np.array, features matrix
+    - y: np.array, target vector (slippage)
+    """
+    return synthetic_chunk(np.random.RandomState(seed), n)
 
 # Step 3: Train model
-X, y = generate_synthetic_data()
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+def train_model(config=MODEL_CONFIG):
+    """
+    Train the slippage RandomForest on synthetic data.
+
+    sklearn is imported here so serving workers that load a prebuilt
+    artifact never pay for training.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import train_test_split
+
+    X, y = generate_synthetic_data(config["n"], config["seed"])
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=config["test_size"], random_state=config["random_state"]
+    )
+    model = RandomForestRegressor(
+        n_estimators=config["n_estimators"], random_state=config["random_state"]
+    )
+    model.fit(X_train, y_train)
+    return model
+
 
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
+def serving_config():
+    """Config of the served artifacts: the latest models.training run promoted, else MODEL_CONFIG."""
+    return promoted("slippage", MODEL_CONFIG)
+
+
+def get_model(config=None):
+    """Trained slippage model for config (default: serving_config()), loaded on first use."""
+    config = config or serving_config()
+    return load_or_build("slippage", config, partial(train_model, config))
+
+
+def compile_model(config=MODEL_CONFIG):
+    """Export the trained forest to flat arrays for sklearn-free inference."""
+    from models.inference import CompiledForest
+
+    return CompiledForest(get_model(config))
+
+
+def get_compiled_model():
+    """Slippage model used on the serving path (an online update if one is published)."""
+    model = live("slippage")
+    if model is not None:
+        return model
+    config = serving_config()
+    return load_or_build("slippage_compiled", config, partial(compile_model, config))
 
 # Step 4: Prediction function using trained model including volatility
-def estimate_slippage(asks, bids, quantity=100, volatility=0.015):
+@timed("slippage")
+def estimate_slippage(asks, bids, quantity=100, volatility=0.015, features=None):
     """
     Estimate slippage given order book, quantity, and volatility.
     
@@ -78,10 +175,56 @@ def estimate_slippage(asks, bids, quantity=100, volatility=0.015):
     - bids: list of [price, qty] for bid side
     - quantity: float, order size
     - volatility: float, current market volatility
+    - features: optional book feature vector (see extract_features)
     
     Returns:
     - float: predicted slippage rounded to 6 decimals
     """
-    features = extract_features(asks, bids, quantity, volatility)
-    slippage_pred = model.predict([features])[0]
-    return round(slippage_pred, 6)
+    row = extract_features(asks, bids, quantity, volatility, features)
+    slippage_pred = get_compiled_model().predict([row])[0]
+    return round(float(slippage_pred), 6)
+
+
+@timed("slippage_batch")
+def estimate_slippage_batch(features):
+    """
+    Vectorized estimate_slippage: one model call for a whole feature matrix.
+
+    Parameters:
+    - features: np.array of shape (n, 4), e.g. from extract_features_batch
+
+    Returns:
+    - np.array: predicted slippage per row rounded to 6 decimals
+    """
+    if len(features) == 0:
+        return np.empty(0)
+    from models.inference import CompiledForest
+
+    model = get_compiled_model()
+    if len(features) >= SKLEARN_BATCH_ROWS and isinstance(model, CompiledForest):
+        # Same predictions (see CompiledForest.predict), faster at this size
+        model = get_model()
+    return np.round(model.predict(features), 6)
+
+
+@timed("slippage_grid")
+def estimate_slippage_grid(asks, bids, quantities, volatilities, features=None):
+    """
+    estimate_slippage over every (quantity, volatility) pair of a grid.
+
+    The forest is walked once per tree over the grid instead of once per
+    cell (see CompiledForest.predict_grid); results match the batch path.
+
+    Returns:
+    - np.array of shape (len(quantities), len(volatilities)) rounded to 6 decimals
+    """
+    model = get_compiled_model()
+    quantities = np.asarray(quantities, dtype=np.float64)
+    volatilities = np.asarray(volatilities, dtype=np.float64)
+    if not hasattr(model, "predict_grid") or len(asks) == 0 or len(bids) == 0:
+        q = np.repeat(quantities, len(volatilities))
+        v = np.tile(volatilities, len(quantities))
+        rows = extract_features_batch(asks, bids, q, v, features)
+        return estimate_slippage_batch(rows).reshape(len(quantities), len(volatilities))
+    row = extract_features(asks, bids, 0, 0, features)
+    return np.round(model.predict_grid(row, 2, quantities, 3, volatilities), 6)
@@ -0,0 +1,105 @@
+import numpy as np
+
+from models.depth_walk import DepthWalk
+from models.fees import estimate_fees_batch
+from models.maker_taker import estimate_maker_taker_batch
+from models.maker_taker import extract_features_batch as maker_taker_features_batch
+from models.market_impact import estimate_market_impact_batch
+from models.slippage import estimate_slippage_grid
+from utils.latency import timed
+
+
+def grid_axis(low, high, steps, log=False):
+    """Evenly (or geometrically, with log=True) spaced axis of steps points."""
+    if steps == 1:
+        return np.array([float(low)])
+    if log:
+        return np.geomspace(low, high, steps)
+    return np.linspace(low, high, steps)
+
+
+@timed("cost_surface")
+def cost_surface(asks, bids, quantities, volatilities, market=None, features=None, fee_tier=1):
+    """
+    Every cost model over the full quantity x volatility grid in one pass.
+
+    Cells match what compute() returns for the same (quantity, volatility),
+    with fees at fee_tier.
+
+    Parameters:
+    - asks, bids: [price, qty] levels of one book
+    - quantities: (nq,) order sizes
+    - volatilities: (nv,) volatilities
+    - market: (exchange, instId) market key for the calibrated impact parameters
+    - features: the book's feature vector (market.features), if maintained
+    - fee_tier: taker fee tier (models.fees)
+
+    Returns:
+    - dict of (nq, nv) arrays slippage, fees, marketImpact, cost, plus
+      depthSlippage (nq,) and maker (nv,), which only depend on one axis
+    """
+    quantities = np.asarray(quantities, dtype=np.float64)
+    volatilities = np.asarray(volatilities, dtype=np.float64)
+    nq, nv = len(quantities), len(volatilities)
+    q = np.repeat(quantities, nv)
+    v = np.tile(volatilities, nq)
+
+    slippage = estimate_slippage_grid(asks, bids, quantities, volatilities, features)
+    impact = estimate_market_impact_batch(q, v, market).reshape(nq, nv)
+    # compute() prices fees at the default notional, so they only vary with volatility
+    fees = np.broadcast_to(estimate_fees_batch(asks, bids, volatilities, fee_tier=fee_tier), (nq, nv))
+    maker = estimate_maker_taker_batch(maker_taker_features_batch(asks, bids, volatilities, features))
+    if len(asks) and len(bids):
+        walk = DepthWalk(asks, bids).walk(quantities, side="buy", notional=True)
+        depth = np.round(np.maximum(walk["slippage"] * walk["notional"], 0.0), 6)
+    else:
+        depth = np.zeros(nq)
+    return {
+        "slippage": slippage,
+        "fees": np.array(fees),
+        "marketImpact": impact,
+        "cost": slippage + fees + impact,
+        "depthSlippage": depth,
+        "maker": maker,
+    }
+
+
+def interpolate(quantities, volatilities, values, points):
+    """
+    Bilinear interpolation of a grid at off-grid (quantity, volatility) points.
+
+    Points outside the grid are clamped to its edges.
+
+    Parameters:
+    - quantities, volatilities: increasing grid axes
+    - values: (nq, nv) grid
+    - points: (n, 2) array of (quantity, volatility)
+
+    Returns:
+    - (interpolated values (n,), inside (n,) bool: point lay within the grid)
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    pq, pv = points[:, 0], points[:, 1]
+    inside = (
+        (pq >= quantities[0]) & (pq <= quantities[-1])
+        & (pv >= volatilities[0]) & (pv <= volatilities[-1])
+    )
+
+    def locate(axis, x):
+        if len(axis) == 1:
+            return np.zeros(len(x), dtype=np.int64), np.zeros(len(x))
+        x = np.clip(x, axis[0], axis[-1])
+        i = np.clip(np.searchsorted(axis, x, side="right") - 1, 0, len(axis) - 2)
+        return i, (x - axis[i]) / (axis[i + 1] - axis[i])
+
+    i, tq = locate(quantities, pq)
+    j, tv = locate(volatilities, pv)
+    i1 = np.minimum(i + 1, len(quantities) - 1)
+    j1 = np.minimum(j + 1, len(volatilities) - 1)
+    result = (
+        values[i, j] * (1 - tq) * (1 - tv)
+        + values[i1, j] * tq * (1 - tv)
+        + values[i, j1] * (1 - tq) * tv
+        + values[i1, j1] * tq * tv
+    )
+    return result, inside
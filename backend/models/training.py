@@ -0,0 +1,261 @@
+"""
+Offline training pipeline for the slippage and maker/taker models.
+
+Training data is a sequence of fixed-size chunks: synthetic chunks, each
+drawn from its own child of one SeedSequence, followed by chunks streamed
+from recorded rows (.npy files, memory-mapped). Every chunk is processed
+independently in a process pool and results are combined in chunk order,
+so a config gives the same model for any number of workers, and no
+process holds more than one chunk at a time.
+
+- slippage: each chunk grows trees_per_chunk regression trees; the trees
+  of all chunks form one random forest (each tree sees one slice of the
+  data, like subsampled bagging). Leaf size and depth are bounded so the
+  forest stays small as the data grows.
+- maker/taker: L2-regularized logistic regression fitted exactly by
+  Newton's method; each iteration sums per-chunk gradients and Hessians
+  (the chunks are regenerated or re-read each pass).
+
+Artifacts are saved in the model registry under the pipeline config and
+promoted, so estimate_slippage / estimate_maker_taker in newly started
+workers serve them (see registry.promote).
+
+Recorded files hold float rows [spread, depth_imbalance, quantity,
+volatility, slippage] for slippage and [spread, volatility, maker] for
+maker/taker, e.g. from realized fills.
+
+Usage (from backend/):
+    python -m models.training --rows 20000000 --workers 8
+    python -m models.training --model maker_taker --recorded-maker-taker fills_mt.npy
+"""
+import argparse
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models import maker_taker, registry, slippage
+
+DEFAULT_CONFIG = {
+    "rows": 10_000_000,        # synthetic rows per model
+    "chunk_rows": 100_000,     # rows per chunk (and per training task)
+    "seed": 42,
+    # slippage forest
+    "trees_per_chunk": 1,
+    "min_samples_leaf": 50,
+    "max_depth": 16,
+    # maker/taker logistic regression
+    "C": 1.0,                  # inverse L2 strength, as in sklearn
+    "max_iter": 25,
+    "tol": 1e-8,               # stop once the Newton decrement falls below this
+}
+
+MODELS = ("slippage", "maker_taker")
+
+
+def _recorded_key(paths):
+    """Identify recorded files in the artifact key by path, size and mtime."""
+    return [[os.path.abspath(p), os.path.getsize(p), int(os.path.getmtime(p))] for p in paths]
+
+
+def pipeline_config(model, config=None, recorded=()):
+    """The full training config of one model (the artifact key of its output)."""
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    keys = ["rows", "chunk_rows", "seed"]
+    keys += ["trees_per_chunk", "min_samples_leaf", "max_depth"] if model == "slippage" else ["C", "max_iter", "tol"]
+    return dict({k: config[k] for k in keys}, pipeline="chunked", model=model, recorded=_recorded_key(recorded))
+
+
+def chunk_tasks(config, recorded=()):
+    """
+    The chunks of a config, in order.
+
+    Returns:
+    - list of ("synthetic", SeedSequence, n_rows) and ("recorded", path, start, stop)
+    """
+    rows, chunk_rows = config["rows"], config["chunk_rows"]
+    sizes = [chunk_rows] * (rows // chunk_rows) + ([rows % chunk_rows] if rows % chunk_rows else [])
+    tasks = [("synthetic", s, n) for s, n in zip(np.random.SeedSequence(config["seed"]).spawn(len(sizes)), sizes)]
+    for path in recorded:
+        total = len(np.load(path, mmap_mode="r"))
+        tasks += [("recorded", path, start, min(start + chunk_rows, total)) for start in range(0, total, chunk_rows)]
+    return tasks
+
+
+def load_chunk(model, task):
+    """(X, y) of one chunk task."""
+    if task[0] == "synthetic":
+        _, seed_sequence, n = task
+        module = slippage if model == "slippage" else maker_taker
+        return module.synthetic_chunk(np.random.default_rng(seed_sequence), n)
+    _, path, start, stop = task
+    rows = np.asarray(np.load(path, mmap_mode="r")[start:stop], dtype=np.float64)
+    return rows[:, :-1], rows[:, -1]
+
+
+def _tree_chunk(args):
+    task, index, config = args
+    from sklearn.ensemble import RandomForestRegressor
+
+    X, y = load_chunk("slippage", task)
+    forest = RandomForestRegressor(
+        n_estimators=config["trees_per_chunk"],
+        min_samples_leaf=config["min_samples_leaf"],
+        max_depth=config["max_depth"],
+        # Seeded by chunk position, so the forest does not depend on scheduling
+        random_state=int(np.random.SeedSequence([config["seed"], index]).generate_state(1)[0]),
+    )
+    forest.fit(X, y)
+    return forest, len(y)
+
+
+def train_slippage(pool, config, recorded=()):
+    """
+    One random forest from the trees grown on every chunk.
+
+    Returns:
+    - (fitted RandomForestRegressor, rows trained on)
+    """
+    tasks = [(task, i, config) for i, task in enumerate(chunk_tasks(config, recorded))]
+    forest, rows = None, 0
+    for part, n in pool.map(_tree_chunk, tasks):
+        rows += n
+        if forest is None:
+            forest = part
+        else:
+            forest.estimators_ += part.estimators_
+    forest.n_estimators = len(forest.estimators_)
+    return forest, rows
+
+
+def _newton_chunk(args):
+    task, w = args
+    X, y = load_chunk("maker_taker", task)
+    X = np.column_stack((X, np.ones(len(X))))  # intercept last
+    z = X @ w
+    p = 0.5 * (1 + np.tanh(0.5 * z))  # sigmoid without overflow
+    gradient = X.T @ (p - y)
+    hessian = (X * (p * (1 - p))[:, None]).T @ X
+    return gradient, hessian, len(y)
+
+
+def train_maker_taker(pool, config, recorded=()):
+    """
+    Exact L2-regularized logistic regression (sklearn's objective with an
+    unpenalized intercept) by Newton iterations over the chunks.
+
+    Returns:
+    - (fitted LogisticRegression, rows trained on, iterations)
+    """
+    from sklearn.linear_model import LogisticRegression
+
+    tasks = chunk_tasks(config, recorded)
+    n_features = 2
+    w = np.zeros(n_features + 1)
+    penalty = np.full(n_features + 1, 1.0 / config["C"])
+    penalty[-1] = 0.0
+    iterations = 0
+    for iterations in range(1, config["max_iter"] + 1):
+        gradient, hessian, rows = np.zeros_like(w), np.zeros((len(w), len(w))), 0
+        for g, h, n in pool.map(_newton_chunk, [(task, w) for task in tasks]):
+            gradient += g
+            hessian += h
+            rows += n
+        gradient += penalty * w
+        hessian += np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        w = w - step
+        if float(gradient @ step) / 2 < config["tol"] * rows:
+            break
+
+    model = LogisticRegression(C=config["C"])
+    model.classes_ = np.array([0, 1])
+    model.coef_ = w[None, :-1]
+    model.intercept_ = w[-1:]
+    model.n_features_in_ = n_features
+    model.n_iter_ = np.array([iterations])
+    return model, rows, iterations
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process and of its finished worker processes (MB)."""
+    # ru_maxrss is in kilobytes on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return round(own, 1), round(children, 1)
+
+
+def run(models=MODELS, config=None, workers=None, recorded=None, promote=True):
+    """
+    Train, save and (optionally) promote the models.
+
+    Parameters:
+    - models: which of MODELS to train
+    - config: overrides for DEFAULT_CONFIG
+    - workers: process count (default: os.cpu_count())
+    - recorded: dict of model -> list of recorded .npy files
+    - promote: make newly started workers serve the new artifacts
+
+    Returns:
+    - dict per model: rows, seconds, rows_per_s, artifact paths and peak
+      memory of the trainer and its workers
+    """
+    from models.inference import CompiledForest, CompiledLogistic
+
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    recorded = recorded or {}
+    report = {}
+    for model in models:
+        files = recorded.get(model, ())
+        key = pipeline_config(model, config, files)
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            if model == "slippage":
+                fitted, rows = train_slippage(pool, config, files)
+                compiled = CompiledForest(fitted)
+                extra = {"trees": len(fitted.estimators_), "nodes": int(len(compiled.value))}
+            else:
+                fitted, rows, iterations = train_maker_taker(pool, config, files)
+                compiled = CompiledLogistic(fitted)
+                extra = {"iterations": iterations, "coef": compiled.coef.tolist(), "intercept": compiled.intercept}
+        seconds = time.perf_counter() - start
+        paths = [registry.save(model, key, fitted), registry.save(f"{model}_compiled", key, compiled)]
+        if promote:
+            registry.promote(model, key, (model, f"{model}_compiled"))
+        own, children = peak_memory_mb()
+        report[model] = dict(
+            rows=rows,
+            seconds=round(seconds, 3),
+            rows_per_s=round(rows / seconds),
+            artifacts=paths,
+            peak_rss_mb=own,
+            peak_worker_rss_mb=children,
+            **extra,
+        )
+    return report
+
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description="Train the slippage and maker/taker models on chunked data")
+    parser.add_argument("--model", choices=MODELS, action="append", help="model to train (default: both)")
+    parser.add_argument("--rows", type=int, default=DEFAULT_CONFIG["rows"], help="synthetic rows per model")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CONFIG["chunk_rows"])
+    parser.add_argument("--seed", type=int, default=DEFAULT_CONFIG["seed"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--recorded-slippage", action="append", default=[], help=".npy file of recorded rows")
+    parser.add_argument("--recorded-maker-taker", action="append", default=[], help=".npy file of recorded rows")
+    parser.add_argument("--no-promote", action="store_true", help="save artifacts without serving them")
+    args = parser.parse_args()
+
+    report = run(
+        models=args.model or MODELS,
+        config={"rows": args.rows, "chunk_rows": args.chunk_rows, "seed": args.seed},
+        workers=args.workers,
+        recorded={"slippage": args.recorded_slippage, "maker_taker": args.recorded_maker_taker},
+        promote=not args.no_promote,
+    )
+    print(json.dumps(report, indent=1))
@@ -0,0 +1,61 @@
+import pytest
+
+from models import registry
+
+
+@pytest.fixture
+def artifact_dir(tmp_path, monkeypatch):
+    """An empty model registry: artifacts (and the impact table), promotions and loaded models are per test."""
+    monkeypatch.delenv("IMPACT_TABLE", raising=False)
+    monkeypatch.setattr(registry, "ARTIFACT_DIR", str(tmp_path))
+    monkeypatch.setattr(registry, "_loaded", {})
+    monkeypatch.setattr(registry, "_key_locks", {})
+    monkeypatch.setattr(registry, "_promoted", {})
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def client(tmp_path_factory):
+    """
+    TestClient of the API against the local fake OKX exchange (REST tickers
+    plus the BTC-USDT-SWAP books feed) and the mock venue, with models built
+    into a temporary artifact dir. Yields once market data is flowing.
+    """
+    import os
+    import time
+
+    from fastapi.testclient import TestClient
+
+    from benchmarks.fake_exchange import FakeExchange
+
+    exchange = FakeExchange(books=("BTC-USDT-SWAP",)).start()
+    env = dict(OKX_REST_URL=exchange.rest_url, OKX_WS_URL=exchange.ws_url, EXCHANGES="OKX,MOCK",
+               TICKER_REFRESH_INTERVAL="0.2")
+    saved_env = {name: os.environ.get(name) for name in (*env, "IMPACT_TABLE")}
+    # The impact table is read from the temporary artifact dir
+    os.environ.pop("IMPACT_TABLE", None)
+    saved_registry = registry.ARTIFACT_DIR, registry._loaded, registry._key_locks, registry._promoted
+    os.environ.update(env)
+    registry.ARTIFACT_DIR = str(tmp_path_factory.mktemp("artifacts"))
+    registry._loaded, registry._key_locks, registry._promoted = {}, {}, {}
+    try:
+        import main
+
+        with TestClient(main.app) as test_client:
+            test_client.startup_generation = registry.generation()
+            params = dict(exchange="OKX", spotAsset="BTC-USDT", orderType="market", quantity=100, volatility=0.02,
+                          feeTier="1")
+            for _ in range(100):
+                response = test_client.post("/", json=params)
+                if response.status_code == 200 and response.json()["bookLevels"][0] > 1:
+                    break
+                time.sleep(0.1)
+            yield test_client
+    finally:
+        exchange.stop()
+        registry.ARTIFACT_DIR, registry._loaded, registry._key_locks, registry._promoted = saved_registry
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
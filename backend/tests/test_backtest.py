@@ -0,0 +1,47 @@
+import numpy as np
+
+from backtest import engine
+from market.tape import TapeReader, TapeWriter
+from models import market_impact, slippage
+
+INST = "BTC-USDT-SWAP"
+CONFIG = {"quantities_usd": [100, 1000], "volatility_window": 20, "horizon": 10}
+
+
+def write_tape(root, mids):
+    """One deep-book snapshot per second around each mid."""
+    writer = TapeWriter(str(root))
+    for i, mid in enumerate(mids):
+        writer.write_book_message(INST, {"action": "snapshot", "data": [{
+            "ts": 1_700_000_000_000 + 1000 * i,
+            "asks": [[mid + 0.05, 1e6], [mid + 0.15, 1e6]],
+            "bids": [[mid - 0.05, 1e6], [mid - 0.15, 1e6]],
+        }]})
+    writer.flush()
+    (day,) = TapeReader(str(root)).days(INST)
+    return day
+
+
+def test_errors_are_bps_with_served_volatility_and_market(tmp_path, monkeypatch):
+    # The mid alternates, so it is back where it was after an even horizon
+    mids = 100.0 + 0.1 * (np.arange(120) % 2)
+    day = write_tape(tmp_path, mids)
+    calls = []
+
+    def impact(q, v, markets=None):
+        calls.append((np.array(v), markets))
+        return q * 2e-4
+
+    monkeypatch.setattr(market_impact, "estimate_market_impact_batch", impact)
+    monkeypatch.setattr(slippage, "estimate_slippage_batch", lambda X: X[:, 2] * 1e-4)
+    errors = engine.evaluate_day(str(tmp_path), INST, day, CONFIG)
+
+    # Deep book and no mid move: nothing is realized, so the errors are the predictions in bps
+    np.testing.assert_allclose(errors["slippage"], 1.0, rtol=1e-6)
+    np.testing.assert_allclose(errors["market_impact"], 2.0, rtol=1e-6)
+    volatility, market = calls[0]
+    assert market == ("OKX", INST)
+    _, asks, bids = engine.sample_books(TapeReader(str(tmp_path)), INST, day, dict(engine.DEFAULT_CONFIG, **CONFIG))
+    sampled = (asks[:, 0, 0] + bids[:, 0, 0]) / 2
+    daily = engine.realized_volatility(sampled, CONFIG["volatility_window"]) * np.sqrt(86400)
+    np.testing.assert_allclose(volatility, np.repeat(daily[:len(volatility) // 2], 2))
@@ -0,0 +1,74 @@
+import asyncio
+import copy
+
+from market.books_feed import BooksFeed
+from market.fake_okx_ws import FakeOkxServer, synthetic_book_stream
+from market.order_book import OrderBook
+
+INST = "BTC-USDT-SWAP"
+
+
+def reference_book(messages):
+    book = OrderBook(INST)
+    for message in messages:
+        assert book.handle_message(message)
+    return book
+
+
+def book_state(book):
+    return book.synced, book.seq_id, book.checksum(), book.asks._raw, book.bids._raw
+
+
+def test_stream_keeps_checksum_and_sequence():
+    messages = synthetic_book_stream(INST, n_updates=500)
+    book = reference_book(messages)
+    last = messages[-1]["data"][0]
+    assert book.synced
+    assert book.seq_id == last["seqId"]
+    assert book.checksum() == last["checksum"]
+    asks, bids = book.top()
+    assert (asks[1:, 0] > asks[:-1, 0]).all()
+    assert (bids[1:, 0] < bids[:-1, 0]).all()
+    assert bids[0, 0] < asks[0, 0]
+
+
+def test_bad_checksum_marks_book_out_of_sync():
+    messages = synthetic_book_stream(INST, n_updates=20)
+    book = reference_book(messages[:10])
+    corrupt = copy.deepcopy(messages[10])
+    corrupt["data"][0]["checksum"] += 1
+    assert not book.handle_message(corrupt)
+    assert book.resyncs == 1
+    # Updates are refused until a snapshot arrives
+    assert not book.handle_message(messages[11])
+
+
+def test_sequence_gap_marks_book_out_of_sync():
+    messages = synthetic_book_stream(INST, n_updates=20)
+    book = reference_book(messages[:10])
+    assert not book.handle_message(messages[11])
+    assert book.resyncs == 1
+
+
+def test_feed_resyncs_dropped_updates_from_snapshot():
+    # Every 50th update is dropped; the last one (410) is delivered
+    messages = synthetic_book_stream(INST, n_updates=410)
+    expected = reference_book(messages)
+
+    async def run():
+        async with FakeOkxServer({INST: messages}, interval=0.001, drop_every=50) as server:
+            feed = BooksFeed([INST], url=server.url)
+            feed.start()
+            try:
+                book = feed.books[INST]
+                for _ in range(500):
+                    if book.synced and book.seq_id == expected.seq_id:
+                        break
+                    await asyncio.sleep(0.01)
+                return book
+            finally:
+                await feed.stop()
+
+    book = asyncio.run(run())
+    assert book.resyncs > 0
+    assert book_state(book) == book_state(expected)
@@ -0,0 +1,103 @@
+import asyncio
+
+import httpx
+import numpy as np
+import pytest
+
+from benchmarks.fake_exchange import load_tickers
+from exchanges.base import TICKER_FIELDS, ExchangeError
+from exchanges.mock import DEFAULT_MARKETS, MockAdapter
+from exchanges.okx import OkxAdapter
+from exchanges.registry import create_adapter
+from market.feed_handler import ticker_fetcher
+from market.tape import TapeReader, TapeWriter
+
+
+def okx_adapter(handler, **options):
+    """OkxAdapter whose pooled client is served by handler(request) -> httpx.Response."""
+    adapter = OkxAdapter(backoff=0.001, **options)
+    adapter._client = httpx.AsyncClient(base_url=adapter.rest_url, transport=httpx.MockTransport(handler))
+    return adapter
+
+
+def test_registry_creates_adapters():
+    assert isinstance(create_adapter("mock"), MockAdapter)
+    assert create_adapter("okx").instrument_id("btc-usdt") == "BTC-USDT-SWAP"
+    with pytest.raises(KeyError):
+        create_adapter("nope")
+
+
+def test_mock_tickers_are_normalized_and_seeded():
+    first = asyncio.run(MockAdapter(seed=1).fetch_tickers())
+    again = asyncio.run(MockAdapter(seed=1).fetch_tickers())
+    assert [t["instId"] for t in first] == list(DEFAULT_MARKETS)
+    assert all(set(t) == set(TICKER_FIELDS) for t in first)
+    assert all(float(t["bidPx"]) < float(t["askPx"]) for t in first)
+    assert [{k: v for k, v in t.items() if k != "ts"} for t in first] == \
+        [{k: v for k, v in t.items() if k != "ts"} for t in again]
+
+
+def test_mock_books_and_failures():
+    adapter = MockAdapter(fail_every=3)
+
+    async def run():
+        asks, bids = await adapter.fetch_book("ETH-USDT-SWAP", depth=10)
+        await adapter.fetch_tickers()
+        with pytest.raises(ExchangeError) as failure:
+            await adapter.fetch_tickers()
+        assert failure.value.retryable
+        with pytest.raises(ExchangeError):
+            await adapter.fetch_book("NOPE-USDT-SWAP")
+        return asks, bids
+
+    asks, bids = asyncio.run(run())
+    ask_px = np.array([float(p) for p, _ in asks])
+    bid_px = np.array([float(p) for p, _ in bids])
+    assert len(asks) == len(bids) == 10
+    assert (np.diff(ask_px) > 0).all() and (np.diff(bid_px) < 0).all() and bid_px[0] < ask_px[0]
+
+
+def test_okx_tickers_keep_every_normalized_field():
+    fixture = load_tickers()
+    adapter = okx_adapter(lambda request: httpx.Response(200, json=fixture))
+    tickers = asyncio.run(adapter.fetch_tickers())
+    assert len(tickers) == len(fixture["data"])
+    for ticker, raw in zip(tickers, fixture["data"]):
+        assert ticker == {field: raw[field] for field in TICKER_FIELDS}
+        assert ticker["lastSz"] is not None
+
+
+def test_okx_retries_rate_limits_and_server_errors():
+    fixture = load_tickers()
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "0.001"}),
+        httpx.Response(503),
+        httpx.Response(200, json={"code": "50011", "msg": "Too Many Requests"}),
+        httpx.Response(200, json=fixture),
+    ]
+    adapter = okx_adapter(lambda request: responses.pop(0))
+    assert len(asyncio.run(adapter.fetch_tickers())) == len(fixture["data"])
+    assert responses == []
+
+
+def test_okx_errors():
+    adapter = okx_adapter(lambda request: httpx.Response(500), max_retries=1)
+    with pytest.raises(ExchangeError) as exhausted:
+        asyncio.run(adapter.fetch_tickers())
+    assert exhausted.value.retryable
+
+    adapter = okx_adapter(lambda request: httpx.Response(200, json={"code": "51001", "msg": "bad instId"}))
+    with pytest.raises(ExchangeError, match="51001") as rejected:
+        asyncio.run(adapter.fetch_tickers())
+    assert not rejected.value.retryable
+
+
+def test_recorded_tickers_keep_last_size(tmp_path):
+    writer = TapeWriter(str(tmp_path))
+    asyncio.run(ticker_fetcher(MockAdapter(), writer)("SWAP"))
+    writer.flush()
+    reader = TapeReader(str(tmp_path))
+    for inst_id in DEFAULT_MARKETS:
+        (day,) = reader.days(inst_id)
+        records = reader.range(inst_id, day, "tickers")
+        assert len(records) == 1 and np.isfinite(records["last_sz"]).all()
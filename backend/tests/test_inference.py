@@ -0,0 +1,132 @@
+import threading
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from models import maker_taker, slippage
+from models.inference import CompiledForest, CompiledLinear, CompiledLogistic
+
+
+def slippage_rows(rng, n):
+    return np.column_stack((
+        rng.uniform(0, 0.2, n), rng.uniform(-1, 1, n), rng.uniform(0, 1000, n), rng.uniform(0, 0.05, n)
+    ))
+
+
+@pytest.fixture(scope="module", params=["finite", "missing"])
+def forest(request):
+    """Forests fitted without and with NaN in the training data (learned missing-value routing)."""
+    rng = np.random.default_rng(0)
+    X = slippage_rows(rng, 2000)
+    y = X[:, 0] * 0.5 + X[:, 2] * 1e-4 + rng.normal(0, 0.01, len(X))
+    if request.param == "missing":
+        X[rng.random(X.shape) < 0.1] = np.nan
+    return RandomForestRegressor(n_estimators=20, min_samples_leaf=5, random_state=0).fit(X, y)
+
+
+def edge_rows(forest, rng):
+    """Random rows, rows sitting exactly on split thresholds, just off them (float32 rounding), and NaN."""
+    rows = [slippage_rows(rng, 500)]
+    for estimator in forest.estimators_[:5]:
+        tree = estimator.tree_
+        # Missing-value-only splits have an infinite threshold
+        split = (tree.children_left != -1) & np.isfinite(tree.threshold)
+        for feature, threshold in zip(tree.feature[split], tree.threshold[split]):
+            row = slippage_rows(rng, 3)
+            row[:, feature] = [threshold, threshold * (1 + 1e-9), np.nextafter(np.float32(threshold), np.inf)]
+            rows.append(row)
+    nan_rows = slippage_rows(rng, 4 * 50)
+    nan_rows[np.arange(4 * 50), np.tile(np.arange(4), 50)] = np.nan
+    rows.append(nan_rows)
+    rows.append(np.full((1, 4), np.nan))
+    return np.vstack(rows)
+
+
+def test_forest_parity(forest):
+    X = edge_rows(forest, np.random.default_rng(1))
+    compiled = CompiledForest(forest)
+    np.testing.assert_allclose(compiled.predict(X), forest.predict(X), rtol=0, atol=1e-12)
+    # float32 and single-row inputs take the same path
+    np.testing.assert_allclose(compiled.predict(X.astype(np.float32)), forest.predict(X.astype(np.float32)), atol=1e-12)
+    assert compiled.predict(X[0]).shape == (1,)
+    assert compiled.predict(X[0])[0] == pytest.approx(forest.predict(X[:1])[0], abs=1e-12)
+
+
+@pytest.mark.parametrize("fixed", [[0.05, 0.1], [np.nan, 0.1], [0.05, np.nan]])
+def test_forest_grid_parity(forest, fixed):
+    compiled = CompiledForest(forest)
+    tree = forest.estimators_[0].tree_
+    # Include grid points exactly on quantity / volatility thresholds
+    q_thresholds = tree.threshold[tree.feature == 2][:5]
+    v_thresholds = tree.threshold[tree.feature == 3][:5]
+    quantities = np.sort(np.concatenate((np.linspace(1, 1000, 9), q_thresholds)))
+    volatilities = np.sort(np.concatenate((np.linspace(0.001, 0.05, 7), v_thresholds)))
+    grid = compiled.predict_grid(fixed + [0, 0], 2, quantities, 3, volatilities)
+    X = np.array([fixed + [q, v] for q in quantities for v in volatilities])
+    np.testing.assert_allclose(grid.ravel(), forest.predict(X), atol=1e-12)
+
+
+def test_logistic_parity():
+    rng = np.random.default_rng(2)
+    X, y = maker_taker.generate_synthetic_maker_taker_data(2000)
+    logreg = LogisticRegression().fit(X, y)
+    compiled = CompiledLogistic(logreg)
+    rows = np.vstack((X, rng.uniform(-10, 10, (100, 2)), [[0.0, 0.0]]))
+    np.testing.assert_allclose(compiled.predict_positive(rows), logreg.predict_proba(rows)[:, 1], atol=1e-12)
+    np.testing.assert_allclose(
+        compiled.predict_positive(rows.astype(np.float32)),
+        logreg.predict_proba(rows.astype(np.float32))[:, 1], atol=1e-7,
+    )
+    assert np.isnan(compiled.predict_positive([np.nan, 0.01])).all()
+
+    raw = CompiledLogistic.from_params(logreg.coef_[0], logreg.intercept_[0])
+    np.testing.assert_array_equal(raw.predict_positive(rows), compiled.predict_positive(rows))
+
+
+def test_linear_matches_sklearn_on_transformed_features():
+    rng = np.random.default_rng(3)
+    X = rng.normal(0, 1, (500, 3))
+    y = 2 * np.abs(X[:, 0]) - X[:, 1] + 0.5 * np.abs(X[:, 2]) + 0.1
+    transformed = X.copy()
+    transformed[:, [0, 2]] = np.abs(transformed[:, [0, 2]])
+    linear = LinearRegression().fit(transformed, y)
+    original = X.copy()
+
+    compiled = CompiledLinear(linear.coef_, linear.intercept_, abs_columns=[0, 2])
+    np.testing.assert_allclose(compiled.predict(X), linear.predict(transformed), atol=1e-12)
+    np.testing.assert_array_equal(X, original)  # input left untouched
+
+    floored = CompiledLinear(linear.coef_, linear.intercept_, abs_columns=[0, 2], lower=0.5)
+    np.testing.assert_allclose(floored.predict(X), np.maximum(linear.predict(transformed), 0.5), atol=1e-12)
+    assert floored.predict(X[0].astype(np.float32)).shape == (1,)
+
+
+def test_batches_match_single_rows_on_both_paths(artifact_dir):
+    rng = np.random.default_rng(4)
+    small = slippage_rows(rng, slippage.SKLEARN_BATCH_ROWS - 1)
+    large = slippage_rows(rng, slippage.SKLEARN_BATCH_ROWS)
+    compiled = slippage.get_compiled_model()
+    for rows in (small, large):
+        np.testing.assert_allclose(slippage.estimate_slippage_batch(rows), np.round(compiled.predict(rows), 6), atol=1e-6)
+
+
+def test_cold_registry_builds_compiled_models(artifact_dir):
+    # The compiled models load the fitted ones while they are being built
+    results = {}
+    worker = threading.Thread(daemon=True, target=lambda: results.update(
+        slippage=slippage.get_compiled_model(), maker_taker=maker_taker.get_compiled_model()
+    ))
+    worker.start()
+    worker.join(timeout=120)
+    assert not worker.is_alive(), "building a compiled model deadlocked"
+    assert isinstance(results["slippage"], CompiledForest)
+    assert isinstance(results["maker_taker"], CompiledLogistic)
+    assert len(list(artifact_dir.glob("*.joblib"))) == 4
+
+
+def test_compile_model_uses_its_config(artifact_dir):
+    config = dict(slippage.MODEL_CONFIG, n_estimators=3)
+    assert len(slippage.compile_model(config).roots) == 3
+    assert len(slippage.get_model(config).estimators_) == 3
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from models import registry
+from models.impact_calibration import (
+    ALL_DAY, DEFAULT_EXCHANGE, calibrate_table, generate_synthetic_fills, load_fills, write_table,
+)
+from models.market_impact import estimate_market_impact_batch, get_impact_params, load_impact_table
+from models.online import OnlineLearner
+
+INST = "BTC-USDT-SWAP"
+
+
+@pytest.fixture
+def serving(artifact_dir, monkeypatch):
+    """Isolated published models (load_impact_table publishes the table)."""
+    monkeypatch.setattr(registry, "_live", {})
+    return artifact_dir
+
+
+def fit(eta, alpha):
+    return {"eta": eta, "alpha": alpha, "n": 100, "rmse": 0.0, "ms": 0.0}
+
+
+def test_table_is_keyed_by_exchange(serving):
+    path = write_table({"version": 2, "bucket_hours": None, "params": {
+        "OKX": {INST: {ALL_DAY: fit(1e-4, 0.6)}},
+        "MOCK": {INST: {ALL_DAY: fit(3e-4, 0.4)}},
+    }}, str(serving / "impact.json"))
+    load_impact_table(path)
+    assert get_impact_params(("OKX", INST)) == (1e-4, 0.6)
+    assert get_impact_params(("MOCK", INST)) == (3e-4, 0.4)
+    assert get_impact_params(("OTHER", INST)) == get_impact_params()
+
+    impacts = estimate_market_impact_batch([100, 100], [0.02, 0.02], [("OKX", INST), ("MOCK", INST)])
+    np.testing.assert_allclose(impacts, np.round([1e-4 * 100 ** 0.6 * 0.02, 3e-4 * 100 ** 0.4 * 0.02], 6))
+
+
+def test_unversioned_tables_are_okx_fits(serving):
+    path = write_table({"bucket_hours": None, "params": {INST: {ALL_DAY: fit(2e-4, 0.5)}}},
+                       str(serving / "impact.json"))
+    load_impact_table(path)
+    assert get_impact_params((DEFAULT_EXCHANGE, INST)) == (2e-4, 0.5)
+    assert get_impact_params(("MOCK", INST)) == get_impact_params()
+
+
+def test_online_refit_overrides_the_table(serving):
+    path = write_table({"version": 2, "bucket_hours": None, "params": {"OKX": {INST: {ALL_DAY: fit(1e-4, 0.6)}}}},
+                       str(serving / "impact.json"))
+    load_impact_table(path)
+    registry.publish("market_impact", {("OKX", INST): {"eta": 5e-4, "alpha": 0.7}})
+    assert get_impact_params(("OKX", INST)) == (5e-4, 0.7)
+    registry.retract("market_impact")
+    assert get_impact_params(("OKX", INST)) == (1e-4, 0.6)
+
+
+def test_online_refit_is_per_market(serving):
+    path = write_table({"version": 2, "bucket_hours": None, "params": {
+        "OKX": {INST: {ALL_DAY: fit(1e-4, 0.6)}, "ETH-USDT-SWAP": {ALL_DAY: fit(2e-4, 0.5)}},
+    }}, str(serving / "impact.json"))
+    load_impact_table(path)
+    learner = OnlineLearner(min_samples=100, publish_every=100)
+    rng = np.random.default_rng(7)
+    q = rng.uniform(10, 1000, 300)
+    sigma = rng.uniform(0.005, 0.03, 300)
+    learner.observe_impact(q, sigma, 3e-4 * q ** 0.7 * sigma, [("OKX", INST)] * len(q))
+
+    eta, alpha = get_impact_params(("OKX", INST))
+    assert eta == pytest.approx(3e-4) and alpha == pytest.approx(0.7)
+    # The other instrument keeps its own calibration
+    assert get_impact_params(("OKX", "ETH-USDT-SWAP")) == (2e-4, 0.5)
+    markets = learner.status()["market_impact"]["markets"]
+    assert [(m["instId"], m["samples"]) for m in markets] == [(INST, 300)]
+
+    # A pooled refit of unkeyed observations only fills in for uncalibrated markets
+    learner.observe_impact(q, sigma, 5e-4 * q ** 0.4 * sigma)
+    assert get_impact_params(("OKX", "ETH-USDT-SWAP")) == (2e-4, 0.5)
+    eta, alpha = get_impact_params(("MOCK", INST))
+    assert eta == pytest.approx(5e-4) and alpha == pytest.approx(0.4)
+    learner.reset()
+    assert get_impact_params(("OKX", INST)) == (1e-4, 0.6)
+
+
+def test_calibration_fits_each_exchange_separately(serving, tmp_path):
+    fills, truth = generate_synthetic_fills(n_instruments=2, n=400)
+    # The same instruments on a second venue with twice the impact
+    doubled = {key: np.concatenate((values, values)) for key, values in fills.items()}
+    n = len(fills["instId"])
+    doubled["exchange"] = np.array(["OKX"] * n + ["MOCK"] * n)
+    doubled["impact"][n:] *= 2
+    table = calibrate_table(doubled, workers=1)
+    assert table["version"] == 2 and not table["failed"]
+    for inst_id in truth:
+        okx, mock = table["params"]["OKX"][inst_id][ALL_DAY], table["params"]["MOCK"][inst_id][ALL_DAY]
+        assert mock["eta"] == pytest.approx(2 * okx["eta"], rel=1e-3)
+        assert mock["alpha"] == pytest.approx(okx["alpha"], rel=1e-3)
+
+    # CSVs without an exchange column are OKX fills
+    path = tmp_path / "fills.csv"
+    path.write_text("instId,ts,quantity,volatility,impact\nBTC-USDT-SWAP,1700000000000,100,0.02,0.001\n")
+    assert load_fills(str(path))["exchange"].tolist() == [DEFAULT_EXCHANGE]
+
+
+def test_table_path_follows_the_artifact_dir(serving):
+    path = write_table({"version": 2, "bucket_hours": None, "params": {"OKX": {INST: {ALL_DAY: fit(4e-4, 0.5)}}}})
+    assert path == str(serving / "impact_params.json")
+    load_impact_table()
+    assert get_impact_params(("OKX", INST)) == (4e-4, 0.5)
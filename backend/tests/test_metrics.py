@@ -0,0 +1,22 @@
+from utils.latency import MetricsRegistry, label_value
+
+PRICE = dict(exchange="OKX", spotAsset="BTC-USDT", orderType="market", quantity=100, volatility=0.02, feeTier="1")
+
+
+def test_label_values_are_escaped():
+    assert label_value('a"b\\c\nd') == 'a\\"b\\\\c\\nd'
+    metrics = MetricsRegistry()
+    metrics.observe("compute", 'X"}\nfake_metric 1', 0.001)
+    text = metrics.render_prometheus()
+    assert "\nfake_metric" not in text
+    assert 'instrument="X\\"}\\nfake_metric 1"' in text
+
+
+def test_unknown_instruments_share_one_label(client):
+    for i in range(5):
+        assert client.post("/", json=dict(PRICE, spotAsset=f'NOPE{i}"-USDT')).status_code == 404
+    assert client.post("/", json=PRICE).status_code == 200
+    text = client.get("/metrics").text
+    assert "NOPE" not in text
+    assert 'stage="compute",instrument="unknown"' in text
+    assert 'stage="compute",instrument="BTC-USDT-SWAP"' in text
@@ -0,0 +1,33 @@
+import asyncio
+import os
+
+from utils.execution import ExecutionLayer
+
+OBSERVATION = dict(exchange="OKX", spotAsset="BTC-USDT", quantity=100, volatility=0.02, marketImpact=0.001)
+
+
+def test_in_process_tasks_run_here_in_process_mode():
+    layer = ExecutionLayer(mode="process", workers=1)
+
+    async def run():
+        return await layer.run(None, os.getpid, in_process=True)
+
+    assert asyncio.run(run()) == os.getpid()
+    assert layer.admitted == 1
+    assert layer._executor is None  # no worker processes were started
+    layer.shutdown()
+
+
+def test_observations_are_admitted_and_keyed_by_market(client):
+    import main
+
+    admitted = main.execution.admitted
+    try:
+        response = client.post("/observations", json=[OBSERVATION, dict(OBSERVATION, quantity=200)])
+        assert response.status_code == 200, response.text
+        assert response.json()["accepted"] == 2
+        assert main.execution.admitted == admitted + 1
+        markets = response.json()["models"]["market_impact"]["markets"]
+        assert [(m["exchange"], m["instId"], m["samples"]) for m in markets] == [("OKX", "BTC-USDT-SWAP", 2)]
+    finally:
+        client.post("/models/reset")
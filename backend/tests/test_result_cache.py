@@ -0,0 +1,32 @@
+from models import registry
+
+PRICE = dict(exchange="MOCK", spotAsset="SOL-USDT", orderType="market", quantity=100, volatility=0.02, feeTier="1")
+
+
+def test_impact_table_is_published_before_serving(client):
+    assert registry.live("impact_table") is not None
+    # Requests never load models that move the generation the caches are keyed on
+    assert registry.generation() == client.startup_generation
+
+
+def test_repeated_request_is_served_from_cache(client):
+    generation = registry.generation()
+    for _ in range(20):
+        first = client.post("/", json=PRICE).json()
+        second = client.post("/", json=PRICE).json()
+        if second.get("cached"):
+            break
+    assert second.get("cached")
+    assert second["cost"] == first["cost"]
+    assert registry.generation() == generation
+
+
+def test_hit_echoes_the_callers_inputs(client):
+    nearby = dict(PRICE, quantity=100.001, volatility=0.020001)
+    for _ in range(20):
+        client.post("/", json=PRICE)
+        response = client.post("/", json=nearby).json()
+        if response.get("cached"):
+            break
+    assert response.get("cached")
+    assert response["volatility"] == 0.020001
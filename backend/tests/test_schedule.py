@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from models.execution import closed_form_schedule
+
+
+def test_closed_form_matches_sinh_trajectory():
+    result = closed_form_schedule(1.0, 20, horizon=1.0, risk_aversion=1.0, volatility=0.3, eta=0.05, gamma=0.01)
+    tau = 1.0 / 20
+    eta_tilde = 0.05 - 0.5 * 0.01 * tau
+    kappa = np.arccosh(0.5 * 0.3 ** 2 / eta_tilde * tau ** 2 + 1) / tau
+    t = np.arange(21) * tau
+    np.testing.assert_allclose(result["inventory"], np.sinh(kappa * (1.0 - t)) / np.sinh(kappa), atol=1e-12)
+
+
+def test_closed_form_is_finite_for_large_kappa_horizon():
+    # kappa T ~ 1000: sinh overflows, the trajectory sells almost everything at once
+    with np.errstate(over="raise", invalid="raise"):
+        result = closed_form_schedule(1.0, 1000, horizon=1000, risk_aversion=1, volatility=1, eta=0.001, gamma=0)
+    assert np.all(np.isfinite(result["inventory"]))
+    assert result["inventory"][0] == 1.0 and result["inventory"][-1] == 0.0
+    assert result["trades"].sum() == pytest.approx(1.0)
+    assert np.isfinite(result["expected_cost"]) and np.isfinite(result["variance"])
+
+
+def test_schedule_endpoint_large_kappa_horizon(client):
+    response = client.post("/schedule", json=dict(
+        quantity=1, timeSteps=1000, horizon=1000, riskAversion=1, volatility=1, eta=0.001, gamma=0,
+    ))
+    assert response.status_code == 200, response.text
+    assert sum(response.json()["trades"]) == pytest.approx(1.0)
+
+
+def test_dp_work_is_bounded(client):
+    response = client.post("/schedule", json=dict(quantity=1, timeSteps=1000, gridSize=2000, method="dp"))
+    assert response.status_code == 400
+    assert "timeSteps x gridSize^2" in response.json()["detail"]
+
+
+def test_dp_runs_on_the_execution_layer(client):
+    import main
+
+    admitted = main.execution.admitted
+    response = client.post("/schedule", json=dict(quantity=1, timeSteps=5, gridSize=50, method="dp"))
+    assert response.status_code == 200, response.text
+    assert sum(response.json()["trades"]) == pytest.approx(1.0)
+    assert main.execution.admitted == admitted + 1
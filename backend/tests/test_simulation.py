@@ -0,0 +1,101 @@
+import time
+
+import numpy as np
+import pytest
+
+from models.simulation import chunk_seeds, simulate_chunks, simulate_costs, simulation_plan, summarize_costs
+
+ASKS = [[100.0 + 0.1 * i, 50.0] for i in range(50)]
+BIDS = [[99.9 - 0.1 * i, 50.0] for i in range(50)]
+
+
+@pytest.fixture(scope="module")
+def plan():
+    return simulation_plan(ASKS, BIDS, 200_000, 0.02, config={"chunk_paths": 500})
+
+
+def simulate_request(**overrides):
+    return dict(dict(exchange="OKX", spotAsset="BTC-USDT", quantity=10_000, volatility=0.02, seed=7), **overrides)
+
+
+def test_seed_gives_the_same_costs_for_any_workers(plan):
+    serial = simulate_costs(plan, paths=3000, seed=11, workers=1)
+    pooled = simulate_costs(plan, paths=3000, seed=11, workers=2)
+    assert serial == pooled
+    assert serial["paths"] == 3000
+    assert simulate_costs(plan, paths=3000, seed=12, workers=1) != serial
+
+
+def test_chunk_grouping_does_not_change_the_result(plan):
+    chunks = chunk_seeds(5, 3000, plan["config"]["chunk_paths"])
+    whole = summarize_costs(plan, simulate_chunks(plan, chunks))
+    for parts in (2, 4):
+        groups = np.array_split(np.arange(len(chunks)), parts)
+        results = [simulate_chunks(plan, [chunks[i] for i in group]) for group in groups]
+        assert summarize_costs(plan, [chunk for part in results for chunk in part]) == whole
+
+
+def test_simulate_endpoint_is_reproducible(client, monkeypatch):
+    import main
+
+    # The same inputs: hold the book still between the two requests (the
+    # live levels are views the feed keeps updating)
+    ticker, asks, bids, features = main.get_market(main.market_key("OKX", "BTC-USDT"))
+    frozen = ticker, np.array(asks), np.array(bids), np.array(features)
+    monkeypatch.setattr(main, "get_market", lambda market: frozen)
+    first = client.post("/simulate", json=simulate_request(paths=5000))
+    second = client.post("/simulate", json=simulate_request(paths=5000))
+    assert first.status_code == 200, first.text
+    assert first.json()["quantiles"] == second.json()["quantiles"]
+    assert first.json()["seed"] == 7
+
+
+def test_large_simulation_takes_one_slot_per_worker(client, monkeypatch):
+    import main
+
+    # Before, every 4096-path chunk was its own admitted task on the instrument
+    monkeypatch.setattr(main.execution, "max_in_flight_per_key", main.execution.workers)
+    response = client.post("/simulate", json=simulate_request(paths=50_000, timeSteps=2))
+    assert response.status_code == 200, response.text
+    assert response.json()["paths"] == 50_000
+
+
+def test_shed_simulation_releases_its_slots(client, monkeypatch):
+    import main
+
+    execution = main.execution
+    if execution.workers < 2:
+        pytest.skip("needs more than one execution worker")
+    monkeypatch.setattr(execution, "max_in_flight_per_key", 1)
+    response = client.post("/simulate", json=simulate_request(paths=50_000, timeSteps=2))
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+    # The admitted part finishes in the background; nothing is left queued or held
+    deadline = time.monotonic() + 10
+    while (execution._in_flight or execution._per_key) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert execution._in_flight == 0
+    assert execution._per_key == {}
+    assert not execution._waiters
+
+
+def test_dp_schedule_with_idle_intervals():
+    from models.execution import dp_schedule
+
+    trades = dp_schedule(1.0, 5, 0.001, 0.5, 0.5, 0.05, 0.05, time_step=0.2)["trades"]
+    assert np.any(trades == 0)
+    scheduled = simulation_plan(ASKS, BIDS, 200_000, 0.02, schedule=trades.tolist(), config={"chunk_paths": 500})
+    result = simulate_costs(scheduled, paths=1000, seed=3)
+    assert np.isfinite(result["mean"]) and all(np.isfinite(list(result["quantiles"].values())))
+
+
+def test_simulate_endpoint_accepts_zero_children(client):
+    response = client.post("/simulate", json=simulate_request(paths=1000, schedule=[0.3, 0.3, 0.2, 0.2, 0.0]))
+    assert response.status_code == 200, response.text
+    assert np.isfinite(response.json()["mean"])
+
+
+def test_simulate_endpoint_rejects_negative_seed(client):
+    response = client.post("/simulate", json=simulate_request(seed=-1))
+    assert response.status_code == 400
@@ -0,0 +1,28 @@
+import numpy as np
+
+from models.surface import cost_surface
+
+ASKS = np.array([[100.0 + 0.1 * i, 5.0] for i in range(20)])
+BIDS = np.array([[99.9 - 0.1 * i, 5.0] for i in range(20)])
+
+
+def test_fee_tier_sets_the_fees():
+    quantities, volatilities = np.array([10.0, 100.0]), np.array([0.01, 0.02])
+    tier1 = cost_surface(ASKS, BIDS, quantities, volatilities)
+    tier3 = cost_surface(ASKS, BIDS, quantities, volatilities, fee_tier=3)
+    np.testing.assert_allclose(tier3["fees"], tier1["fees"] * 0.0007 / 0.0011, atol=1e-6)
+    np.testing.assert_allclose(tier1["cost"] - tier3["cost"], tier1["fees"] - tier3["fees"])
+
+
+def test_surface_endpoint_prices_the_fee_tier(client):
+    surfaces = {
+        tier: client.post("/surface", json=dict(
+            exchange="OKX", spotAsset="BTC-USDT", feeTier=tier, quantities=[100], volatilities=[0.02],
+            components=True,
+        ))
+        for tier in ("1", "3")
+    }
+    for response in surfaces.values():
+        assert response.status_code == 200, response.text
+    assert surfaces["1"].json()["fees"] == [[0.132]]
+    assert surfaces["3"].json()["fees"] == [[0.084]]
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from models import maker_taker, registry, slippage, training
+
+CONFIG = {"rows": 6000, "chunk_rows": 2000, "max_iter": 10}
+ASKS = [[100.0 + 0.1 * i, 5.0] for i in range(20)]
+BIDS = [[99.9 - 0.1 * i, 5.0] for i in range(20)]
+
+
+@pytest.fixture
+def serving(artifact_dir, monkeypatch):
+    """Isolated registry with no online updates published."""
+    monkeypatch.setattr(registry, "_live", {})
+    return artifact_dir
+
+
+def new_worker(monkeypatch):
+    """Forget what this process resolved, as a newly started worker would."""
+    monkeypatch.setattr(registry, "_loaded", {})
+    monkeypatch.setattr(registry, "_promoted", {})
+
+    def rebuild(*args, **kwargs):
+        raise AssertionError("promoted artifacts should be loaded, not rebuilt")
+
+    monkeypatch.setattr(slippage, "train_model", rebuild)
+    monkeypatch.setattr(maker_taker, "train_model", rebuild)
+
+
+def test_promoted_models_are_served(serving, monkeypatch):
+    report = training.run(config=CONFIG, workers=1)
+    assert report["slippage"]["rows"] == report["maker_taker"]["rows"] == CONFIG["rows"]
+    new_worker(monkeypatch)
+
+    assert slippage.serving_config() == training.pipeline_config("slippage", CONFIG)
+    assert maker_taker.serving_config() == training.pipeline_config("maker_taker", CONFIG)
+    assert len(slippage.get_compiled_model().value) == report["slippage"]["nodes"]
+    assert maker_taker.get_compiled_model().coef.tolist() == report["maker_taker"]["coef"]
+
+    assert np.isfinite(slippage.estimate_slippage(ASKS, BIDS, quantity=50, volatility=0.02))
+    probabilities = maker_taker.estimate_maker_taker(ASKS, BIDS, 0.02)
+    assert 0 <= probabilities["maker"] <= 1
+    assert probabilities["maker"] + probabilities["taker"] == pytest.approx(1)
+
+
+def test_unpromoted_run_keeps_serving_the_default(serving, monkeypatch):
+    training.run(models=("maker_taker",), config=CONFIG, workers=1, promote=False)
+    monkeypatch.setattr(registry, "_promoted", {})
+    assert maker_taker.serving_config() == maker_taker.MODEL_CONFIG
+
+
+def trained_slippage(workers):
+    """Slippage forest predictions of a fresh training run with workers."""
+    training.run(models=("slippage",), config=CONFIG, workers=workers, promote=False)
+    key = training.pipeline_config("slippage", CONFIG)
+    registry._loaded.clear()
+    forest = registry.load_or_build("slippage_compiled", key, build=None, mmap=False)
+    rows = np.random.default_rng(0).uniform([0, -1, 1, 0], [1, 1, 1000, 0.1], size=(500, 4))
+    return forest.predict(rows)
+
+
+def test_config_gives_the_same_models_for_any_workers(serving):
+    assert np.array_equal(trained_slippage(1), trained_slippage(2))
+    one = training.run(models=("maker_taker",), config=CONFIG, workers=1, promote=False)
+    two = training.run(models=("maker_taker",), config=CONFIG, workers=2, promote=False)
+    assert one["maker_taker"]["coef"] == two["maker_taker"]["coef"]
+    assert one["maker_taker"]["intercept"] == two["maker_taker"]["intercept"]
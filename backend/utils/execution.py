@@ -0,0 +1,282 @@
+import asyncio
+import contextvars
+import math
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from utils.latency import LatencyHistogram
+
+MODES = ("inline", "thread", "process")
+
+
+class Overloaded(Exception):
+    """
+    A request was shed or ran out of time.
+
+    Attributes:
+    - status: HTTP status to answer with (429 per-instrument limit,
+      503 global overload or queueing delay, 504 deadline exceeded)
+    - detail: human-readable reason
+    - retry_after: suggested seconds before retrying (None for 504)
+    """
+
+    def __init__(self, status, detail, retry_after=None):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @property
+    def headers(self):
+        """Retry-After (whole seconds, at least 1) when a retry hint is available."""
+        if self.retry_after is None:
+            return None
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class ExecutionLayer:
+    """
+    Runs CPU-bound model evaluation off the event loop, with admission control.
+
+    At most `workers` tasks run at once; further admitted tasks wait in a
+    FIFO queue. A request is shed up front (Overloaded) when
+    - the instrument already has max_in_flight_per_key tasks running or queued (429),
+    - max_in_flight tasks are running or queued globally (503), or
+    - the expected queueing delay, from the recent service time and the
+      queue depth, exceeds max_queue_delay (503);
+    and while queued it is shed once it has waited max_queue_delay (503)
+    or its deadline passes (504). Shed responses carry a retry hint.
+
+    Parameters:
+    - mode: "thread" or "process" pool, or "inline" to run on the event loop
+    - workers: pool size (and number of tasks evaluated concurrently)
+    - max_in_flight: running plus queued tasks, globally
+    - max_in_flight_per_key: running plus queued tasks per key (instrument)
+    - max_queue_delay: seconds a task may wait for a worker
+    - default_deadline: seconds a request may take end to end, or None
+    - process_task: optional callable(fn, args) -> (fn, args) applied to
+      tasks sent to the process pool (e.g. to ship the serving models)
+    - initializer: optional callable run once in each worker process
+    """
+
+    def __init__(self, mode="thread", workers=4, max_in_flight=256, max_in_flight_per_key=64,
+                 max_queue_delay=0.25, default_deadline=None, process_task=None, initializer=None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.mode = mode
+        self.workers = workers
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_per_key = max_in_flight_per_key
+        self.max_queue_delay = max_queue_delay
+        self.default_deadline = default_deadline
+        self.process_task = process_task
+        self.initializer = initializer
+        self._executor = None
+
+        self._running = 0
+        self._waiters = deque()
+        self._in_flight = 0
+        self._per_key = {}
+        # Recent per-task service time (EWMA), for the queueing delay estimate
+        self._service_time = 0.0
+
+        self.wait_time = LatencyHistogram()
+        self.service_time = LatencyHistogram()
+        self.admitted = 0
+        self.shed = {"key_limit": 0, "global_limit": 0, "queue_delay": 0, "deadline": 0}
+
+    @property
+    def executor(self):
+        """The worker pool, created on first use (None inline)."""
+        if self._executor is None and self.mode != "inline":
+            if self.mode == "thread":
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="models")
+            else:
+                # spawn: forking a process that runs an event loop and feed threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=self.initializer
+                )
+        return self._executor
+
+    def expected_wait(self):
+        """Seconds a newly queued task is expected to wait for a worker."""
+        return len(self._waiters) * self._service_time / max(self.workers, 1)
+
+    def _retry_after(self):
+        return max(self.expected_wait(), self._service_time)
+
+    def _admit(self, key):
+        if key is not None and self._per_key.get(key, 0) >= self.max_in_flight_per_key:
+            self.shed["key_limit"] += 1
+            raise Overloaded(429, f"Too many requests in flight for {key}", self._retry_after())
+        if self._in_flight >= self.max_in_flight:
+            self.shed["global_limit"] += 1
+            raise Overloaded(503, "Server overloaded", self._retry_after())
+        if self._running >= self.workers and self.expected_wait() > self.max_queue_delay:
+            self.shed["queue_delay"] += 1
+            raise Overloaded(503, "Queueing delay too high", self._retry_after())
+        self._in_flight += 1
+        if key is not None:
+            self._per_key[key] = self._per_key.get(key, 0) + 1
+
+    def _leave(self, key):
+        self._in_flight -= 1
+        if key is not None:
+            count = self._per_key[key] - 1
+            if count:
+                self._per_key[key] = count
+            else:
+                del self._per_key[key]
+
+    async def _acquire(self, timeout):
+        """Wait up to timeout seconds for a worker slot (FIFO). Returns True once held."""
+        if self._running < self.workers and not self._waiters:
+            self._running += 1
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return True  # handed a slot just as the wait ran out
+            waiter.cancel()
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def _release(self):
+        # Hand the slot straight to the next live waiter, if any
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._running -= 1
+
+    def _record_service(self, seconds):
+        self.service_time.record(seconds)
+        self._service_time = seconds if not self._service_time else 0.9 * self._service_time + 0.1 * seconds
+
+    async def run(self, key, fn, *args, deadline=None, in_process=False):
+        """
+        Evaluate fn(*args) on the pool under admission control.
+
+        Parameters:
+        - key: admission key (e.g. the instrument), or None for global limits only
+        - fn, args: the task; must be picklable in process mode
+        - deadline: seconds the caller can wait (default_deadline if None)
+        - in_process: the task updates this process's state; in process mode
+          it runs on a thread here instead (still holding a worker slot)
+
+        Returns:
+        - fn's result
+        Raises Overloaded when the task is shed or its deadline passes.
+        """
+        if deadline is None:
+            deadline = self.default_deadline
+        started = time.perf_counter()
+        expires = started + deadline if deadline is not None else None
+        self._admit(key)
+        try:
+            timeout = self.max_queue_delay
+            if expires is not None:
+                timeout = min(timeout, max(expires - started, 0.0))
+            if not await self._acquire(timeout):
+                self.wait_time.record(time.perf_counter() - started)
+                if expires is not None and time.perf_counter() >= expires:
+                    self.shed["deadline"] += 1
+                    raise Overloaded(504, "Deadline exceeded while queued")
+                self.shed["queue_delay"] += 1
+                raise Overloaded(503, "Queueing delay too high", self._retry_after())
+            self.admitted += 1
+            begun = time.perf_counter()
+            self.wait_time.record(begun - started)
+            try:
+                future = self._submit(fn, args, in_process)
+            except BaseException:
+                self._release()
+                raise
+
+            def done(_):
+                # The slot is held until the work itself finishes, even if the caller gave up
+                self._release()
+                self._record_service(time.perf_counter() - begun)
+
+            future.add_done_callback(done)
+            remaining = expires - time.perf_counter() if expires is not None else None
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), remaining)
+            except asyncio.TimeoutError:
+                self.shed["deadline"] += 1
+                raise Overloaded(504, "Deadline exceeded")
+        finally:
+            self._leave(key)
+
+    def _submit(self, fn, args, in_process=False):
+        loop = asyncio.get_running_loop()
+        if self.mode == "inline":
+            future = loop.create_future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if self.mode == "thread" or in_process:
+            # Carry the request's context (latency labels, breakdown) into the thread
+            context = contextvars.copy_context()
+            executor = self.executor if self.mode == "thread" else None
+            return loop.run_in_executor(executor, context.run, fn, *args)
+        if self.process_task is not None:
+            fn, args = self.process_task(fn, args)
+        return loop.run_in_executor(self.executor, fn, *args)
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "running": self._running,
+            "queued": len(self._waiters),
+            "inFlight": self._in_flight,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "waitP99Ms": round(self.wait_time.quantile(0.99) * 1000, 3),
+            "serviceP99Ms": round(self.service_time.quantile(0.99) * 1000, 3),
+        }
+
+    def render_prometheus(self, name="execution"):
+        """Queue gauges, wait/service time summaries and shed counters in Prometheus text format."""
+        lines = []
+        for gauge, value in (("queue_depth", len(self._waiters)), ("running", self._running),
+                             ("in_flight", self._in_flight)):
+            lines.append(f"# TYPE {name}_{gauge} gauge")
+            lines.append(f"{name}_{gauge} {value}")
+        lines.append(f"# TYPE {name}_admitted_total counter")
+        lines.append(f"{name}_admitted_total {self.admitted}")
+        lines.append(f"# TYPE {name}_shed_total counter")
+        for reason, count in self.shed.items():
+            lines.append(f'{name}_shed_total{{reason="{reason}"}} {count}')
+        for metric, histogram in (("wait_seconds", self.wait_time), ("service_seconds", self.service_time)):
+            lines.append(f"# TYPE {name}_{metric} summary")
+            for q in (0.5, 0.9, 0.99, 0.999):
+                lines.append(f'{name}_{metric}{{quantile="{q}"}} {histogram.quantile(q):.9f}')
+            lines.append(f"{name}_{metric}_sum {histogram.sum:.9f}")
+            lines.append(f"{name}_{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,4 +1,148 @@
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
 
 def measure_latency(start_tick):
     return round((time.perf_counter() - start_tick) * 1000, 3)  # ms
+
+
+# Log-linear buckets: 32 sub-buckets per power of two over microseconds,
+# i.e. ~3% relative precision from 1 us up to ~36 hours
+SUB_BUCKETS = 32
+MAX_SHIFT = 32
+N_BUCKETS = SUB_BUCKETS * (MAX_SHIFT + 2)
+
+
+def _bucket(micros):
+    if micros < 2 * SUB_BUCKETS:
+        return micros
+    shift = min(micros.bit_length() - 6, MAX_SHIFT)
+    return min(SUB_BUCKETS * shift + (micros >> shift), N_BUCKETS - 1)
+
+
+def _bucket_value(index):
+    # Midpoint of the bucket, in microseconds
+    if index < 2 * SUB_BUCKETS:
+        return float(index)
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index - SUB_BUCKETS * shift
+    return (mantissa << shift) + (1 << shift) / 2
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram with fixed log-linear buckets.
+
+    record() is a couple of integer ops and one list increment, with no
+    lock; concurrent threads may very rarely lose a count, which is fine
+    for latency statistics.
+    """
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.sum = 0.0
+
+    def record(self, seconds):
+        self.counts[_bucket(int(seconds * 1e6))] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Approximate q-quantile in seconds (0.0 if empty)."""
+        total = sum(self.counts)
+        if total == 0:
+            return 0.0
+        target = q * total
+        running = 0
+        for index, c in enumerate(self.counts):
+            running += c
+            if running >= target and c:
+                return _bucket_value(index) / 1e6
+        return 0.0
+
+
+def label_value(value):
+    """Escape a Prometheus label value (backslash, double quote and newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """Latency histograms keyed by (stage, instrument)."""
+
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+    def __init__(self):
+        self.histograms = {}
+
+    def observe(self, stage, instrument, seconds):
+        key = (stage, instrument)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms.setdefault(key, LatencyHistogram())
+        histogram.record(seconds)
+
+    def render_prometheus(self, name="stage_latency_seconds"):
+        """Prometheus text exposition of every histogram as a summary."""
+        lines = [
+            f"# HELP {name} Latency of each compute stage.",
+            f"# TYPE {name} summary",
+        ]
+        for (stage, instrument), histogram in sorted(self.histograms.items()):
+            labels = f'stage="{label_value(stage)}",instrument="{label_value(instrument)}"'
+            for q in self.QUANTILES:
+                lines.append(f'{name}{{{labels},quantile="{q}"}} {histogram.quantile(q):.9f}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.9f}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+# Labels and optional per-request breakdown for spans in the current request
+_instrument = ContextVar("instrument", default="")
+_breakdown = ContextVar("breakdown", default=None)
+
+
+@contextmanager
+def request_scope(instrument, breakdown=False):
+    """
+    Label spans inside this block with instrument.
+
+    Yields:
+    - dict of stage -> milliseconds filled in by spans if breakdown is set, else None
+    """
+    stages = {} if breakdown else None
+    instrument_token = _instrument.set(instrument)
+    breakdown_token = _breakdown.set(stages)
+    try:
+        yield stages
+    finally:
+        _instrument.reset(instrument_token)
+        _breakdown.reset(breakdown_token)
+
+
+@contextmanager
+def span(stage):
+    """Time the enclosed block into the stage histogram (and breakdown, if any)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        METRICS.observe(stage, _instrument.get(), elapsed)
+        stages = _breakdown.get()
+        if stages is not None:
+            stages[stage] = round(stages.get(stage, 0.0) + elapsed * 1000, 3)
+
+
+def timed(stage):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
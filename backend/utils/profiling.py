@@ -0,0 +1,267 @@
+"""
+Opt-in sampling profiler for the running API process.
+
+A background thread wakes every `interval` seconds, reads the current
+Python stack of every other thread (sys._current_frames) and counts it as
+a collapsed stack ("thread;outer (file.py:line);...;inner (file.py:line)"),
+the input format of flamegraph.pl, speedscope and similar tools. Nothing
+runs while the profiler is stopped; while sampling, the cost is one stack
+walk per thread per interval on the sampler thread (see
+benchmarks/profiling.py), independent of the request rate.
+
+Two modes:
+- window: every sample is counted, for a fixed number of seconds
+- requests: samples go to a short ring buffer; when a profiled request
+  (every Kth) finishes above the latency threshold, the samples taken
+  during it on the event loop thread and the model worker threads are
+  counted. Requests overlapping in time share samples, so attribution is
+  per time window, not exact per request.
+
+Only this process is sampled: with EXECUTION_MODE=process, model
+evaluation runs in worker processes the profiler does not see.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+# Leaf frames of threads that are blocked waiting for work; skipped unless idle=True
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+class SamplingProfiler:
+    """
+    Parameters:
+    - interval: default seconds between samples
+    - max_depth: frames kept per stack (the innermost ones)
+    - window: seconds of samples the ring buffer holds in request mode
+    - worker_prefix: thread name prefix of the model worker threads whose
+      samples are attributed to requests (see utils.execution)
+    """
+
+    def __init__(self, interval=0.01, max_depth=64, window=5.0, worker_prefix="models"):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.window = window
+        self.worker_prefix = worker_prefix
+        self.idle = False
+        self.mode = None
+        self.stacks = Counter()
+        self.samples = 0
+        self.sample_time = 0.0
+        self.requests_seen = 0
+        self.requests_profiled = 0
+        self.every = 1
+        self.threshold = 0.0
+        self.started = None
+        self.until = None
+        self._labels = {}
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _stack(self, frame):
+        code = frame.f_code
+        if not self.idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return None
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return labels
+
+    def _sample(self, own):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        now = time.perf_counter()
+        taken = []
+        for tid, frame in sys._current_frames().items():
+            if tid == own:
+                continue
+            labels = self._stack(frame)
+            if labels is not None:
+                taken.append((tid, ";".join([names.get(tid, str(tid))] + labels)))
+        with self._lock:
+            self.samples += 1
+            if self.mode == "window":
+                for _, stack in taken:
+                    self.stacks[stack] += 1
+            else:
+                for tid, stack in taken:
+                    self._recent.append((now, tid, stack))
+                while self._recent and self._recent[0][0] < now - self.window:
+                    self._recent.popleft()
+        self.sample_time += time.perf_counter() - now
+
+    def _run(self, interval):
+        own = threading.get_ident()
+        next_at = time.perf_counter()
+        while not self._stop.is_set():
+            if self.until is not None and time.perf_counter() >= self.until:
+                break
+            self._sample(own)
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay < 0:
+                # Fell behind (e.g. GIL contention): skip the missed ticks
+                next_at = time.perf_counter()
+                delay = 0
+            self._stop.wait(delay)
+        self.until = None
+
+    def _start(self, mode, seconds, interval, idle):
+        self.stop()
+        self.reset()
+        self.mode = mode
+        self.idle = idle
+        self.started = time.time()
+        self.until = time.perf_counter() + seconds if seconds else None
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval or self.interval,), name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def start(self, seconds, interval=None, idle=False):
+        """Count every sample for the next `seconds` seconds (discards earlier results)."""
+        self._start("window", seconds, interval, idle)
+
+    def profile_requests(self, every=1, threshold=0.0, seconds=None, interval=None, idle=False):
+        """
+        Count the samples of every `every`-th request slower than `threshold`
+        seconds, until stopped or for `seconds` (discards earlier results).
+        """
+        self.every = max(int(every), 1)
+        self.threshold = threshold
+        self._start("requests", seconds, interval, idle)
+
+    def stop(self):
+        """Stop sampling; collected stacks are kept until the next start or reset."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._recent.clear()
+
+    def reset(self):
+        with self._lock:
+            self.stacks = Counter()
+            self.samples = 0
+            self.sample_time = 0.0
+            self.requests_seen = 0
+            self.requests_profiled = 0
+            self._recent.clear()
+
+    def request_started(self):
+        """
+        Call at the start of a request on the event loop.
+
+        Returns:
+        - token for request_finished, or None if this request is not profiled
+        """
+        if self.mode != "requests" or not self.running:
+            return None
+        self.requests_seen += 1
+        if self.requests_seen % self.every:
+            return None
+        return time.perf_counter(), threading.get_ident()
+
+    def request_finished(self, token):
+        """Count the samples taken during the request if it was slower than the threshold."""
+        if token is None:
+            return
+        start, loop_thread = token
+        if time.perf_counter() - start < self.threshold:
+            return
+        threads = {loop_thread} | {
+            t.ident for t in threading.enumerate() if t.name.startswith(self.worker_prefix)
+        }
+        with self._lock:
+            self.requests_profiled += 1
+            for ts, tid, stack in reversed(self._recent):
+                if ts < start:
+                    break
+                if tid in threads:
+                    self.stacks[stack] += 1
+
+    def collapsed(self):
+        """Collapsed stacks, one "stack count" line each, most frequent first."""
+        with self._lock:
+            items = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def top(self, n=20):
+        """
+        Functions by samples, across every collected stack.
+
+        Returns:
+        - list of {"function", "self", "total"}: samples with the function
+          innermost, and samples with it anywhere on the stack
+        """
+        own, total = Counter(), Counter()
+        with self._lock:
+            items = list(self.stacks.items())
+        for stack, count in items:
+            frames = stack.split(";")[1:]
+            if frames:
+                own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return [{"function": f, "self": own[f], "total": c} for f, c in total.most_common(n)]
+
+    def status(self):
+        return {
+            "running": self.running,
+            "mode": self.mode,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "samplingMs": round(self.sample_time * 1000, 3),
+            "requestsSeen": self.requests_seen,
+            "requestsProfiled": self.requests_profiled,
+            "every": self.every,
+            "thresholdMs": self.threshold * 1000,
+            "started": self.started,
+        }
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware reporting HTTP requests to a SamplingProfiler in request mode.
+
+    Parameters:
+    - profiler: the SamplingProfiler
+    - exclude: path prefixes never profiled (e.g. the profiler's own endpoints)
+    """
+
+    def __init__(self, app, profiler, exclude=()):
+        self.app = app
+        self.profiler = profiler
+        self.exclude = tuple(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude):
+            return await self.app(scope, receive, send)
+        token = self.profiler.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.request_finished(token)
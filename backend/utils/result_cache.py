@@ -0,0 +1,137 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+def quantize(value, digits):
+    """Round value to `digits` significant digits (so 100.02 and 100.04 share a key)."""
+    return float(f"{value:.{digits}g}")
+
+
+def _sizeof(obj):
+    # Rough deep size of a result dict of numbers, strings, lists and dicts
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(sys.getsizeof(k) + _sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_sizeof(v) for v in obj)
+    return size
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of computed cost results.
+
+    Keys combine the market (exchange, instId), the market-data version the
+    result was computed on, quantized order parameters, the fee tier and the
+    order type; a hit is the result of the first request in its quantization
+    cell, so nearby sizes and volatilities share (approximate) costs. When a market's version moves, every entry for the previous
+    version is dropped, so a stale result can never be served.
+
+    Parameters:
+    - max_entries: entry cap
+    - max_bytes: approximate memory cap over the cached results
+    - quantity_digits, volatility_digits: significant digits kept in the key
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=16 * 1024 * 1024, quantity_digits=4, volatility_digits=3):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.quantity_digits = quantity_digits
+        self.volatility_digits = volatility_digits
+        self._entries = OrderedDict()  # key -> (result, size)
+        self._by_market = {}  # market -> (version, set of keys)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, market, version, quantity, volatility, fee_tier, order_type):
+        return (
+            market,
+            version,
+            quantize(quantity, self.quantity_digits),
+            quantize(volatility, self.volatility_digits),
+            fee_tier,
+            order_type,
+        )
+
+    def get(self, key):
+        """Cached result for key, or None (counted as a miss)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, result):
+        """Store result; drops older versions of the same market first."""
+        market, version = key[0], key[1]
+        size = _sizeof(result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            current = self._by_market.get(market)
+            if current is None or current[0] != version:
+                if current is not None:
+                    for old in list(current[1]):
+                        self._remove(old)
+                    self.invalidations += 1
+                current = (version, set())
+                self._by_market[market] = current
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (result, size)
+            current[1].add(key)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry[1]
+        group = self._by_market.get(key[0])
+        if group is not None:
+            group[1].discard(key)
+            if not group[1]:
+                del self._by_market[key[0]]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_market.clear()
+            self._bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def render_prometheus(self, name="result_cache"):
+        """Counters and gauges in Prometheus text format."""
+        stats = self.stats()
+        lines = []
+        for counter in ("hits", "misses", "evictions", "invalidations"):
+            lines.append(f"# TYPE {name}_{counter}_total counter")
+            lines.append(f"{name}_{counter}_total {stats[counter]}")
+        lines.append(f"# TYPE {name}_entries gauge")
+        lines.append(f"{name}_entries {stats['entries']}")
+        lines.append(f"# TYPE {name}_bytes gauge")
+        lines.append(f"{name}_bytes {stats['bytes']}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,134 @@
+import asyncio
+import inspect
+
+
+class Subscriber:
+    """
+    One WebSocket client's mailbox. Only the latest result is kept, so a
+    slow client skips intermediate updates instead of queueing them.
+    """
+
+    def __init__(self):
+        self.latest = None
+        self._event = asyncio.Event()
+
+    def push(self, result):
+        self.latest = result
+        self._event.set()
+
+    async def next(self):
+        """Wait for and return the most recent result not yet delivered."""
+        await self._event.wait()
+        self._event.clear()
+        return self.latest
+
+
+class _Group:
+    def __init__(self, key, inst_id):
+        self.key = key
+        self.inst_id = inst_id
+        self.subscribers = set()
+        self.dirty = asyncio.Event()
+        self.last_version = None
+        self.last_result = None
+        self.task = None
+
+
+class StreamHub:
+    """
+    Shares cost recomputation between WebSocket subscribers.
+
+    Subscribers with the same parameters form one group; when the group's
+    instrument changes, its result is recomputed once and pushed to every
+    subscriber in the group. Bursts of market updates between two
+    recomputations collapse into a single one.
+
+    Parameters:
+    - compute: callable(params) -> result dict (or an awaitable of one);
+      called on the event loop
+    - version: callable(inst_id) -> hashable market-data version; a group is
+      only recomputed when this moves
+    """
+
+    def __init__(self, compute, version):
+        self.compute = compute
+        self.version = version
+        self._groups = {}
+        self._by_inst = {}
+        self._loop = None
+
+    def attach(self, loop):
+        """Bind to the event loop so notify_threadsafe can be used from threads."""
+        self._loop = loop
+
+    def subscribe(self, key, inst_id, params):
+        """
+        Add a subscriber for params (identified by the hashable key).
+
+        Returns:
+        - (group key, Subscriber)
+        """
+        group = self._groups.get(key)
+        if group is None:
+            group = _Group(key, inst_id)
+            self._groups[key] = group
+            self._by_inst.setdefault(inst_id, set()).add(key)
+            group.task = asyncio.get_running_loop().create_task(self._run(group, params))
+        subscriber = Subscriber()
+        group.subscribers.add(subscriber)
+        if group.last_result is not None:
+            subscriber.push(group.last_result)
+        else:
+            group.dirty.set()
+        return key, subscriber
+
+    def unsubscribe(self, key, subscriber):
+        group = self._groups.get(key)
+        if group is None:
+            return
+        group.subscribers.discard(subscriber)
+        if not group.subscribers:
+            group.task.cancel()
+            del self._groups[key]
+            keys = self._by_inst.get(group.inst_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_inst[group.inst_id]
+
+    def notify(self, inst_id):
+        """Mark every group on inst_id as needing a recompute (event loop only)."""
+        for key in self._by_inst.get(inst_id, ()):
+            self._groups[key].dirty.set()
+
+    def notify_threadsafe(self, inst_ids):
+        """notify() for a batch of instruments from a non-loop thread."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        watched = [inst_id for inst_id in inst_ids if inst_id in self._by_inst]
+        if watched:
+            self._loop.call_soon_threadsafe(lambda: [self.notify(i) for i in watched])
+
+    async def _run(self, group, params):
+        while True:
+            await group.dirty.wait()
+            group.dirty.clear()
+            version = self.version(group.inst_id)
+            if version == group.last_version and group.last_result is not None:
+                continue
+            try:
+                result = self.compute(params)
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception as e:
+                result = {"error": getattr(e, "detail", str(e))}
+            group.last_version = version
+            group.last_result = result
+            for subscriber in group.subscribers:
+                subscriber.push(result)
+            # Let other tasks (and clients) run before the next recompute
+            await asyncio.sleep(0)
+
+    @property
+    def groups(self):
+        return len(self._groups)